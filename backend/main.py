@@ -2,12 +2,24 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from routers import predict, compare, insights
+from routers import predict, compare, insights, models, bulk
 from utils.constants import TICKER_LIST
 from utils.features import get_features_for_ticker
 from utils.sentiment import get_sentiment_for_ticker
+from utils.sentiment_engine import compare_engines, ENGINE_LOADERS, NEUTRAL_BAND
+from utils.sentiment_index import current_index, query_series
+from utils.warehouse import warehouse_status, get_warehouse_dir
+from utils.universe import get_universe
+from utils.monitoring import drift_report, drift_summary
+from utils.resilience import provider_status
+from utils.market_data import provider_routes
+from utils.prediction_log import flush as flush_prediction_log
+from utils.precompute import PrecomputeScheduler, precomputed
+from utils.market_calendar import market_status
+from utils.admission import AdmissionMiddleware, admission_status
+from utils.http_cache import HttpCacheMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import logging
 import os
 from datetime import datetime
@@ -20,9 +32,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Post-close prediction batches for every symbol with a model (see utils/precompute.py)
+precompute_scheduler = PrecomputeScheduler(
+    symbols=lambda: get_universe().symbols(with_model=True),
+    predict=lambda symbol: predict.compute_prediction(symbol, source="precompute"),
+    compare=lambda symbols: compare.predict_stocks(symbols, source="precompute"),
+)
+
 class CompareRequest(BaseModel):
     tickers: List[str]
 
+class SentimentCompareRequest(BaseModel):
+    texts: List[str]
+    engines: Optional[List[str]] = None
+    neutral_band: Optional[float] = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
@@ -49,6 +73,12 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.error(f"Error reading models directory: {e}")
         
+        # Build the ticker universe once so lookups are served from memory
+        universe = get_universe()
+        logger.info(f"Ticker universe loaded: {len(universe.entries)} symbols")
+        
+        precompute_scheduler.start()
+        
         logger.info("✅ StAI API startup complete")
         
     except Exception as e:
@@ -58,6 +88,8 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🔄 StAI API shutting down...")
+    precompute_scheduler.stop()
+    flush_prediction_log()
     logger.info("✅ StAI API shutdown complete")
 
 # Create FastAPI app
@@ -68,6 +100,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting and load shedding (added first so CORS headers still wrap its 429 / 503s)
+app.add_middleware(AdmissionMiddleware)
+
+# Compression, Cache-Control / ETag and 304s (inside CORS, outside rate limiting)
+app.add_middleware(HttpCacheMiddleware)
+
 # CORS configuration for Railway
 app.add_middleware(
     CORSMiddleware,
@@ -102,6 +140,8 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(predict.router)
 app.include_router(compare.compare_router)
 app.include_router(insights.insights_router)
+app.include_router(models.models_router)
+app.include_router(bulk.bulk_router)
 
 @app.get("/")
 async def root():
@@ -131,8 +171,14 @@ async def root():
                 "compare": "/compare/",
                 "insights": "/insights/{symbol}",
                 "tickers": "/tickers",
+                "ticker_search": "/tickers/search?q={query}",
+                "models": "/models/{ticker}",
+                "prediction_history": "/predictions/{symbol}",
+                "bulk_predict": "/bulk/predict",
                 "features": "/features/{ticker}",
+                "market_status": "/market/{symbol}",
                 "sentiment": "/sentiment/{ticker}",
+                "sentiment_history": "/sentiment/{ticker}/history",
                 "health": "/health"
             }
         }
@@ -190,18 +236,52 @@ async def health_check():
         }
 
 @app.get("/tickers")
-def get_supported_tickers():
-    """Get list of supported stock tickers"""
+def get_supported_tickers(details: bool = False, all: bool = False):
+    """Get list of supported stock tickers (symbols with a prediction model unless all=true)"""
     try:
-        return {
-            "tickers": TICKER_LIST,
-            "count": len(TICKER_LIST),
+        universe = get_universe()
+        symbols = universe.symbols() if all else universe.symbols(with_model=True)
+        
+        response = {
+            "tickers": symbols,
+            "count": len(symbols),
             "timestamp": datetime.now().isoformat()
         }
+        if details:
+            response["details"] = [universe.get(symbol) for symbol in symbols]
+        return response
     except Exception as e:
         logger.error(f"Error getting tickers: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving tickers: {str(e)}")
 
+@app.get("/tickers/search")
+def search_tickers(q: str, limit: int = 10, fuzzy: bool = True):
+    """Prefix and fuzzy search over ticker symbols and names"""
+    try:
+        limit = max(1, min(limit, 50))
+        results = get_universe().search(q, limit=limit, fuzzy=fuzzy)
+        return {
+            "query": q,
+            "results": results,
+            "count": len(results)
+        }
+    except Exception as e:
+        logger.error(f"Error searching tickers for '{q}': {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching tickers: {str(e)}")
+
+@app.get("/tickers/{symbol}")
+def get_ticker_metadata(symbol: str):
+    """Get universe metadata (name, exchange, model/data availability) for a ticker"""
+    entry = get_universe().get(symbol)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {symbol}")
+    return entry
+
+@app.get("/market/{symbol}")
+def get_market_status(symbol: str):
+    """Trading session of a symbol's exchange: open now, last close, next open (for client polling)"""
+    return market_status(symbol)
+
 @app.get("/features/{ticker}")
 def get_features(ticker: str):
     """Get technical features for a specific ticker"""
@@ -243,6 +323,40 @@ def get_sentiment(ticker: str):
         logger.error(f"Error getting sentiment for {ticker}: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving sentiment: {str(e)}")
 
+@app.get("/sentiment/{ticker}/history")
+def get_sentiment_history(ticker: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Time-decayed sentiment index of a ticker at each update between start and end (ISO dates)"""
+    ticker = ticker.upper()
+    index = current_index(ticker)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No sentiment index for ticker: {ticker}")
+    
+    try:
+        series = query_series(ticker, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "ticker": ticker,
+        "current": index,
+        "series": series
+    }
+
+@app.post("/sentiment/compare")
+def compare_sentiment_engines(request: SentimentCompareRequest):
+    """Classify the same headlines with each sentiment engine (tfidf, hashed) side by side"""
+    engines = request.engines or list(ENGINE_LOADERS)
+    unknown = [name for name in engines if name not in ENGINE_LOADERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown engines {unknown}, available: {list(ENGINE_LOADERS)}")
+    if not request.texts or len(request.texts) > 1000:
+        raise HTTPException(status_code=400, detail="Provide between 1 and 1000 texts")
+    neutral_band = request.neutral_band if request.neutral_band is not None else NEUTRAL_BAND
+    if not 0 <= neutral_band < 0.5:
+        raise HTTPException(status_code=400, detail="neutral_band must be in [0, 0.5)")
+    
+    return compare_engines(request.texts, engines, neutral_band)
+
 @app.get("/debug/info")
 async def debug_info():
     """Debug endpoint for deployment troubleshooting"""
@@ -292,6 +406,56 @@ async def debug_info():
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get("/monitoring/drift")
+def get_drift_summary():
+    """Drift and data-quality status of the live feature vectors, per ticker"""
+    return {
+        "tickers": drift_summary(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/monitoring/drift/{ticker}")
+def get_drift_report(ticker: str):
+    """Per-feature live vs training statistics for one ticker"""
+    report = drift_report(ticker)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"No live feature vectors recorded for {ticker.upper()}")
+    return report
+
+@app.get("/debug/providers")
+def debug_providers():
+    """Provider routing, circuit breaker state and call statistics of the upstream data providers"""
+    return {**provider_status(), **provider_routes()}
+
+@app.get("/debug/warehouse")
+def debug_warehouse():
+    """Debug endpoint listing the locally stored OHLCV history per ticker"""
+    try:
+        return {
+            "warehouse_directory": str(get_warehouse_dir()),
+            "tickers": warehouse_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error reading warehouse status: {e}")
+        raise HTTPException(status_code=500, detail=f"Error reading warehouse: {str(e)}")
+
+@app.get("/debug/precompute")
+def debug_precompute():
+    """Session state and stored post-close predictions per market"""
+    return {
+        "markets": precomputed.status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/debug/admission")
+def debug_admission():
+    """Rate limiting and per-route concurrency / queue state"""
+    return {
+        **admission_status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 # Railway deployment entry point
 if __name__ == "__main__":
     import uvicorn
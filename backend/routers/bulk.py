@@ -0,0 +1,240 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import math
+import logging
+import warnings
+import numpy as np
+import pandas as pd
+from utils.bulk import (
+    NDJSON_MEDIA_TYPE, NPY_MEDIA_TYPE, BULK_CHUNK_SIZE,
+    spool_body, chunked, iter_ndjson, NpyReader, npy_vector_header
+)
+from utils.global_model import load_global_model, predict_global
+from utils.model_registry import get_active_model
+from utils.responses import encode_json
+from routers.compare import predict_stocks
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+bulk_router = APIRouter(prefix="/bulk", tags=["bulk"])
+
+FEATURE_NAMES = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
+MODEL_MODES = ("auto", "global", "ticker")
+OUTPUT_FORMATS = ("ndjson", "npy")
+
+RowScorer = Callable[[np.ndarray], np.ndarray]
+
+def resolve_row_scorer(ticker: str, model_mode: str) -> Tuple[RowScorer, str, str]:
+    """
+    Batched scorer for raw feature rows of one ticker
+
+    Returns:
+        Tuple of (score(rows) -> predicted closes, model source, model version)
+    """
+    if model_mode != "global":
+        try:
+            model, scaler, version = get_active_model(ticker)
+
+            def score(rows: np.ndarray) -> np.ndarray:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", category=UserWarning)
+                    scaled = scaler.transform(pd.DataFrame(rows, columns=FEATURE_NAMES))
+                    return np.asarray(model.predict(scaled), dtype=np.float64)
+
+            return score, "ticker", version
+        except FileNotFoundError:
+            if model_mode == "ticker":
+                raise
+
+    artifact = load_global_model()
+    if artifact is None:
+        raise FileNotFoundError(f"No model available for {ticker}")
+    return (lambda rows: predict_global(artifact, rows)), "global", "global"
+
+class RowScorers:
+    """Scorers resolved once per ticker for the lifetime of one bulk request"""
+
+    def __init__(self, model_mode: str):
+        self.model_mode = model_mode
+        self._scorers: Dict[str, Any] = {}
+
+    def get(self, ticker: str) -> Tuple[RowScorer, str, str]:
+        if ticker not in self._scorers:
+            try:
+                self._scorers[ticker] = resolve_row_scorer(ticker, self.model_mode)
+            except Exception as e:
+                self._scorers[ticker] = e
+        scorer = self._scorers[ticker]
+        if isinstance(scorer, Exception):
+            raise scorer
+        return scorer
+
+def feature_row(values: Any) -> List[float]:
+    """The features of one NDJSON line as floats, raising ValueError unless they are 8 finite numbers"""
+    if not isinstance(values, list) or len(values) != len(FEATURE_NAMES):
+        raise ValueError(f"Expected {len(FEATURE_NAMES)} features: {FEATURE_NAMES}")
+    row = []
+    for name, value in zip(FEATURE_NAMES, values):
+        try:
+            number = float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+        except OverflowError:
+            number = None
+        if number is None or not math.isfinite(number):
+            raise ValueError(f"Feature {name} must be a finite number, got {value!r}")
+        row.append(number)
+    return row
+
+def score_ndjson_chunk(items: List[Tuple[int, Any]], model_mode: str, scorers: RowScorers) -> List[Dict]:
+    """
+    Score one chunk of NDJSON requests, returning one result per line
+
+    Lines with only a ticker are predicted from its latest bars (bulk history
+    fetch, batched global model); lines with features are validated one by
+    one, so a bad row only fails its own line, then grouped by ticker and
+    scored with one model call per ticker.
+    """
+    results: Dict[int, Dict] = {}
+    ticker_lines: List[Tuple[int, str]] = []
+    feature_rows: Dict[str, List[Tuple[int, list]]] = {}
+
+    for line_no, item in items:
+        if isinstance(item, Exception):
+            results[line_no] = {"line": line_no, "error": f"Invalid JSON: {item}", "success": False}
+        elif not isinstance(item, dict) or not isinstance(item.get("ticker"), str) or not item["ticker"].strip():
+            results[line_no] = {"line": line_no, "error": "Each line needs a ticker", "success": False}
+        elif item.get("features") is None:
+            ticker_lines.append((line_no, item["ticker"].strip().upper()))
+        else:
+            ticker = item["ticker"].strip().upper()
+            try:
+                row = feature_row(item["features"])
+            except ValueError as e:
+                results[line_no] = {"line": line_no, "ticker": ticker, "error": str(e), "success": False}
+                continue
+            # Grouped only once valid, so a ticker without valid rows never loads a model
+            feature_rows.setdefault(ticker, []).append((line_no, row))
+
+    if ticker_lines:
+        predictions = predict_stocks([ticker for _, ticker in ticker_lines], model_mode=model_mode, source="bulk")
+        for (line_no, _), prediction in zip(ticker_lines, predictions):
+            results[line_no] = {"line": line_no, **prediction}
+
+    for ticker, rows in feature_rows.items():
+        try:
+            score, model_source, model_version = scorers.get(ticker)
+            predicted = score(np.asarray([features for _, features in rows], dtype=np.float64))
+            for (line_no, _), value in zip(rows, predicted):
+                results[line_no] = {
+                    "line": line_no, "ticker": ticker, "predicted_close": float(value),
+                    "model": model_source, "model_version": model_version, "success": True
+                }
+        except Exception as e:
+            for line_no, _ in rows:
+                results[line_no] = {"line": line_no, "ticker": ticker, "error": str(e), "success": False}
+
+    return [results[line_no] for line_no, _ in items]
+
+def stream_ndjson(body, model_mode: str, chunk_size: int) -> Iterator[bytes]:
+    """One NDJSON block per scored chunk; the next chunk is only scored once the client took this one"""
+    scorers = RowScorers(model_mode)
+    try:
+        for chunk in chunked(iter_ndjson(body), chunk_size):
+            yield b"".join(encode_json(result) + b"\n" for result in score_ndjson_chunk(chunk, model_mode, scorers))
+    except Exception as e:
+        logger.error(f"Bulk NDJSON scoring failed: {e}")
+        yield encode_json({"error": f"Bulk scoring aborted: {e}", "success": False}) + b"\n"
+    finally:
+        body.close()
+
+def stream_npy(body, reader: NpyReader, score: RowScorer, output: str, chunk_size: int,
+               ticker: str, model_source: str, model_version: str) -> Iterator[bytes]:
+    """Score a feature matrix chunk by chunk, as a float64 .npy vector or NDJSON rows"""
+    try:
+        if output == "npy":
+            yield npy_vector_header(reader.rows)
+        row = 0
+        for rows in reader.iter_chunks(chunk_size):
+            predicted = score(rows)
+            if output == "npy":
+                yield predicted.astype("<f8").tobytes()
+            else:
+                yield b"".join(
+                    encode_json({
+                        "row": row + i, "ticker": ticker, "predicted_close": float(value),
+                        "model": model_source, "model_version": model_version, "success": True
+                    }) + b"\n"
+                    for i, value in enumerate(predicted)
+                )
+            row += len(rows)
+    except Exception as e:
+        # Too late for an error status; a short .npy body tells the client it was cut off
+        logger.error(f"Bulk NPY scoring for {ticker} failed: {e}")
+        if output == "ndjson":
+            yield encode_json({"error": f"Bulk scoring aborted: {e}", "success": False}) + b"\n"
+    finally:
+        body.close()
+
+@bulk_router.post("/predict")
+async def bulk_predict(request: Request, model: str = "auto", ticker: Optional[str] = None,
+                       output: str = "ndjson", chunk_size: int = BULK_CHUNK_SIZE):
+    """
+    Score any number of tickers or feature rows in one streamed request
+
+    Bodies:
+        application/x-ndjson: one object per line, {"ticker": "AAPL"} for a
+            prediction from the latest bars or {"ticker": "AAPL", "features":
+            [8 values]} to score a feature row. Results stream back as NDJSON
+            in input order, each with its `line` number.
+        application/x-npy: a (rows, 8) feature matrix for `ticker`. Results
+            stream back as a float64 .npy vector (`output=npy`) or NDJSON rows.
+
+    The body is spooled as it arrives and scored `chunk_size` rows per model
+    call; each chunk is only computed once the client has read the previous
+    one, so neither side needs the whole batch in memory.
+    """
+    if model not in MODEL_MODES:
+        raise HTTPException(status_code=400, detail=f"model must be one of {list(MODEL_MODES)}")
+    if output not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"output must be one of {list(OUTPUT_FORMATS)}")
+    if not 1 <= chunk_size <= 10000:
+        raise HTTPException(status_code=400, detail="chunk_size must be between 1 and 10000")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in (NDJSON_MEDIA_TYPE, NPY_MEDIA_TYPE):
+        raise HTTPException(
+            status_code=415, detail=f"Content-Type must be {NDJSON_MEDIA_TYPE} or {NPY_MEDIA_TYPE}"
+        )
+
+    if content_type == NDJSON_MEDIA_TYPE:
+        if output != "ndjson":
+            raise HTTPException(status_code=400, detail="NDJSON requests return NDJSON")
+        body = await spool_body(request)
+        return StreamingResponse(stream_ndjson(body, model, chunk_size), media_type=NDJSON_MEDIA_TYPE)
+
+    if not ticker:
+        raise HTTPException(status_code=400, detail="ticker is required for .npy feature matrices")
+    ticker = ticker.strip().upper()
+
+    body = await spool_body(request)
+    try:
+        reader = NpyReader(body, len(FEATURE_NAMES))
+        score, model_source, model_version = resolve_row_scorer(ticker, model)
+    except FileNotFoundError as e:
+        body.close()
+        raise HTTPException(status_code=404, detail=f"Prediction model not available for {ticker}: {e}")
+    except ValueError as e:
+        body.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        stream_npy(body, reader, score, output, chunk_size, ticker, model_source, model_version),
+        media_type=NPY_MEDIA_TYPE if output == "npy" else NDJSON_MEDIA_TYPE,
+        headers={
+            "X-Rows": str(reader.rows),
+            "X-Model": model_source,
+            "X-Model-Version": model_version,
+        },
+    )
@@ -1,15 +1,24 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
-import yfinance as yf
+from typing import List, Dict, Any, Optional
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-import joblib
 import warnings
-import os
 from pathlib import Path
+from utils.warehouse import get_history, sync_tickers
+from utils.universe import get_display_name
+from utils.feature_store import latest_features
+from utils.precompute import get_precomputed
+from utils.monitoring import record_features
+from utils.forecast import load_calibration, summarize_forecast
+from utils.global_model import load_global_model, predict_global
+from utils.model_registry import get_active_model
+from utils.prediction_log import log_prediction
+from utils.portfolio import aligned_returns, normalize_weights, portfolio_risk
+from utils.formatting import RESPONSE_FORMATS, display_comparison, format_percent
+from utils.responses import FastJSONResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +29,51 @@ compare_router = APIRouter(prefix="/compare", tags=["compare"])
 class CompareRequest(BaseModel):
     tickers: List[str]
 
+class ComparisonEntry(BaseModel):
+    """One compared stock; failed entries carry only symbol, name, error and success"""
+    symbol: str
+    name: str
+    current_price: Optional[float] = None
+    current_change: Optional[float] = None
+    current_change_percent: Optional[float] = None
+    volume: Optional[int] = None
+    predicted_price: Optional[float] = None
+    predicted_change: Optional[float] = None
+    predicted_change_percent: Optional[float] = None
+    predicted_return: Optional[float] = None
+    confidence: Optional[float] = None
+    confidence_method: Optional[str] = None
+    prediction_interval: Optional[Dict[str, float]] = None
+    trend: Optional[str] = None
+    risk_level: Optional[str] = None
+    # Volatility feature (10-bar std of Close) relative to the current price
+    volatility: Optional[float] = None
+    recent_return: Optional[float] = None
+    model: Optional[str] = None
+    model_version: Optional[str] = None
+    precomputed_at: Optional[str] = None
+    error: Optional[str] = None
+    success: bool
+
+class CompareResponse(BaseModel):
+    comparison_id: str
+    timestamp: str
+    requested_tickers: List[str]
+    predictions: List[ComparisonEntry]
+    portfolio_metrics: Dict[str, Any]
+    success: bool = True
+
+class PortfolioRequest(BaseModel):
+    tickers: List[str]
+    weights: Optional[List[float]] = None
+    days: int = 365
+    confidence: float = 0.95
+    expected_returns: str = "model"
+    cluster_threshold: float = 0.5
+    include_correlation: bool = False
+
+MAX_PORTFOLIO_TICKERS = 500
+
 def get_project_root():
     """Get the project root directory consistently across all modules"""
     current_file = Path(__file__).resolve()
@@ -47,116 +101,37 @@ def get_project_root():
     logger.info(f"Using fallback project root: {fallback_root}")
     return fallback_root
 
-def get_model_paths(ticker: str):
-    """Get consistent model paths for all modules"""
-    project_root = get_project_root()
-    models_dir = project_root / "models"
-    
-    model_filename = f"{ticker}_xg.pkl"
-    scaler_filename = f"{ticker}_scaler.pkl"
-    
-    model_path = models_dir / model_filename
-    scaler_path = models_dir / scaler_filename
-    
-    logger.info(f"Model paths for {ticker}:")
-    logger.info(f"  Models dir: {models_dir}")
-    logger.info(f"  Model: {model_path}")
-    logger.info(f"  Scaler: {scaler_path}")
-    logger.info(f"  Model exists: {model_path.exists()}")
-    logger.info(f"  Scaler exists: {scaler_path.exists()}")
-    
-    return str(model_path), str(scaler_path)
-
-def load_model_and_scaler(symbol: str):
-    """Load model and scaler with consistent error handling"""
-    try:
-        model_path, scaler_path = get_model_paths(symbol)
-        
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Model file not found: {model_path}")
-        if not os.path.exists(scaler_path):
-            raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-        
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", category=UserWarning)
-            warnings.filterwarnings("ignore", message=".*InconsistentVersionWarning.*")
-            
-            model = joblib.load(model_path)
-            scaler = joblib.load(scaler_path)
-            logger.info(f"✅ Successfully loaded model and scaler for {symbol}")
-            return model, scaler
-            
-    except Exception as e:
-        logger.error(f"❌ Error loading model for {symbol}: {str(e)}")
-        raise
-
 def get_stock_features(ticker: str):
     """Extract stock features for prediction"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="60d")
-        
-        if hist.empty:
-            raise ValueError(f"No data found for ticker {ticker}")
-        
-        latest_data = hist.iloc[-1]
-        
-        # Basic OHLCV features
-        high = float(latest_data['High'])
-        low = float(latest_data['Low'])
-        open_price = float(latest_data['Open'])
-        volume = float(latest_data['Volume'])
-        
-        # Moving averages
-        ma10 = float(hist['Close'].rolling(window=10).mean().iloc[-1])
-        ma50 = float(hist['Close'].rolling(window=50).mean().iloc[-1])
-        
-        # Returns calculation
-        if len(hist) > 1:
-            prev_close = hist['Close'].iloc[-2]
-            current_close = hist['Close'].iloc[-1]
-            returns = float((current_close - prev_close) / prev_close)
-        else:
-            returns = 0.0
-        
-        # Volatility calculation
-        daily_returns = hist['Close'].pct_change().dropna()
-        if len(daily_returns) >= 20:
-            volatility = float(daily_returns.rolling(window=20).std().iloc[-1])
-        else:
-            volatility = float(daily_returns.std()) if len(daily_returns) > 0 else 0.02
+        # Joined price + news features, the same rows training reads; imputations go to the drift monitor
+        row = latest_features(ticker)
+        record_features(ticker, row["features"], row["imputed"], bar=row["bar"])
         
-        # Handle NaN values
-        if pd.isna(ma50):
-            ma50 = ma10
-        if pd.isna(volatility):
-            volatility = 0.02
-        
-        features = [open_price, high, low, volume, ma10, ma50, returns, volatility]
-        
-        return features, hist
+        return row["features"], row
         
     except Exception as e:
         logger.error(f"Error extracting features for {ticker}: {str(e)}")
         raise ValueError(f"Error extracting features for {ticker}: {str(e)}")
 
-def get_stock_basic_info(ticker: str):
-    """Get basic stock information"""
+def get_stock_basic_info(ticker: str, with_name: bool = True):
+    """Get basic stock information (`with_name=False` skips the name lookup)"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")
+        hist = get_history(ticker, bars=5)
         
         if hist.empty:
             return {
                 "symbol": ticker.upper(),
                 "name": ticker.upper(),
-                "price": "N/A",
-                "change": "N/A",
-                "volume": "N/A",
-                "current_close": 0
+                "price": None,
+                "change": None,
+                "change_percent": None,
+                "volume": None,
+                "current_close": 0,
+                "prev_close": None
             }
             
-        info = stock.info
+        name = get_display_name(ticker) if with_name else ticker.upper()
         
         current_close = hist['Close'].iloc[-1]
         prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_close
@@ -165,111 +140,200 @@ def get_stock_basic_info(ticker: str):
         
         return {
             "symbol": ticker.upper(),
-            "name": info.get("longName", ticker.upper()),
-            "price": f"{current_close:.2f}",
-            "change": f"{change:+.2f} ({change_percent:+.2f}%)",
-            "volume": f"{hist['Volume'].iloc[-1]:,.0f}",
-            "current_close": current_close
+            "name": name,
+            "price": round(float(current_close), 2),
+            "change": round(float(change), 2),
+            "change_percent": round(float(change_percent), 2),
+            "volume": int(hist['Volume'].iloc[-1]),
+            "current_close": current_close,
+            "prev_close": prev_close
         }
     except Exception as e:
         logger.error(f"Error getting basic info for {ticker}: {str(e)}")
         return {
             "symbol": ticker.upper(),
             "name": ticker.upper(),
-            "price": "N/A",
-            "change": "N/A",
-            "volume": "N/A",
-            "current_close": 0
+            "price": None,
+            "change": None,
+            "change_percent": None,
+            "volume": None,
+            "current_close": 0,
+            "prev_close": None
         }
 
-def predict_single_stock(symbol: str):
-    """Predict price for a single stock"""
-    try:
-        symbol = symbol.upper()
-        logger.info(f"Predicting for {symbol}")
-        
-        # Get features and basic info
-        features, hist_data = get_stock_features(symbol)
-        basic_info = get_stock_basic_info(symbol)
-        
-        # Load model and scaler
-        model, scaler = load_model_and_scaler(symbol)
-        
-        # Create DataFrame with proper feature names
-        feature_names = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
-        features_df = pd.DataFrame([features], columns=feature_names)
-        
-        # Scale features and predict
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", category=UserWarning)
-            features_scaled = scaler.transform(features_df)
-            predicted_close = model.predict(features_scaled)
-        
-        # Calculate metrics
-        current_close = basic_info["current_close"]
-        prediction_value = float(predicted_close[0])
-        
-        if current_close > 0:
-            change_amount = prediction_value - current_close
-            change_percent = (change_amount / current_close) * 100
-            prediction_diff = abs(change_amount) / current_close
-            confidence = max(60, min(95, 90 - (prediction_diff * 100)))
-        else:
-            change_amount = 0
-            change_percent = 0
-            confidence = 75
-        
-        # Determine trend
-        if prediction_value > current_close * 1.02:
-            trend = "Bullish"
-        elif prediction_value < current_close * 0.98:
-            trend = "Bearish"
-        else:
-            trend = "Neutral"
-        
-        # Calculate risk level
-        recent_return = features[6]  # Returns feature
-        volatility = features[7]     # Volatility feature
-        
-        if volatility > 0.05 or abs(recent_return) > 0.03:
-            risk_level = "High"
-        elif volatility > 0.02 or abs(recent_return) > 0.01:
-            risk_level = "Medium"
-        else:
-            risk_level = "Low"
-        
-        return {
-            "symbol": basic_info["symbol"],
-            "name": basic_info["name"],
-            "current_price": basic_info["price"],
-            "current_change": basic_info["change"],
-            "volume": basic_info["volume"],
-            "predicted_price": f"{prediction_value:.2f}",
-            "predicted_change": f"{change_amount:+.2f} ({change_percent:+.2f}%)",
-            "confidence": f"{confidence:.0f}%",
-            "trend": trend,
-            "risk_level": risk_level,
-            "volatility": f"{volatility:.4f}",
-            "recent_return": f"{recent_return:.4f}",
-            "success": True
-        }
-        
-    except FileNotFoundError as e:
+def build_stock_prediction(symbol: str, features: list, basic_info: Dict[str, Any],
+                           prediction_value: float, calibration, model_source: str,
+                           model_version: str, bar_date: Optional[str] = None, source: Optional[str] = "compare"):
+    """Turn a raw model output into the comparison entry for one stock (logged under `source` unless None)"""
+    # Calculate metrics
+    current_close = basic_info["current_close"]
+    
+    if current_close > 0:
+        change_amount = prediction_value - current_close
+        change_percent = (change_amount / current_close) * 100
+    else:
+        change_amount = 0
+        change_percent = 0
+    
+    # Calibrated trend, confidence and P10/P50/P90 interval
+    forecast = summarize_forecast(prediction_value, current_close, calibration)
+    confidence = forecast["confidence"]
+    trend = forecast["trend"]
+    
+    # Calculate risk level
+    recent_return = features[6]  # Returns feature
+    # Volatility feature is the 10-bar std of Close in price units: compare it relative to the price
+    volatility = features[7] / current_close if current_close > 0 else 0.0
+    
+    if volatility > 0.05 or abs(recent_return) > 0.03:
+        risk_level = "High"
+    elif volatility > 0.02 or abs(recent_return) > 0.01:
+        risk_level = "Medium"
+    else:
+        risk_level = "Low"
+    
+    if source is not None:
+        log_prediction(
+            symbol, source, prediction_value,
+            current_close=current_close, previous_close=basic_info["prev_close"],
+            model=model_source, model_version=model_version,
+            bar_date=bar_date, interval=forecast["interval"], trend=trend,
+            confidence=confidence, features=features,
+        )
+    
+    return {
+        "symbol": basic_info["symbol"],
+        "name": basic_info["name"],
+        "current_price": basic_info["price"],
+        "current_change": basic_info["change"],
+        "current_change_percent": basic_info["change_percent"],
+        "volume": basic_info["volume"],
+        "predicted_price": round(prediction_value, 2),
+        "predicted_change": round(float(change_amount), 2),
+        "predicted_change_percent": round(float(change_percent), 2),
+        "predicted_return": float(change_percent) / 100,
+        "confidence": round(confidence, 1),
+        "confidence_method": forecast["confidence_method"],
+        "prediction_interval": forecast["interval"],
+        "trend": trend,
+        "risk_level": risk_level,
+        "volatility": float(volatility),
+        "recent_return": float(recent_return),
+        "model": model_source,
+        "model_version": model_version,
+        "success": True
+    }
+
+def prediction_error(symbol: str, e: Exception):
+    """Comparison entry for a stock that could not be predicted"""
+    if isinstance(e, FileNotFoundError):
         logger.error(f"❌ Model not found for {symbol}: {str(e)}")
-        return {
-            "symbol": symbol,
-            "name": symbol,
-            "error": f"Prediction model not available for {symbol}",
-            "success": False
-        }
-    except Exception as e:
+        message = f"Prediction model not available for {symbol}"
+    else:
         logger.error(f"❌ Error predicting {symbol}: {str(e)}")
-        return {
-            "symbol": symbol,
-            "name": symbol,
-            "error": f"Prediction failed: {str(e)}",
-            "success": False
-        }
+        message = f"Prediction failed: {str(e)}"
+    
+    return {
+        "symbol": symbol,
+        "name": symbol,
+        "error": message,
+        "success": False
+    }
+
+def predict_with_ticker_model(symbol: str, features: list):
+    """Predict with the active per-ticker model, returning (prediction, calibration, version)"""
+    model, scaler, version = get_active_model(symbol)
+    
+    # Create DataFrame with proper feature names
+    feature_names = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
+    features_df = pd.DataFrame([features], columns=feature_names)
+    
+    # Scale features and predict
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        features_scaled = scaler.transform(features_df)
+        predicted_close = model.predict(features_scaled)
+    
+    return float(predicted_close[0]), load_calibration(symbol, model, scaler, version), version
+
+def predict_stocks(symbols: List[str], model_mode: str = "auto", source: Optional[str] = "compare",
+                   with_name: bool = True) -> List[Dict[str, Any]]:
+    """
+    Predict several stocks, batching everything the global model serves
+
+    Args:
+        symbols: Ticker symbols
+        model_mode: "auto" (per-ticker model when present, else global),
+            "global" (global model for every symbol) or "ticker" (per-ticker only)
+        source: Prediction log source of these predictions, None to not log them
+        with_name: Look up display names (False: the name is the symbol)
+
+    Returns:
+        One comparison entry per symbol, in input order
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    global_rows = []
+    global_artifact = load_global_model() if model_mode != "ticker" else None
+    
+    # One bulk history request per provider instead of one per symbol
+    sync_tickers([s.strip() for s in symbols])
+    
+    for i, raw_symbol in enumerate(symbols):
+        symbol = raw_symbol.strip().upper()
+        logger.info(f"Predicting for {symbol}")
+        try:
+            # Get features and basic info
+            features, feature_row = get_stock_features(symbol)
+            basic_info = get_stock_basic_info(symbol, with_name=with_name)
+            
+            if model_mode != "global":
+                try:
+                    prediction_value, calibration, version = predict_with_ticker_model(symbol, features)
+                    results[i] = build_stock_prediction(
+                        symbol, features, basic_info, prediction_value, calibration, "ticker", version,
+                        bar_date=feature_row["bar"], source=source
+                    )
+                    continue
+                except FileNotFoundError:
+                    if global_artifact is None:
+                        raise
+            
+            if global_artifact is None:
+                raise FileNotFoundError("Global model not available")
+            global_rows.append((i, symbol, features, basic_info, feature_row["bar"]))
+        
+        except Exception as e:
+            results[i] = prediction_error(symbol, e)
+    
+    # One inference call for every symbol served by the global model
+    if global_rows:
+        try:
+            predicted = predict_global(global_artifact, [row[2] for row in global_rows])
+            for (i, symbol, features, basic_info, bar_date), value in zip(global_rows, predicted):
+                results[i] = build_stock_prediction(
+                    symbol, features, basic_info, float(value), global_artifact["calibration"], "global", "global",
+                    bar_date=bar_date, source=source
+                )
+        except Exception as e:
+            for i, symbol, *_ in global_rows:
+                results[i] = prediction_error(symbol, e)
+    
+    return [results[i] for i in range(len(symbols))]
+
+def serve_predictions(symbols: List[str], model_mode: str = "auto", live: bool = False,
+                      **options) -> List[Dict[str, Any]]:
+    """Entries precomputed after the close where available, the rest predicted live (`options` go to predict_stocks)"""
+    if live or model_mode != "auto":
+        return predict_stocks(symbols, model_mode=model_mode, **options)
+    
+    stored = [get_precomputed("compare", symbol.strip()) for symbol in symbols]
+    missing = [symbol for symbol, entry in zip(symbols, stored) if entry is None]
+    computed = iter(predict_stocks(missing, model_mode=model_mode, **options) if missing else [])
+    return [entry if entry is not None else next(computed) for entry in stored]
+
+def predict_single_stock(symbol: str):
+    """Predict price for a single stock"""
+    return predict_stocks([symbol])[0]
 
 def calculate_portfolio_metrics(predictions: List[Dict[str, Any]]):
     """Calculate portfolio-level metrics"""
@@ -281,7 +345,7 @@ def calculate_portfolio_metrics(predictions: List[Dict[str, Any]]):
                 "total_symbols": len(predictions),
                 "successful_predictions": 0,
                 "failed_predictions": len(predictions),
-                "average_confidence": "N/A",
+                "average_confidence": None,
                 "bullish_count": 0,
                 "bearish_count": 0,
                 "neutral_count": 0,
@@ -290,17 +354,7 @@ def calculate_portfolio_metrics(predictions: List[Dict[str, Any]]):
                 "low_risk_count": 0
             }
         
-        # Extract confidence values (remove % and convert to float)
-        confidences = []
-        for pred in successful_predictions:
-            conf_str = pred.get("confidence", "0%")
-            try:
-                conf_value = float(conf_str.replace("%", ""))
-                confidences.append(conf_value)
-            except:
-                pass
-        
-        avg_confidence = np.mean(confidences) if confidences else 0
+        avg_confidence = np.mean([p["confidence"] for p in successful_predictions])
         
         # Count trends
         trends = [p.get("trend", "Unknown") for p in successful_predictions]
@@ -318,7 +372,7 @@ def calculate_portfolio_metrics(predictions: List[Dict[str, Any]]):
             "total_symbols": len(predictions),
             "successful_predictions": len(successful_predictions),
             "failed_predictions": len(predictions) - len(successful_predictions),
-            "average_confidence": f"{avg_confidence:.1f}%",
+            "average_confidence": round(float(avg_confidence), 1),
             "bullish_count": bullish_count,
             "bearish_count": bearish_count,
             "neutral_count": neutral_count,
@@ -334,10 +388,21 @@ def calculate_portfolio_metrics(predictions: List[Dict[str, Any]]):
             "error": f"Error calculating metrics: {str(e)}"
         }
 
-@compare_router.post("/")
-def compare_stocks(request: CompareRequest):
-    """Compare multiple stocks with predictions and analysis"""
+@compare_router.post("/", response_model=CompareResponse, response_model_exclude_none=True)
+def compare_stocks(request: CompareRequest, model: str = "auto", format: str = "raw", live: bool = False):
+    """
+    Compare multiple stocks with predictions and analysis
+
+    `model` selects auto (per-ticker override, else global), global or ticker.
+    Numbers are returned as numbers; `format=display` preformats them.
+    Closed markets are served from the post-close precompute unless `live=true`.
+    """
     try:
+        if model not in ("auto", "global", "ticker"):
+            raise HTTPException(status_code=400, detail="model must be one of: auto, global, ticker")
+        if format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {list(RESPONSE_FORMATS)}")
+        
         if not request.tickers:
             raise HTTPException(status_code=400, detail="No tickers provided")
         
@@ -347,37 +412,15 @@ def compare_stocks(request: CompareRequest):
         logger.info(f"Comparing stocks: {request.tickers}")
         
         # Get predictions for all tickers
-        predictions = []
-        for ticker in request.tickers:
-            try:
-                prediction = predict_single_stock(ticker.strip().upper())
-                predictions.append(prediction)
-            except Exception as e:
-                logger.error(f"Error processing {ticker}: {str(e)}")
-                predictions.append({
-                    "symbol": ticker.upper(),
-                    "name": ticker.upper(),
-                    "error": f"Processing failed: {str(e)}",
-                    "success": False
-                })
+        predictions = serve_predictions(request.tickers, model_mode=model, live=live)
         
         # Calculate portfolio metrics
         portfolio_metrics = calculate_portfolio_metrics(predictions)
         
-        # Sort predictions by success first, then by confidence
-        def sort_key(pred):
-            if not pred.get("success", False):
-                return (0, 0)  # Failed predictions go last
-            try:
-                conf_str = pred.get("confidence", "0%")
-                conf_value = float(conf_str.replace("%", ""))
-                return (1, conf_value)  # Success first, then by confidence
-            except:
-                return (1, 0)
-        
-        predictions.sort(key=sort_key, reverse=True)
+        # Successful predictions first (highest confidence first), failures last
+        predictions.sort(key=lambda p: (p["success"], p.get("confidence") or 0), reverse=True)
         
-        return {
+        response = {
             "comparison_id": f"comp_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
             "timestamp": datetime.now().isoformat(),
             "requested_tickers": request.tickers,
@@ -385,6 +428,14 @@ def compare_stocks(request: CompareRequest):
             "portfolio_metrics": portfolio_metrics,
             "success": True
         }
+        if format == "display":
+            response["predictions"] = [display_comparison(p) for p in predictions]
+            response["portfolio_metrics"] = {
+                **portfolio_metrics,
+                "average_confidence": format_percent(portfolio_metrics.get("average_confidence"), 1),
+            }
+            return FastJSONResponse(response)
+        return response
         
     except HTTPException:
         raise
@@ -392,6 +443,85 @@ def compare_stocks(request: CompareRequest):
         logger.error(f"Error in compare_stocks: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
 
+@compare_router.get("/", response_model=CompareResponse, response_model_exclude_none=True)
+def compare_stocks_cached(tickers: str, model: str = "auto", format: str = "raw", live: bool = False):
+    """
+    Same comparison as POST /compare/ for comma-separated `tickers`
+
+    A GET can be stored by the browser and CDN caches (see utils/http_cache.py).
+    """
+    symbols = [t.strip() for t in tickers.split(",") if t.strip()]
+    return compare_stocks(CompareRequest(tickers=symbols), model=model, format=format, live=live)
+
+@compare_router.post("/portfolio")
+def analyze_portfolio(request: PortfolioRequest):
+    """
+    Portfolio analytics for weighted tickers
+
+    Expected return (from the models' predicted returns or historical
+    means), covariance-based volatility, historical VaR/CVaR, risk
+    contributions and correlation clusters, all from one aligned returns
+    matrix. Weights default to equal and are renormalized over the tickers
+    with enough history.
+    """
+    try:
+        tickers = [t.strip().upper() for t in request.tickers if t.strip()]
+        if len(tickers) < 1:
+            raise HTTPException(status_code=400, detail="No tickers provided")
+        if len(tickers) > MAX_PORTFOLIO_TICKERS:
+            raise HTTPException(status_code=400, detail=f"Maximum {MAX_PORTFOLIO_TICKERS} tickers allowed")
+        if len(set(tickers)) != len(tickers):
+            raise HTTPException(status_code=400, detail="Duplicate tickers")
+        if request.weights is not None and len(request.weights) != len(tickers):
+            raise HTTPException(status_code=400, detail="weights must have one entry per ticker")
+        if not 0.5 < request.confidence < 1:
+            raise HTTPException(status_code=400, detail="confidence must be between 0.5 and 1")
+        if request.expected_returns not in ("model", "historical"):
+            raise HTTPException(status_code=400, detail="expected_returns must be model or historical")
+        if not 30 <= request.days <= 3650:
+            raise HTTPException(status_code=400, detail="days must be between 30 and 3650")
+        
+        returns, kept, dropped = aligned_returns(tickers, days=request.days)
+        if not kept:
+            raise HTTPException(status_code=404, detail="Not enough aligned price history for these tickers")
+        
+        requested_weights = dict(zip(tickers, request.weights)) if request.weights is not None else None
+        weights = normalize_weights([requested_weights[t] for t in kept] if requested_weights else None, len(kept))
+        
+        # Model expected returns where a prediction succeeds, historical mean otherwise.
+        # Precomputed entries where available; the rest are not logged as predictions
+        expected = returns.mean(axis=0)
+        expected_source = ["historical"] * len(kept)
+        if request.expected_returns == "model":
+            for i, prediction in enumerate(serve_predictions(kept, source=None, with_name=False)):
+                if prediction.get("success"):
+                    expected[i] = prediction["predicted_return"]
+                    expected_source[i] = prediction["model"]
+        
+        metrics = portfolio_risk(
+            returns, kept, weights, expected_returns=expected,
+            confidence=request.confidence, cluster_threshold=request.cluster_threshold,
+            include_correlation=request.include_correlation,
+        )
+        for position, source in zip(metrics["positions"], expected_source):
+            position["expected_return_source"] = source
+        
+        return FastJSONResponse({
+            "timestamp": datetime.now().isoformat(),
+            "tickers": kept,
+            "dropped_tickers": dropped,
+            **metrics,
+            "success": True
+        })
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in analyze_portfolio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Portfolio analysis failed: {str(e)}")
+
 @compare_router.get("/debug/paths")
 def debug_paths():
     """Debug endpoint to check path resolution"""
@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from utils.constants import TICKER_LIST
+from utils.universe import get_universe
+from utils.ranking import TopK, RANK_KEYS, make_scorer, page
 from utils.sentiment import get_sentiment_for_ticker
+from utils.analysis import TickerAnalyzer
+from routers.predict import predict_stock_price
+from utils.responses import FastJSONResponse
+from utils.fields import parse_fields, select_fields, wants
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,60 +16,114 @@ logger = logging.getLogger(__name__)
 
 insights_router = APIRouter()
 
+INSIGHT_SCOPES = ("tracked", "models", "all")
+# Individual error messages returned; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Shared by /insights and /insights/detailed: each ticker is predicted once per TTL
+analyzer = TickerAnalyzer(predict=predict_stock_price, sentiment=get_sentiment_for_ticker)
+
 def get_stock_prediction_data(ticker: str) -> Dict[str, Any]:
-    """Get prediction data for a single ticker"""
+    """Get (memoized) prediction data for a single ticker"""
     try:
-        from routers.predict import predict_stock_price
-        return predict_stock_price(ticker)
-    except ImportError as e:
-        logger.error(f"Failed to import predict_stock_price: {e}")
-        return {}
+        return analyzer.prediction(ticker)
     except Exception as e:
         logger.warning(f"Failed to get prediction for {ticker}: {e}")
         return {}
 
-def parse_confidence(confidence_str: str) -> int:
-    """Parse confidence string to integer"""
+def parse_confidence(confidence: Any) -> float:
+    """Confidence in percent (predictions carry it as a number)"""
     try:
-        # Remove % sign and convert to int
-        return int(confidence_str.replace('%', '').strip())
-    except (ValueError, AttributeError):
-        return 0
+        return float(confidence)
+    except (TypeError, ValueError):
+        return 0.0
 
 def categorize_stock(ticker: str, prediction_data: Dict[str, Any]) -> Dict[str, Any]:
     """Categorize a stock based on prediction data"""
     trend = prediction_data.get("trend", "").strip()
-    confidence_str = prediction_data.get("confidence", "0%")
-    confidence = parse_confidence(confidence_str)
+    confidence = parse_confidence(prediction_data.get("confidence"))
     
     return {
         "ticker": ticker,
         "trend": trend,
         "confidence": confidence,
-        "current_price": prediction_data.get("current_price"),
-        "predicted_price": prediction_data.get("predicted_price"),
+        "current_price": prediction_data.get("price"),
+        "predicted_price": prediction_data.get("prediction"),
         "prediction_data": prediction_data
     }
 
-@insights_router.get("/insights")
-def get_insights():
-    """Get market insights including bullish, potential buys, and underperforming stocks"""
+def get_insight_tickers(scope: str) -> List[str]:
+    """Tickers /insights ranks: the tracked list, every symbol with a model, or the whole universe"""
+    if scope == "tracked":
+        return TICKER_LIST
+    universe = get_universe()
+    return universe.symbols(with_model=True) if scope == "models" else universe.symbols()
+
+def index_sentiment_score(sentiment_data: Dict[str, Any]) -> Optional[float]:
+    """Time-decayed sentiment index value in [-1, 1] carried by a sentiment result"""
+    index = sentiment_data.get("sentiment_index") or {}
+    return index.get("value")
+
+def news_sentiment_score(ticker: str) -> Optional[float]:
+    """Net news sentiment in [-1, 1] if it was already computed for this ticker"""
+    sentiment_data = analyzer.cached_sentiment(ticker)
+    if not sentiment_data:
+        return None
+    index_score = index_sentiment_score(sentiment_data)
+    if index_score is not None:
+        return index_score
+    summary = sentiment_data.get("summary", {})
+    total = sum(summary.values())
+    if not total:
+        return None
+    return (summary.get("positive", 0) - summary.get("negative", 0)) / total
+
+@insights_router.get("/insights", response_class=FastJSONResponse)
+def get_insights(rank_by: str = "confidence", limit: Optional[int] = None, offset: int = 0,
+                 scope: str = "tracked"):
+    """
+    Get market insights including bullish, potential buys, and underperforming stocks
+
+    Tickers are streamed through bounded top-k heaps, so memory depends on
+    offset + limit rather than the number of tickers analyzed.
+
+    Args:
+        rank_by: confidence, change (predicted %) or sentiment_adjusted
+        limit: Page size per category (default 10 / 5 / 10)
+        offset: Items to skip per category, for paging
+        scope: tracked (default list), models (every symbol with a model) or all
+    """
+    if rank_by not in RANK_KEYS:
+        raise HTTPException(status_code=400, detail=f"rank_by must be one of {list(RANK_KEYS)}")
+    if scope not in INSIGHT_SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {list(INSIGHT_SCOPES)}")
+    if (limit is not None and limit < 1) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    
     try:
-        bullish = []
-        potential_buys = []
-        underperforming = []
+        score = make_scorer(rank_by, news_sentiment_score)
+        bullish_limit = limit or 10
+        buys_limit = limit or 5
+        underperforming_limit = limit or 10
+        
+        bullish = TopK(offset + bullish_limit)
+        potential_buys = TopK(offset + buys_limit)
+        underperforming = TopK(offset + underperforming_limit)
+        counts = {"total": 0, "bullish": 0, "potential_buys": 0, "underperforming": 0, "errors": 0}
         processing_errors = []
         
-        logger.info(f"Processing insights for {len(TICKER_LIST)} tickers")
+        tickers = get_insight_tickers(scope)
+        logger.info(f"Processing insights for {len(tickers)} tickers")
         
-        for ticker in TICKER_LIST:
+        # Predictions stream in (memoized, bounded concurrency) and only the top k are kept
+        for ticker, prediction_data in analyzer.iter_predictions(tickers):
+            counts["total"] += 1
             try:
-                # Get prediction data
-                prediction_data = get_stock_prediction_data(ticker)
+                if isinstance(prediction_data, Exception):
+                    raise prediction_data
                 
                 if not prediction_data:
-                    processing_errors.append(f"No prediction data for {ticker}")
-                    continue
+                    raise ValueError("No prediction data")
                 
                 # Categorize the stock
                 stock_info = categorize_stock(ticker, prediction_data)
@@ -72,36 +132,42 @@ def get_insights():
                 confidence = stock_info["confidence"]
                 
                 if trend.lower() == "bullish":
-                    bullish.append(stock_info)
+                    counts["bullish"] += 1
+                    bullish.push(score(stock_info), stock_info)
                     # High confidence bullish stocks are potential buys
                     if confidence >= 75:  # Lowered threshold slightly
-                        potential_buys.append(stock_info)
+                        counts["potential_buys"] += 1
+                        potential_buys.push(score(stock_info), stock_info)
                 elif trend.lower() == "bearish":
-                    underperforming.append(stock_info)
+                    counts["underperforming"] += 1
+                    underperforming.push(score(stock_info, bearish=True), stock_info)
                 
-                logger.debug(f"Processed {ticker}: {trend} ({confidence}%)")
+                logger.debug(f"Processed {ticker}: {trend} ({confidence:.0f}%)")
                 
             except Exception as e:
-                error_msg = f"Error processing {ticker}: {str(e)}"
-                logger.warning(error_msg)
-                processing_errors.append(error_msg)
-        
-        # Sort by confidence (highest first)
-        bullish.sort(key=lambda x: x["confidence"], reverse=True)
-        potential_buys.sort(key=lambda x: x["confidence"], reverse=True)
-        underperforming.sort(key=lambda x: x["confidence"], reverse=True)
+                counts["errors"] += 1
+                if len(processing_errors) < MAX_REPORTED_ERRORS:
+                    error_msg = f"Error processing {ticker}: {str(e)}"
+                    logger.warning(error_msg)
+                    processing_errors.append(error_msg)
         
         result = {
             "summary": {
-                "total_analyzed": len(TICKER_LIST),
-                "bullish_count": len(bullish),
-                "potential_buys_count": len(potential_buys),
-                "underperforming_count": len(underperforming),
-                "errors_count": len(processing_errors)
+                "total_analyzed": counts["total"],
+                "bullish_count": counts["bullish"],
+                "potential_buys_count": counts["potential_buys"],
+                "underperforming_count": counts["underperforming"],
+                "errors_count": counts["errors"]
+            },
+            "top_bullish": page(bullish, offset, bullish_limit),
+            "potential_buys": page(potential_buys, offset, buys_limit),
+            "underperforming": page(underperforming, offset, underperforming_limit),
+            "paging": {
+                "rank_by": rank_by,
+                "scope": scope,
+                "offset": offset,
+                "limit": limit
             },
-            "top_bullish": bullish[:10],  # Top 10 bullish stocks
-            "potential_buys": potential_buys[:5],  # Top 5 potential buys
-            "underperforming": underperforming[:10],  # Top 10 underperforming
             "processing_errors": processing_errors if processing_errors else None
         }
         
@@ -112,39 +178,63 @@ def get_insights():
         logger.error(f"Error generating insights: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate insights: {str(e)}")
 
-@insights_router.get("/insights/detailed/{ticker}")
-def get_detailed_insights(ticker: str):
-    """Get detailed insights for a specific ticker including sentiment analysis"""
+# Top-level fields of /insights/detailed and those computed from the news sentiment
+DETAILED_FIELDS = ("ticker", "recommendation", "prediction", "sentiment", "sentiment_score", "analysis")
+SENTIMENT_FIELDS = ("recommendation", "sentiment", "sentiment_score", "analysis")
+
+@insights_router.get("/insights/detailed/{ticker}", response_class=FastJSONResponse)
+def get_detailed_insights(ticker: str, fields: Optional[str] = None):
+    """
+    Get detailed insights for a specific ticker including sentiment analysis
+
+    `fields` (e.g. "prediction.trend,prediction.confidence,sentiment.summary")
+    returns only those fields; news is not fetched unless a sentiment-based
+    field is selected.
+    """
+    try:
+        selection = parse_fields(fields, DETAILED_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         ticker = ticker.upper()
         logger.info(f"Getting detailed insights for {ticker}")
         
-        # Get prediction data
-        prediction_data = get_stock_prediction_data(ticker)
+        # Prediction and sentiment run concurrently; a prediction from /insights is reused
+        analysis = analyzer.analyze(ticker, with_sentiment=wants(selection, *SENTIMENT_FIELDS))
+        prediction_data = analysis["prediction"]
+        sentiment_data = analysis["sentiment"]
+        
+        if isinstance(prediction_data, Exception):
+            logger.warning(f"Failed to get prediction for {ticker}: {prediction_data}")
+            prediction_data = {}
         
         if not prediction_data:
             raise HTTPException(status_code=404, detail=f"No prediction data found for {ticker}")
         
-        # Get sentiment data
-        try:
-            sentiment_data = get_sentiment_for_ticker(ticker)
-        except Exception as e:
-            logger.warning(f"Failed to get sentiment for {ticker}: {e}")
+        if isinstance(sentiment_data, Exception):
+            logger.warning(f"Failed to get sentiment for {ticker}: {sentiment_data}")
             sentiment_data = {
                 "ticker": ticker,
                 "summary": {"positive": 0, "neutral": 0, "negative": 0},
                 "articles": [],
-                "message": f"Sentiment analysis failed: {str(e)}"
+                "message": f"Sentiment analysis failed: {str(sentiment_data)}"
             }
+        elif sentiment_data is None:
+            # Not selected: nothing derived from it is returned
+            sentiment_data = {}
         
         # Categorize the stock
         stock_info = categorize_stock(ticker, prediction_data)
         
-        # Calculate overall sentiment score
+        # Overall sentiment: the time-decayed index, else the net share of current headlines
         sentiment_summary = sentiment_data.get("summary", {})
         total_articles = sum(sentiment_summary.values())
+        index_score = index_sentiment_score(sentiment_data)
         
-        if total_articles > 0:
+        if index_score is not None:
+            sentiment_score = index_score
+        elif total_articles > 0:
             sentiment_score = (
                 sentiment_summary.get("positive", 0) * 1 + 
                 sentiment_summary.get("neutral", 0) * 0 + 
@@ -168,18 +258,18 @@ def get_detailed_insights(ticker: str):
         else:
             recommendation = "Hold"
         
-        return {
+        return select_fields({
             "ticker": ticker,
             "recommendation": recommendation,
             "prediction": stock_info,
             "sentiment": sentiment_data,
             "sentiment_score": round(sentiment_score, 2),
             "analysis": {
-                "technical_signal": f"{trend.title()} ({confidence}%)",
+                "technical_signal": f"{trend.title()} ({confidence:.0f}%)",
                 "news_sentiment": f"{sentiment_score:.2f} ({total_articles} articles)",
-                "recommendation_reason": f"Based on {trend} trend with {confidence}% confidence and sentiment score of {sentiment_score:.2f}"
+                "recommendation_reason": f"Based on {trend} trend with {confidence:.0f}% confidence and sentiment score of {sentiment_score:.2f}"
             }
-        }
+        }, selection)
         
     except HTTPException:
         raise
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, Header
+from typing import Optional
+import hmac
+import logging
+import os
+from utils.model_registry import (
+    registry_status, activate, activate_in_background, rollback, set_shadow, list_versions
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+models_router = APIRouter(prefix="/models", tags=["models"])
+
+# Rollout endpoints require a matching X-Admin-Token header and are disabled while it is unset
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+
+def check_admin_token(token: Optional[str]):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model admin endpoints are disabled (MODEL_ADMIN_TOKEN is not set)")
+    if token is None or not hmac.compare_digest(token.encode(), MODEL_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@models_router.get("/{ticker}")
+def get_model_status(ticker: str):
+    """Active version, rollout history and shadow statistics for a ticker"""
+    try:
+        status = registry_status(ticker)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not status["versions"]:
+        raise HTTPException(status_code=404, detail=f"No model versions found for {ticker.upper()}")
+    return status
+
+@models_router.post("/{ticker}/activate/{version}")
+def activate_model(ticker: str, version: str, wait: bool = False,
+                   x_admin_token: Optional[str] = Header(None)):
+    """
+    Activate a registered version
+
+    The version is preloaded before the pointer swap, so traffic keeps being
+    served by the current model until the new one is ready. By default the
+    preload runs in the background; `wait=true` blocks until it is active.
+    """
+    check_admin_token(x_admin_token)
+    ticker = ticker.upper()
+    try:
+        known = version in list_versions(ticker)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not known:
+        raise HTTPException(status_code=404, detail=f"Unknown version {version} for {ticker}")
+
+    try:
+        if wait:
+            return {**activate(ticker, version), "status": "active"}
+        activate_in_background(ticker, version)
+        return {"ticker": ticker, "version": version, "status": "activating"}
+    except Exception as e:
+        logger.error(f"Error activating {ticker}@{version}: {e}")
+        raise HTTPException(status_code=500, detail=f"Activation failed: {str(e)}")
+
+@models_router.post("/{ticker}/rollback")
+def rollback_model(ticker: str, x_admin_token: Optional[str] = Header(None)):
+    """Re-activate the previously active version"""
+    check_admin_token(x_admin_token)
+    try:
+        return rollback(ticker)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@models_router.post("/{ticker}/shadow/{version}")
+def start_shadow(ticker: str, version: str, x_admin_token: Optional[str] = Header(None)):
+    """Score a candidate version alongside live traffic without serving it"""
+    check_admin_token(x_admin_token)
+    try:
+        return set_shadow(ticker, version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@models_router.delete("/{ticker}/shadow")
+def stop_shadow(ticker: str, x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    try:
+        return set_shadow(ticker, None)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,14 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
-import joblib
+from typing import Dict, List, Optional
 import numpy as np
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
 import logging
+import json
 import os
 from pathlib import Path
+from utils.warehouse import get_history
+from utils.universe import get_display_name
+from utils.feature_store import latest_features, sentiment_label
+from utils.monitoring import record_features
+from utils.forecast import load_calibration, summarize_forecast
+from utils.global_model import load_global_model, predict_global
+from utils.model_registry import get_active_model, shadow_evaluate
+from utils.prediction_log import log_prediction, query_predictions, join_realized, accuracy_summary
+from utils.horizons import parse_horizons, load_multi_horizon_model, predict_horizons
+from utils.history import serialize_history, HISTORY_ENCODINGS, DOWNSAMPLE_METHODS, BINARY_MEDIA_TYPE
+from utils.formatting import RESPONSE_FORMATS, display_prediction
+from utils.responses import FastJSONResponse
+from utils.precompute import get_precomputed
+from utils.fields import parse_fields, select_fields, wants
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +34,41 @@ class PredictRequest(BaseModel):
     ticker: str
     features: list
 
+class PredictionInterval(BaseModel):
+    p10: float
+    p50: float
+    p90: float
+
+class HorizonForecast(BaseModel):
+    horizon: int
+    prediction: float
+    trend: str
+    confidence: float
+    confidence_method: str
+    interval: Optional[PredictionInterval] = None
+
+class PredictionResponse(BaseModel):
+    """Numeric /predict response; `format=display` returns the same fields as strings"""
+    symbol: str
+    name: str
+    price: Optional[float]
+    change: Optional[float]
+    change_percent: Optional[float]
+    volume: Optional[int]
+    prediction: float
+    confidence: float
+    confidence_method: str
+    prediction_interval: Optional[PredictionInterval]
+    trend: str
+    sentimentScore: str
+    news_sentiment: Optional[float] = None
+    model: str
+    model_version: str
+    success: bool = True
+    features_used: Dict[str, float]
+    horizons: Optional[List[HorizonForecast]] = None
+    precomputed_at: Optional[str] = None
+
 def get_project_root():
     """Get the project root directory - handles both local and Railway deployment"""
     current_file = Path(__file__).resolve()
@@ -186,65 +235,25 @@ def debug_directory_structure():
 
 def get_stock_features(ticker: str):
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="60d")
-        if hist.empty:
-            raise ValueError(f"No data found for ticker {ticker}")
-        
-        latest_data = hist.iloc[-1]
-        high = latest_data['High']
-        low = latest_data['Low']
-        open_price = latest_data['Open']
-        volume = latest_data['Volume']
-
-        ma10 = hist['Close'].rolling(window=10).mean().iloc[-1]
-        ma50 = hist['Close'].rolling(window=50).mean().iloc[-1]
-        
-        if len(hist) > 1:
-            prev_close = hist['Close'].iloc[-2]
-            current_close = hist['Close'].iloc[-1]
-            returns = (current_close - prev_close) / prev_close
-        else:
-            returns = 0.0
-        
-        daily_returns = hist['Close'].pct_change().dropna()
-        if len(daily_returns) >= 20:
-            volatility = daily_returns.rolling(window=20).std().iloc[-1]
-        else:
-            volatility = daily_returns.std()
-        
-        if pd.isna(ma50):
-            ma50 = ma10
-        if pd.isna(volatility):
-            volatility = 0.02
-        
-        features = [
-            float(open_price),  # Open
-            float(high),        # High
-            float(low),         # Low
-            float(volume),      # Volume
-            float(ma10),        # MA10
-            float(ma50),        # MA50
-            float(returns),     # Returns
-            float(volatility)   # Volatility
-        ]
+        # Joined price + news features, the same rows training reads; imputations go to the drift monitor
+        row = latest_features(ticker)
+        record_features(ticker, row["features"], row["imputed"], bar=row["bar"])
         
-        return features, hist
+        return row["features"], row
         
     except Exception as e:
         logger.error(f"Error extracting features for {ticker}: {str(e)}")
         raise ValueError(f"Error extracting features for {ticker}: {str(e)}")
 
-def get_stock_basic_info(ticker: str):
-    """Get basic stock information for display"""
+def get_stock_basic_info(ticker: str, with_name: bool = True):
+    """Get basic stock information for display (`with_name=False` skips the name lookup)"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")
+        hist = get_history(ticker, bars=5)
         
         if hist.empty:
             raise ValueError(f"No historical data available for {ticker}")
             
-        info = stock.info
+        name = get_display_name(ticker) if with_name else ticker.upper()
         
         current_close = hist['Close'].iloc[-1]
         prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_close
@@ -253,56 +262,27 @@ def get_stock_basic_info(ticker: str):
         
         return {
             "symbol": ticker.upper(),
-            "name": info.get("longName", ticker.upper()),
-            "price": f"{current_close:.2f}",
-            "change": f"{change:+.2f} ({change_percent:+.2f}%)",
-            "volume": f"{hist['Volume'].iloc[-1]:,.0f}",
-            "current_close": current_close
+            "name": name,
+            "price": round(float(current_close), 2),
+            "change": round(float(change), 2),
+            "change_percent": round(float(change_percent), 2),
+            "volume": int(hist['Volume'].iloc[-1]),
+            "current_close": current_close,
+            "prev_close": prev_close
         }
     except Exception as e:
         logger.error(f"Error getting basic info for {ticker}: {str(e)}")
         return {
             "symbol": ticker.upper(),
             "name": ticker.upper(),
-            "price": "N/A",
-            "change": "N/A",
-            "volume": "N/A",
-            "current_close": 0
+            "price": None,
+            "change": None,
+            "change_percent": None,
+            "volume": None,
+            "current_close": 0,
+            "prev_close": None
         }
 
-def load_model_and_scaler(symbol: str):
-    """Load prediction model and scaler - Railway deployment compatible"""
-    
-    # Debug directory structure in development
-    if os.getenv("ENVIRONMENT") != "production":
-        debug_directory_structure()
-    
-    model_path, scaler_path = get_model_paths(symbol)
-    
-    logger.info(f"Final paths for {symbol}:")
-    logger.info(f"  Model: {model_path}")
-    logger.info(f"  Scaler: {scaler_path}")
-    
-    # Check if files exist
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file not found: {model_path}")
-    if not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-    
-    # Load with warnings suppressed
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", category=UserWarning)
-        warnings.filterwarnings("ignore", message=".*InconsistentVersionWarning.*")
-        
-        try:
-            model = joblib.load(model_path)
-            scaler = joblib.load(scaler_path)
-            logger.info(f"✅ Successfully loaded model and scaler for {symbol}")
-            return model, scaler
-        except Exception as e:
-            logger.error(f"Error loading model files: {str(e)}")
-            raise ValueError(f"Error loading model files: {str(e)}")
-
 # DEBUG ENDPOINTS
 @router.get("/debug/structure")
 def debug_structure():
@@ -407,24 +387,31 @@ def debug_model_check(symbol: str):
         "expected_files": [f"{symbol}_xg.pkl", f"{symbol}_scaler.pkl"]
     }
 
-# MAIN PREDICTION ENDPOINT
-@router.get("/predict/{symbol}")
-def predict_stock_price(symbol: str):
+def compute_prediction(symbol: str, requested_horizons: Optional[List[int]] = None,
+                       source: str = "predict", with_name: bool = True) -> Dict:
     """
-    Predict next Close price for a given symbol using:
-    Open, High, Low, Volume, MA10, MA50, Returns, Volatility
+    Compute the /predict payload for a symbol from its latest features
+
+    `with_name=False` skips the display name lookup (name is the symbol).
+    Raises FileNotFoundError when no model serves the symbol and ValueError
+    when its features cannot be built.
     """
+    # Get features and basic info
+    features, feature_row = get_stock_features(symbol)
+    basic_info = get_stock_basic_info(symbol, with_name=with_name)
+    
+    # Load model and scaler, falling back to the pooled global model
+    model_source = "ticker"
     try:
-        symbol = symbol.upper()
-        logger.info(f"Processing prediction request for {symbol}")
-        
-        # Get features and basic info
-        features, hist_data = get_stock_features(symbol)
-        basic_info = get_stock_basic_info(symbol)
-        
-        # Load model and scaler
-        model, scaler = load_model_and_scaler(symbol)
-        
+        model, scaler, model_version = get_active_model(symbol)
+    except FileNotFoundError:
+        global_artifact = load_global_model()
+        if global_artifact is None:
+            raise
+        model_source = "global"
+        model_version = "global"
+    
+    if model_source == "ticker":
         # Define feature names matching EXACT order from training
         feature_names = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
         
@@ -438,23 +425,23 @@ def predict_stock_price(symbol: str):
         
         # Make prediction
         predicted_close = model.predict(features_scaled)
-        
-        # Calculate confidence and trend
-        current_close = basic_info["current_close"]
-        if current_close > 0:
-            prediction_diff = abs(predicted_close[0] - current_close) / current_close
-            confidence = max(60, min(95, 90 - (prediction_diff * 100)))
-        else:
-            confidence = 75
-            
-        if predicted_close[0] > current_close * 1.02:
-            trend = "Bullish"
-        elif predicted_close[0] < current_close * 0.98:
-            trend = "Bearish"
-        else:
-            trend = "Neutral"
-        
-        # Calculate sentiment
+        calibration = load_calibration(symbol, model, scaler, model_version)
+        
+        # Score the shadow candidate (if any) off the request path
+        shadow_evaluate(symbol, features_df, float(predicted_close[0]))
+    else:
+        predicted_close = predict_global(global_artifact, [features])
+        calibration = global_artifact["calibration"]
+    
+    # Calibrated trend, confidence and P10/P50/P90 interval
+    current_close = basic_info["current_close"]
+    forecast = summarize_forecast(float(predicted_close[0]), current_close, calibration)
+    confidence = forecast["confidence"]
+    trend = forecast["trend"]
+    
+    # News sentiment joined onto the bar by the feature store; momentum when there is no news
+    sentiment_score = sentiment_label(feature_row)
+    if sentiment_score is None:
         recent_return = features[6]
         if recent_return > 0.01:
             sentiment_score = "Positive"
@@ -462,32 +449,103 @@ def predict_stock_price(symbol: str):
             sentiment_score = "Negative"
         else:
             sentiment_score = "Neutral"
+    
+    # Multi-horizon forecasts come from the artifact trained for the active model version
+    horizon_forecasts = None
+    if requested_horizons:
+        if model_source != "ticker":
+            raise HTTPException(status_code=404, detail=f"Multi-horizon forecasts need a per-ticker model for {symbol}")
+        artifact = load_multi_horizon_model(symbol, model_version)
+        if artifact is None:
+            raise HTTPException(status_code=404, detail=f"Multi-horizon model not available for {symbol}@{model_version}")
+        horizon_forecasts = predict_horizons(artifact, features_df, current_close, requested_horizons)
+    
+    logger.info(f"✅ Prediction successful for {symbol}: {predicted_close[0]:.2f}")
+    
+    response = {
+        "symbol": basic_info["symbol"],
+        "name": basic_info["name"],
+        "price": basic_info["price"],
+        "change": basic_info["change"],
+        "change_percent": basic_info["change_percent"],
+        "volume": basic_info["volume"],
+        "prediction": round(float(predicted_close[0]), 2),
+        "confidence": round(confidence, 1),
+        "confidence_method": forecast["confidence_method"],
+        "prediction_interval": forecast["interval"],
+        "trend": trend,
+        "sentimentScore": sentiment_score,
+        "news_sentiment": round(feature_row["sentiment"]["SentimentIndex"], 4) if feature_row["news_weight"] else None,
+        "model": model_source,
+        "model_version": model_version,
+        "success": True,
+        "features_used": {
+            "open": float(features[0]),
+            "high": float(features[1]),
+            "low": float(features[2]),
+            "volume": float(features[3]),
+            "ma10": float(features[4]),
+            "ma50": float(features[5]),
+            "returns": float(features[6]),
+            "volatility": float(features[7])
+        }
+    }
+    if horizon_forecasts is not None:
+        response["horizons"] = horizon_forecasts
+    
+    # Queued for the background writer, off the request path
+    log_prediction(
+        symbol, source, float(predicted_close[0]),
+        current_close=current_close, previous_close=basic_info["prev_close"],
+        model=model_source, model_version=model_version,
+        bar_date=feature_row["bar"], interval=forecast["interval"],
+        trend=trend, confidence=confidence, features=features,
+    )
+    
+    return response
+
+# MAIN PREDICTION ENDPOINT
+@router.get("/predict/{symbol}", response_model=PredictionResponse)
+def predict_stock_price(symbol: str, horizons: Optional[str] = None, format: str = "raw", live: bool = False,
+                        fields: Optional[str] = None):
+    """
+    Predict next Close price for a given symbol using:
+    Open, High, Low, Volume, MA10, MA50, Returns, Volatility
+
+    Optional `horizons` (e.g. "1,5,20") adds multi-horizon forecasts computed
+    from the same feature vector in one batched model call. Prices, changes
+    and confidence are numbers; `format=display` returns them preformatted.
+
+    Once the symbol's market has closed the prediction computed after the
+    close is served; `live=true` recomputes it.
+
+    `fields` (e.g. "symbol,price,prediction,trend") returns only those
+    fields; without "name" the display name lookup is skipped.
+    """
+    try:
+        symbol = symbol.upper()
+        if format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {list(RESPONSE_FORMATS)}")
+        logger.info(f"Processing prediction request for {symbol}")
         
-        logger.info(f"✅ Prediction successful for {symbol}: {predicted_close[0]:.2f}")
+        requested_horizons = parse_horizons(horizons) if horizons else None
+        selection = parse_fields(fields, PredictionResponse.model_fields)
         
-        return {
-            "symbol": basic_info["symbol"],
-            "name": basic_info["name"],
-            "price": basic_info["price"],
-            "change": basic_info["change"],
-            "volume": basic_info["volume"],
-            "prediction": f"{predicted_close[0]:.2f}",
-            "confidence": f"{confidence:.0f}%",
-            "trend": trend,
-            "sentimentScore": sentiment_score,
-            "success": True,
-            "features_used": {
-                "open": features[0],
-                "high": features[1],
-                "low": features[2],
-                "volume": features[3],
-                "ma10": features[4],
-                "ma50": features[5],
-                "returns": features[6],
-                "volatility": features[7]
-            }
-        }
+        # After the close a daily-bar prediction is fixed until the next bar: serve the precomputed one
+        response = None
+        if not live and not requested_horizons:
+            response = get_precomputed("predict", symbol)
+        if response is None:
+            response = compute_prediction(symbol, requested_horizons, with_name=wants(selection, "name"))
+        
+        if format == "display":
+            response = display_prediction(response)
+        if format == "display" or selection is not None:
+            return FastJSONResponse(select_fields(response, selection))
+        return response
         
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         logger.error(f"❌ Model files not found for {symbol}: {str(e)}")
         
@@ -520,23 +578,41 @@ def predict_price_with_features(data: PredictRequest):
                 detail="Expected 8 features: [Open, High, Low, Volume, MA10, MA50, Returns, Volatility]"
             )
         
-        # Use consistent path handling
-        model, scaler = load_model_and_scaler(data.ticker.upper())
-        
-        # Create DataFrame with proper feature names matching training data
-        feature_names = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
-        features_df = pd.DataFrame([data.features], columns=feature_names)
-        
-        # Scale and predict
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", category=UserWarning)
-            features_scaled = scaler.transform(features_df)
+        # Use consistent path handling, pooled global model as fallback
+        model_source = "ticker"
+        try:
+            model, scaler, model_version = get_active_model(data.ticker.upper())
+        except FileNotFoundError:
+            global_artifact = load_global_model()
+            if global_artifact is None:
+                raise
+            model_source = "global"
+            model_version = "global"
+        
+        if model_source == "ticker":
+            # Create DataFrame with proper feature names matching training data
+            feature_names = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
+            features_df = pd.DataFrame([data.features], columns=feature_names)
             
-        prediction = model.predict(features_scaled)
+            # Scale and predict
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", category=UserWarning)
+                features_scaled = scaler.transform(features_df)
+                
+            prediction = model.predict(features_scaled)
+        else:
+            prediction = predict_global(global_artifact, [data.features])
+        
+        log_prediction(
+            data.ticker, "manual", float(prediction[0]),
+            model=model_source, model_version=model_version, features=data.features,
+        )
         
         return {
             "ticker": data.ticker.upper(), 
             "predicted_close": float(prediction[0]),
+            "model": model_source,
+            "model_version": model_version,
             "features_used": {
                 "open": data.features[0],
                 "high": data.features[1],
@@ -556,24 +632,98 @@ def predict_price_with_features(data: PredictRequest):
         logger.error(f"Prediction error for {data.ticker}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+@router.get("/predictions/{symbol}")
+def get_prediction_history(symbol: str, limit: int = 100, since: Optional[str] = None,
+                           source: Optional[str] = None):
+    """
+    Logged predictions for a symbol joined with the realized closes
+
+    Optional `since` (ISO date/time) and `source` (predict, compare, manual)
+    filter the log; newest predictions come first.
+    """
+    try:
+        symbol = symbol.upper()
+        if not 1 <= limit <= 5000:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 5000")
+        
+        predictions = query_predictions(symbol, limit=limit, since=since, source=source)
+        
+        # Realized closes for every bar the logged predictions targeted, plus
+        # the bars before them (direction baseline of rows logged without one)
+        closes = pd.Series(dtype=float)
+        bar_dates = predictions["bar_date"].dropna()
+        if not bar_dates.empty:
+            try:
+                start = pd.Timestamp(bar_dates.min()) - pd.Timedelta(days=10)
+                closes = get_history(symbol, start=start)["Close"]
+            except Exception as e:
+                logger.warning(f"Could not load realized closes for {symbol}: {e}")
+        
+        history = join_realized(predictions, closes)
+        summary = accuracy_summary(history)
+        history["features"] = history["features"].map(lambda f: json.loads(f) if isinstance(f, str) else None)
+        history = history.astype(object).where(history.notna(), None)
+        
+        return FastJSONResponse({
+            "symbol": symbol,
+            "summary": summary,
+            "predictions": history.to_dict(orient="records")
+        })
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading prediction history for {symbol}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prediction history error: {str(e)}")
+
 @router.get("/price-history/{symbol}")
-def get_price_history(symbol: str, range: int = 60):
+def get_price_history(symbol: str, range: int = 60, points: Optional[int] = None,
+                      method: str = "lttb", encoding: str = "json"):
+    """
+    Get closing price history for charts
+
+    Optional `points` downsamples server-side (method: lttb or minmax) and
+    `encoding` selects json rows, columnar (delta-encoded days) or binary.
+    """
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period=f"{range}d")
+        if encoding not in HISTORY_ENCODINGS:
+            raise HTTPException(status_code=400, detail=f"encoding must be one of {list(HISTORY_ENCODINGS)}")
+        if method not in DOWNSAMPLE_METHODS:
+            raise HTTPException(status_code=400, detail=f"method must be one of {list(DOWNSAMPLE_METHODS)}")
+        if points is not None and points < 2:
+            raise HTTPException(status_code=400, detail="points must be at least 2")
+
+        hist = get_history(symbol.upper(), days=range)
         if hist.empty:
             raise HTTPException(status_code=404, detail="No historical data found.")
 
-        price_data = [
-            {
-                "date": date.strftime("%Y-%m-%d"),
-                "price": round(row["Close"], 2)
-            }
-            for date, row in hist.iterrows()
-        ]
+        payload, total_points, returned_points = serialize_history(
+            hist, points=points, method=method, encoding=encoding
+        )
 
-        return {"symbol": symbol.upper(), "history": price_data}
+        if encoding == "binary":
+            return Response(
+                content=payload,
+                media_type=BINARY_MEDIA_TYPE,
+                headers={
+                    "X-Symbol": symbol.upper(),
+                    "X-Total-Points": str(total_points),
+                },
+            )
+
+        response = {"symbol": symbol.upper(), "history": payload}
+        if encoding != "json":
+            response["encoding"] = encoding
+        if returned_points != total_points:
+            response["downsampled"] = {
+                "method": method,
+                "total_points": total_points,
+                "returned_points": returned_points,
+            }
+        return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching price history for {symbol}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error fetching historical data.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error fetching historical data.")
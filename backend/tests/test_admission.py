@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from utils import admission
+from utils.admission import ConcurrencyGate, client_key
+
+def scope(peer, headers=()):
+    return {"client": (peer, 50000), "headers": [(k.encode(), v.encode()) for k, v in headers]}
+
+def test_forwarded_for_is_ignored():
+    assert client_key(scope("10.0.0.1", [("x-forwarded-for", "1.2.3.4")])) == "10.0.0.1"
+
+def test_platform_client_header(monkeypatch):
+    monkeypatch.setattr(admission, "CLIENT_IP_HEADER", "x-real-ip")
+
+    assert client_key(scope("10.0.0.1", [("x-real-ip", "203.0.113.7")])) == "203.0.113.7"
+    assert client_key(scope("10.0.0.1")) == "10.0.0.1"
+
+def test_gate_times_out_without_leaking_permits():
+    async def run():
+        gate = ConcurrencyGate("test", limit=1, max_queue=4, timeout=0.05)
+        async with gate.slot() as first:
+            assert first
+            async with gate.slot() as second:
+                assert not second
+        async with gate.slot() as again:
+            assert again
+        return gate
+
+    gate = asyncio.run(run())
+    assert gate.running == 0 and gate.waiting == 0
+    assert gate.stats["timed_out"] == 1
+
+def test_cancelled_request_releases_its_permit():
+    async def run():
+        gate = ConcurrencyGate("test", limit=1, max_queue=4, timeout=1)
+
+        async def request():
+            async with gate.slot():
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        async with gate.slot() as admitted:
+            return admitted, gate.running
+
+    assert asyncio.run(run()) == (True, 1)
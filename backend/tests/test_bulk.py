@@ -0,0 +1,27 @@
+import numpy as np
+
+from routers.bulk import score_ndjson_chunk
+
+class RecordingScorers:
+    def __init__(self):
+        self.loaded = []
+
+    def get(self, ticker):
+        self.loaded.append(ticker)
+        return (lambda rows: np.full(len(rows), 101.0)), "ticker", "v1"
+
+FEATURES = [100.0, 102.0, 99.0, 1e6, 100.5, 98.0, 0.01, 1.2]
+
+def test_invalid_rows_fail_alone_and_load_no_model():
+    items = [
+        (1, {"ticker": "AAPL", "features": FEATURES}),
+        (2, {"ticker": "AAPL", "features": FEATURES[:7] + [float("nan")]}),
+        (3, {"ticker": "MSFT", "features": FEATURES[:7] + ["x"]}),
+    ]
+    scorers = RecordingScorers()
+
+    results = score_ndjson_chunk(items, "auto", scorers)
+
+    assert [r["success"] for r in results] == [True, False, False]
+    assert results[0]["predicted_close"] == 101.0
+    assert scorers.loaded == ["AAPL"]
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from utils import feature_store
+from utils.feature_store import FEATURE_NAMES, SENTIMENT_FEATURES, training_frame
+from utils.market_data import read_bars_csv
+from utils.paths import get_processed_data_path
+
+def test_training_frame_reads_the_full_processed_history(tmp_path, monkeypatch):
+    monkeypatch.setenv("SENTIMENT_INDEX_DB", str(tmp_path / "index.sqlite3"))
+
+    def no_sync(ticker):
+        raise AssertionError("training must not sync through the warehouse")
+
+    monkeypatch.setattr(feature_store, "get_features", no_sync)
+    processed = read_bars_csv(get_processed_data_path("AAPL"))
+
+    frame = training_frame("AAPL")
+
+    assert len(frame) == len(processed)
+    assert list(frame.columns) == FEATURE_NAMES + SENTIMENT_FEATURES + ["Close"]
+    pd.testing.assert_series_equal(frame["MA50"], processed["MA50"])
+    assert (frame["SentimentStories"] == 0).all()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from utils.history import lttb_indices, minmax_indices
+
+rng = np.random.default_rng(0)
+Y = rng.normal(size=500).cumsum()
+X = np.arange(len(Y), dtype=np.float64)
+
+def test_lttb_two_points_keeps_the_endpoints():
+    assert lttb_indices(X, Y, 2).tolist() == [0, len(Y) - 1]
+
+@pytest.mark.parametrize("points", [2, 3, 4, 7, 50, 499])
+def test_downsampling_returns_at_most_points(points):
+    assert len(lttb_indices(X, Y, points)) == points
+    idx = minmax_indices(Y, points)
+    assert 2 <= len(idx) <= points
+    assert idx[0] == 0 and idx[-1] == len(Y) - 1
+
+def test_minmax_keeps_spikes():
+    y = np.zeros(1000)
+    y[333], y[777] = 50.0, -50.0
+
+    idx = minmax_indices(y, 10)
+
+    assert 333 in idx and 777 in idx
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from utils import horizons
+from utils.forecast import FEATURE_NAMES
+from utils.horizons import load_multi_horizon_model, predict_horizons
+
+def test_unknown_version_is_not_trained(monkeypatch):
+    monkeypatch.setattr(horizons, "_models", {})
+
+    def no_training(*args, **kwargs):
+        raise AssertionError("must not train while serving")
+
+    monkeypatch.setattr(horizons, "train_multi_horizon_model", no_training)
+
+    assert load_multi_horizon_model("AAPL", "v-missing") is None
+
+def test_legacy_artifact_scales_with_its_own_scaler(monkeypatch):
+    monkeypatch.setattr(horizons, "_models", {})
+    artifact = load_multi_horizon_model("AAPL")
+    row = pd.DataFrame([[200.0, 202.0, 198.0, 5e7, 199.0, 195.0, 0.01, 3.0]], columns=FEATURE_NAMES)
+
+    forecasts = predict_horizons(artifact, row, 200.0, [1, 5])
+
+    assert artifact["scaler"] is not None
+    assert [f["horizon"] for f in forecasts] == [1, 5]
+    assert load_multi_horizon_model("AAPL") is artifact
@@ -0,0 +1,75 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils import market_data, warehouse
+from utils.market_data import LocalFileProvider, read_bars_csv
+from utils.resilience import ProviderUnavailable
+
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data" / "processed"
+# Last bar of the training files shipped in data/processed
+LAST_BAR = pd.Timestamp("2025-06-06")
+
+RAW_EXPORT = """Price,Close,High,Low,Open,Volume
+Ticker,TSLA,TSLA,TSLA,TSLA,TSLA
+Date,,,,,
+2021-01-04,243.2566680908203,248.163330078125,239.06333923339844,239.82000732421875,145914600
+2021-01-05,245.0366668701172,246.94667053222656,239.73333740234375,241.22000122070312,96735600
+"""
+
+@pytest.fixture
+def local_warehouse(tmp_path, monkeypatch):
+    """Warehouse in a temp dir, fed by the local provider from data/processed"""
+    provider = LocalFileProvider(roots=[PROCESSED_DIR])
+    monkeypatch.setenv("WAREHOUSE_DIR", str(tmp_path))
+    monkeypatch.setattr(market_data, "get_provider", lambda ticker: provider)
+    monkeypatch.setattr(warehouse, "get_provider", lambda ticker: provider)
+    monkeypatch.setattr(warehouse, "_frames", {})
+    monkeypatch.setattr(warehouse, "_last_sync", {})
+    return provider
+
+def test_reads_notebook_raw_export(tmp_path):
+    path = tmp_path / "TSLA.csv"
+    path.write_text(RAW_EXPORT)
+
+    frame = read_bars_csv(path)
+
+    assert list(frame.index) == [pd.Timestamp("2021-01-04"), pd.Timestamp("2021-01-05")]
+    assert frame.loc["2021-01-04", "Close"] == pytest.approx(243.2566680908203)
+    assert frame["Volume"].dtype.kind in "if"
+
+def test_reads_processed_training_file(local_warehouse):
+    frame = local_warehouse.history(["AAPL"], datetime(2025, 6, 1))["AAPL"]
+
+    assert list(frame.columns) == market_data.OHLCV_COLUMNS
+    assert frame.index[-1] == LAST_BAR
+    assert frame.loc[LAST_BAR, "Close"] == pytest.approx(203.9199981689453)
+
+def test_windows_end_at_last_local_bar(local_warehouse):
+    assert local_warehouse.window_end("AAPL") == LAST_BAR.to_pydatetime()
+
+    hist = warehouse.get_history("AAPL", days=60)
+
+    assert not hist.empty
+    assert hist.index[-1] == LAST_BAR
+    assert hist.index[0] >= LAST_BAR - pd.Timedelta(days=60)
+
+def test_unknown_ticker_is_empty(local_warehouse):
+    assert local_warehouse.history(["NOPE"], datetime(2025, 1, 1))["NOPE"].empty
+
+def test_failed_restatement_download_keeps_stored_bars(local_warehouse, monkeypatch):
+    stored = warehouse.sync_ticker("AAPL")
+    fetched = stored.iloc[-30:].copy()
+    fetched["Close"] *= 2  # restated upstream
+
+    def unavailable(ticker, start):
+        raise ProviderUnavailable("yahoo down")
+
+    monkeypatch.setattr(warehouse, "_fetch_upstream", unavailable)
+
+    with warehouse._ticker_lock("AAPL"):
+        result = warehouse._apply_fetched("AAPL", stored, fetched)
+
+    pd.testing.assert_frame_equal(result, stored)
@@ -0,0 +1,113 @@
+from datetime import date, datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from utils.market_calendar import CALENDARS, calendar_for
+
+NEW_YORK = ZoneInfo("America/New_York")
+LONDON = ZoneInfo("Europe/London")
+KOLKATA = ZoneInfo("Asia/Kolkata")
+
+@pytest.mark.parametrize("day", [
+    date(2025, 1, 1),    # New Year's Day
+    date(2025, 1, 20),   # Martin Luther King Jr. Day
+    date(2025, 2, 17),   # Washington's Birthday
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 5, 26),   # Memorial Day
+    date(2025, 6, 19),   # Juneteenth
+    date(2025, 7, 4),
+    date(2025, 9, 1),    # Labor Day
+    date(2025, 11, 27),  # Thanksgiving
+    date(2025, 12, 25),
+    date(2026, 7, 3),    # July 4 on a Saturday, observed Friday
+    date(2022, 12, 26),  # Christmas on a Sunday, observed Monday
+])
+def test_us_holidays(day):
+    assert not CALENDARS["US"].is_trading_day(day)
+
+@pytest.mark.parametrize("day", [
+    date(2021, 12, 31),  # New Year's Day 2022 on a Saturday is not observed
+    date(2021, 6, 18),   # Juneteenth only from 2022
+    date(2025, 11, 28),  # day after Thanksgiving (early close)
+])
+def test_us_trading_days(day):
+    assert CALENDARS["US"].is_trading_day(day)
+
+@pytest.mark.parametrize("day", [
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 4, 21),   # Easter Monday
+    date(2025, 5, 5),    # Early May bank holiday
+    date(2025, 5, 26),   # Spring bank holiday
+    date(2025, 8, 25),   # Summer bank holiday
+    date(2020, 12, 28),  # Boxing Day on a Saturday, substitute Monday
+    date(2021, 12, 27),  # Christmas on a Saturday, substitute Monday
+    date(2021, 12, 28),  # Boxing Day on a Sunday, substitute Tuesday
+])
+def test_uk_holidays(day):
+    assert not CALENDARS["LSE"].is_trading_day(day)
+
+@pytest.mark.parametrize("day", [
+    date(2026, 1, 26),   # Republic Day
+    date(2025, 5, 1),    # Maharashtra Day
+    date(2025, 8, 15),   # Independence Day
+    date(2025, 10, 2),   # Gandhi Jayanti
+])
+def test_india_holidays(day):
+    assert not CALENDARS["IN"].is_trading_day(day)
+
+@pytest.mark.parametrize("day, close", [
+    (date(2025, 7, 3), dtime(13, 0)),
+    (date(2025, 11, 28), dtime(13, 0)),
+    (date(2025, 12, 24), dtime(13, 0)),
+])
+def test_us_early_closes(day, close):
+    assert CALENDARS["US"].early_closes(day.year)[day] == close
+
+def test_no_us_early_close_when_july_4_is_a_monday():
+    assert date(2022, 7, 1) not in CALENDARS["US"].early_closes(2022)
+
+def test_last_close_and_next_open_across_a_weekend():
+    us = calendar_for("AAPL")
+    saturday = datetime(2025, 6, 7, 12, 0, tzinfo=NEW_YORK)
+
+    assert us.last_close(saturday) == datetime(2025, 6, 6, 16, 0, tzinfo=NEW_YORK)
+    assert us.next_open(saturday) == datetime(2025, 6, 9, 9, 30, tzinfo=NEW_YORK)
+
+def test_last_close_and_next_open_across_thanksgiving():
+    us = calendar_for("AAPL")
+    thanksgiving = datetime(2025, 11, 27, 12, 0, tzinfo=NEW_YORK)
+
+    assert us.last_close(thanksgiving) == datetime(2025, 11, 26, 16, 0, tzinfo=NEW_YORK)
+    assert us.next_open(thanksgiving) == datetime(2025, 11, 28, 9, 30, tzinfo=NEW_YORK)
+
+def test_early_close_ends_the_session():
+    us = calendar_for("AAPL")
+    after_early_close = datetime(2025, 11, 28, 14, 0, tzinfo=NEW_YORK)
+
+    assert not us.is_open(after_early_close)
+    assert us.last_close(after_early_close) == datetime(2025, 11, 28, 13, 0, tzinfo=NEW_YORK)
+    assert us.next_open(after_early_close) == datetime(2025, 12, 1, 9, 30, tzinfo=NEW_YORK)
+    fetched_at = datetime(2025, 11, 28, 13, 31, tzinfo=NEW_YORK).timestamp()
+    assert us.is_settled(fetched_at, after_early_close)
+
+def test_status_reports_the_early_close():
+    status = calendar_for("AAPL").status(datetime(2025, 12, 24, 10, 0, tzinfo=NEW_YORK))
+
+    assert status["open"]
+    assert status["next_close"] == "2025-12-24T13:00:00-05:00"
+    assert status["next_open"] == "2025-12-26T09:30:00-05:00"
+
+def test_next_open_across_easter_in_london():
+    lse = calendar_for("VOD.L")
+    good_friday = datetime(2025, 4, 18, 12, 0, tzinfo=LONDON)
+
+    assert lse.last_close(good_friday) == datetime(2025, 4, 17, 16, 30, tzinfo=LONDON)
+    assert lse.next_open(good_friday) == datetime(2025, 4, 22, 8, 0, tzinfo=LONDON)
+
+def test_next_open_across_a_holiday_weekend_in_india():
+    nse = calendar_for("RELIANCE.NS")
+    independence_day = datetime(2025, 8, 15, 11, 0, tzinfo=KOLKATA)
+
+    assert nse.last_close(independence_day) == datetime(2025, 8, 14, 15, 30, tzinfo=KOLKATA)
+    assert nse.next_open(independence_day) == datetime(2025, 8, 18, 9, 15, tzinfo=KOLKATA)
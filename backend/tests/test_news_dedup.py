@@ -0,0 +1,23 @@
+from utils.news_dedup import NearDuplicateIndex, cluster_articles, normalize_text
+
+def test_normalize_keeps_non_latin_scripts():
+    assert normalize_text("Sensex ने 500 अंक की छलांग लगाई!") == "sensex ने 500 अंक की छलांग लगाई"
+    assert normalize_text("STRASSE Straße") == "strasse strasse"
+
+def test_unrelated_hindi_headlines_are_separate_stories():
+    articles = [
+        {"title": "सेंसेक्स में 500 अंकों की तेजी, निफ्टी रिकॉर्ड स्तर पर", "url": "https://a.example/1"},
+        {"title": "रिलायंस के तिमाही नतीजे उम्मीद से बेहतर रहे", "url": "https://a.example/2"},
+        {"title": "सेंसेक्स में 500 अंकों की तेजी, निफ्टी रिकॉर्ड स्तर पर", "url": "https://b.example/3"},
+    ]
+
+    clusters = cluster_articles(articles, NearDuplicateIndex())
+
+    assert [len(members) for _, members in clusters] == [2, 1]
+
+def test_articles_without_text_are_never_clustered():
+    articles = [{"title": "!!!", "url": "https://a.example/1"}, {"title": "???", "url": "https://a.example/2"}]
+
+    clusters = cluster_articles(articles, NearDuplicateIndex())
+
+    assert len(clusters) == 2
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from utils.prediction_log import COLUMNS, accuracy_summary, join_realized, query_predictions
+
+CLOSES = pd.Series(
+    [100.0, 102.0, 101.0, 103.0],
+    index=pd.to_datetime(["2025-06-02", "2025-06-03", "2025-06-04", "2025-06-05"]),
+)
+
+def prediction(bar_date, predicted_close, previous_close=None, source="predict", logged_at="2025-06-05T21:00:00"):
+    row = dict.fromkeys(COLUMNS)
+    row.update(
+        logged_at=logged_at, ticker="AAPL", source=source, model="ticker", model_version="v1",
+        bar_date=bar_date, current_close=CLOSES.get(pd.Timestamp(bar_date)),
+        previous_close=previous_close, predicted_close=predicted_close,
+    )
+    return row
+
+def test_direction_is_scored_against_the_previous_close():
+    # Logged after 2025-06-03 closed: current_close is the realized close itself
+    frame = join_realized(pd.DataFrame([prediction("2025-06-03", 101.5, previous_close=100.0)]), CLOSES)
+
+    assert frame.loc[0, "realized_close"] == 102.0
+    assert bool(frame.loc[0, "direction_hit"]) is True
+
+def test_rows_without_previous_close_use_the_bar_before():
+    frame = join_realized(pd.DataFrame([prediction("2025-06-04", 101.5)]), CLOSES)
+
+    # 2025-06-03 closed at 102: predicted down, realized down
+    assert bool(frame.loc[0, "direction_hit"]) is True
+
+def test_summary_counts_distinct_predictions():
+    rows = [prediction("2025-06-03", 101.5, previous_close=100.0, logged_at=f"2025-06-05T21:0{i}:00")
+            for i in range(5)]
+    rows.append(prediction("2025-06-04", 103.0, previous_close=102.0))
+    summary = accuracy_summary(join_realized(pd.DataFrame(rows), CLOSES))
+
+    assert summary["logged"] == 6
+    assert summary["predictions"] == 2
+    assert summary["realized"] == 2
+    assert summary["direction_hit_rate"] == pytest.approx(0.5)
+
+def test_log_written_before_previous_close_is_migrated(tmp_path, monkeypatch):
+    path = tmp_path / "prediction_log.sqlite3"
+    monkeypatch.setenv("PREDICTION_LOG_DB", str(path))
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE predictions (id INTEGER PRIMARY KEY, logged_at TEXT NOT NULL, ticker TEXT NOT NULL, "
+        "source TEXT NOT NULL, model TEXT, model_version TEXT, bar_date TEXT, current_close REAL, "
+        "predicted_close REAL NOT NULL, p10 REAL, p50 REAL, p90 REAL, trend TEXT, confidence REAL, features TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO predictions (logged_at, ticker, source, bar_date, predicted_close) "
+        "VALUES ('2025-06-05T21:00:00', 'AAPL', 'predict', '2025-06-04', 101.5)"
+    )
+    conn.commit()
+    conn.close()
+
+    frame = query_predictions("AAPL")
+
+    assert len(frame) == 1
+    assert pd.isna(frame.loc[0, "previous_close"])
@@ -0,0 +1,24 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils import responses
+from utils.responses import FastJSONResponse, encode_json
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+def test_non_finite_floats_are_null(encoder):
+    content = {"a": float("nan"), "b": [1.5, float("inf")], "c": {"d": np.float64("nan")}}
+
+    assert json.loads(encode_json(content)) == {"a": None, "b": [1.5, None], "c": {"d": None}}
+    assert json.loads(FastJSONResponse(content).body) == {"a": None, "b": [1.5, None], "c": {"d": None}}
+
+def test_non_ascii_is_kept(encoder):
+    assert json.loads(encode_json({"name": "Société Générale"})) == {"name": "Société Générale"}
@@ -0,0 +1,48 @@
+import pytest
+
+from utils.news_dedup import story_id
+from utils.sentiment_index import index_version, ingest, parse_published, parse_timestamp, query_series
+
+def test_parse_timestamp():
+    assert parse_timestamp("2025-06-06") == 1749168000
+    assert parse_timestamp("2025-06-06T00:00:00Z") == 1749168000
+    assert parse_timestamp("2025-06-06T02:00:00+02:00") == 1749168000
+
+def test_invalid_series_bounds_raise(tmp_path, monkeypatch):
+    monkeypatch.setenv("SENTIMENT_INDEX_DB", str(tmp_path / "index.sqlite3"))
+
+    with pytest.raises(ValueError):
+        query_series("AAPL", start="yesterday")
+    with pytest.raises(ValueError):
+        query_series("AAPL", end="2025-13-01")
+    assert query_series("AAPL", start="2025-06-01", end="2025-06-06") == []
+
+def test_missing_published_at_falls_back_to_now():
+    assert parse_published("not a date") > parse_timestamp("2025-01-01")
+
+def test_story_id_is_the_earliest_copy():
+    original = {"title": "Apple beats estimates", "url": "https://a.example/1?utm_source=x",
+                "publishedAt": "2025-06-05T10:00:00Z"}
+    copy = {"title": "Apple beats estimates!", "url": "https://b.example/2", "publishedAt": "2025-06-05T12:00:00Z"}
+
+    assert story_id([copy, original]) == story_id([original]) == story_id([{**original, "url": "https://A.example/1"}])
+    assert story_id([copy]) != story_id([original])
+
+def test_recurring_headlines_get_their_own_ids():
+    monday = {"title": "Stocks to watch today", "url": "https://a.example/monday", "publishedAt": "2025-06-02T03:00:00Z"}
+    tuesday = {"title": "Stocks to watch today", "url": "https://a.example/tuesday", "publishedAt": "2025-06-03T03:00:00Z"}
+
+    assert story_id([monday]) != story_id([tuesday])
+    assert story_id([{**monday, "url": None}]) != story_id([{**tuesday, "url": None}])
+
+def test_index_version_ignores_refreshes_without_new_stories(tmp_path, monkeypatch):
+    monkeypatch.setenv("SENTIMENT_INDEX_DB", str(tmp_path / "index.sqlite3"))
+    story = {"story_id": "a1", "publishedAt": "2025-06-05T10:00:00Z", "score": 0.5, "sources": ["Reuters"]}
+
+    ingest("AAPL", [story])
+    version = index_version("AAPL")
+    ingest("AAPL", [story])
+
+    assert index_version("AAPL") == version
+    ingest("AAPL", [{**story, "story_id": "a2"}])
+    assert index_version("AAPL") != version
@@ -0,0 +1,39 @@
+from utils import universe
+from utils.universe import TickerUniverse, get_display_name
+
+class CountingProvider:
+    def __init__(self, name=None):
+        self.name = name
+        self.calls = 0
+
+    def display_name(self, ticker):
+        self.calls += 1
+        return self.name
+
+def use_provider(monkeypatch, provider):
+    index = TickerUniverse()
+    index.add("AAPL", name="Apple Inc.")
+    index.build_index()
+    monkeypatch.setattr(universe, "_universe", index)
+    monkeypatch.setattr(universe, "get_provider", lambda ticker: provider)
+    return index
+
+def test_missing_name_is_fetched_once(monkeypatch):
+    provider = CountingProvider(name=None)
+    use_provider(monkeypatch, provider)
+
+    assert get_display_name("ZZZZ") == "ZZZZ"
+    assert get_display_name("ZZZZ") == "ZZZZ"
+    assert provider.calls == 1
+
+def test_remembered_name_is_indexed_once(monkeypatch):
+    provider = CountingProvider(name="Acme Widgets")
+    index = use_provider(monkeypatch, provider)
+
+    for _ in range(3):
+        assert get_display_name("ACME") == "Acme Widgets"
+    index.remember_name("ACME", "Acme Widgets")
+
+    assert provider.calls == 1
+    assert index._name_keys.count(("acme", "ACME")) == 1
+    assert index.search("widg")[0]["symbol"] == "ACME"
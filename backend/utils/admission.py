@@ -0,0 +1,258 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from utils.responses import encode_json
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set ADMISSION_CONTROL=off to disable rate limiting and load shedding
+ADMISSION_ENABLED = os.getenv("ADMISSION_CONTROL", "on").lower() != "off"
+# Per-client token buckets: sustained requests per second and burst size of each lane
+CHEAP_RATE = float(os.getenv("RATE_LIMIT_CHEAP_RPS", "20"))
+CHEAP_BURST = float(os.getenv("RATE_LIMIT_CHEAP_BURST", "60"))
+EXPENSIVE_RATE = float(os.getenv("RATE_LIMIT_EXPENSIVE_RPS", "1"))
+EXPENSIVE_BURST = float(os.getenv("RATE_LIMIT_EXPENSIVE_BURST", "10"))
+# Per expensive route group: requests running at once, requests allowed to wait and for how long
+MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "4"))
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+# Least recently seen client buckets are forgotten beyond this many
+MAX_CLIENTS = 10000
+# Behind a proxy, clients are told apart by one of these (see client_key):
+# the proxy addresses/CIDRs uvicorn trusts X-Forwarded-For from (--forwarded-allow-ips)...
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "")
+# ...or a header the platform proxy sets to the client address, overwriting any
+# client-sent value (e.g. X-Real-IP on Railway)
+CLIENT_IP_HEADER = os.getenv("CLIENT_IP_HEADER", "").strip().lower()
+
+# Path prefix -> route group with its own concurrency cap; everything else is the fast lane
+EXPENSIVE_ROUTES = (
+    ("/insights", "insights"),
+    ("/compare", "compare"),
+    ("/sentiment", "sentiment"),
+    ("/bulk", "bulk"),
+)
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; each request takes one"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 if admitted, else seconds until a token is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class ConcurrencyGate:
+    """
+    At most `limit` requests of a route group run at once, `max_queue` more may wait
+
+    Requests beyond the queue are shed immediately and waiting ones give up
+    after `timeout`. Retry-After is estimated from the queue depth and the
+    group's recent service time.
+    """
+
+    def __init__(self, name: str, limit: int = MAX_CONCURRENT, max_queue: int = MAX_QUEUE,
+                 timeout: float = QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.running = 0
+        self.waiting = 0
+        self.avg_seconds = 1.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0, "timed_out": 0}
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.avg_seconds * (self.waiting + 1) / self.limit))
+
+    async def _acquire(self) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.stats["shed"] += 1
+                return False
+            self.stats["queued"] += 1
+        self.waiting += 1
+        acquired = False
+        try:
+            # asyncio.timeout cancels the acquire itself, which gives a permit
+            # handed over at the deadline back (wait_for could lose it)
+            async with asyncio.timeout(self.timeout):
+                await self._semaphore.acquire()
+                acquired = True
+        except TimeoutError:
+            if acquired:
+                self._semaphore.release()
+            self.stats["timed_out"] += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        self.stats["admitted"] += 1
+        return True
+
+    @asynccontextmanager
+    async def slot(self):
+        """Yields whether the request was admitted; its permit is released on exit, even on cancel"""
+        admitted = await self._acquire()
+        started = time.monotonic()
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.running -= 1
+                self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.monotonic() - started)
+                self._semaphore.release()
+
+    def status(self) -> Dict:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "avg_seconds": round(self.avg_seconds, 3),
+            **self.stats,
+        }
+
+def route_group(path: str) -> Optional[str]:
+    for prefix, group in EXPENSIVE_ROUTES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return group
+    return None
+
+def client_key(scope) -> str:
+    """
+    Client address of the request
+
+    X-Forwarded-For is set by the client and is never read here. Behind a
+    proxy every request's peer is the proxy, so one of these is required:
+    FORWARDED_ALLOW_IPS set to the proxy's addresses/CIDR (uvicorn's
+    --proxy-headers then puts the real client in the scope), or
+    CLIENT_IP_HEADER naming a header the proxy overwrites with the client
+    address. Without either all clients share one bucket.
+    """
+    if CLIENT_IP_HEADER:
+        for name, value in scope.get("headers", ()):
+            if name.decode("latin-1") == CLIENT_IP_HEADER:
+                address = value.decode("latin-1").split(",")[0].strip()
+                if address:
+                    return address
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class AdmissionMiddleware:
+    """
+    Per-client rate limiting and load shedding in front of the API
+
+    Every client has one token bucket per lane: expensive routes (/insights,
+    /compare, /sentiment, /bulk) refill slowly, everything else (health,
+    tickers, predictions) quickly, so a client hammering /insights is throttled
+    with 429 without losing access to cheap routes. Each expensive route group
+    also has a concurrency cap and a bounded wait queue, shedding with 503 when
+    full. The caps keep most of the worker threadpool free, which is the fast
+    lane cheap routes are served from. Both responses carry Retry-After.
+
+    A pure ASGI middleware, so a streamed response (/bulk) holds its slot
+    until the last chunk is sent.
+    """
+
+    def __init__(self, app, enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self.gates = {group: ConcurrencyGate(group) for _, group in EXPENSIVE_ROUTES}
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.stats = {"rate_limited": 0}
+        admission_middlewares.append(self)
+        if enabled and not CLIENT_IP_HEADER and FORWARDED_ALLOW_IPS in ("", "127.0.0.1"):
+            logger.warning(
+                "Rate limits key on the TCP peer: behind a proxy all clients share one bucket. "
+                "Set FORWARDED_ALLOW_IPS to the proxy's addresses/CIDR or CLIENT_IP_HEADER "
+                "to the client address header it sets."
+            )
+
+    def _bucket(self, client: str, lane: str) -> TokenBucket:
+        key = (client, lane)
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+        else:
+            if len(self._buckets) >= MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+            rate, burst = (EXPENSIVE_RATE, EXPENSIVE_BURST) if lane == "expensive" else (CHEAP_RATE, CHEAP_BURST)
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    async def _reject(self, send, status: int, retry_after: int, detail: str):
+        body = encode_json({"detail": detail, "retry_after": retry_after})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        group = route_group(scope["path"])
+        wait = self._bucket(client_key(scope), "expensive" if group else "cheap").take()
+        if wait:
+            self.stats["rate_limited"] += 1
+            await self._reject(send, 429, max(1, math.ceil(wait)), "Too many requests, slow down")
+            return
+
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates[group]
+        async with gate.slot() as admitted:
+            if not admitted:
+                logger.warning(f"Shedding {scope['path']}: {gate.running} running, {gate.waiting} waiting")
+                await self._reject(send, 503, gate.retry_after(), f"Server busy ({group}), retry later")
+                return
+            await self.app(scope, receive, send)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "clients": len({client for client, _ in self._buckets}),
+            "lanes": {
+                "cheap": {"rps": CHEAP_RATE, "burst": CHEAP_BURST},
+                "expensive": {"rps": EXPENSIVE_RATE, "burst": EXPENSIVE_BURST},
+            },
+            "routes": {group: gate.status() for group, gate in self.gates.items()},
+            **self.stats,
+        }
+
+# Instances built by the app's middleware stack, for the debug endpoint
+admission_middlewares: List[AdmissionMiddleware] = []
+
+def admission_status() -> Dict:
+    return admission_middlewares[-1].status() if admission_middlewares else {"enabled": False}
@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds a computed prediction / sentiment is reused across requests
+ANALYSIS_TTL = float(os.getenv("ANALYSIS_TTL", "300"))
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "8"))
+
+class SingleFlightMemo:
+    """
+    TTL memo where concurrent callers of the same key share one computation
+
+    The first caller for a missing or expired key computes it; everyone
+    arriving while that runs waits on the same Future instead of starting
+    their own. Failures are handed to all waiters but never cached.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "shared": 0, "computed": 0}
+
+    def get(self, key: Hashable, compute: Callable[[], Any]):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.stats["hits"] += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats["computed"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._values[key] = (time.monotonic(), value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def peek(self, key: Hashable):
+        """Fresh cached value or None, never computing"""
+        with self._lock:
+            entry = self._values.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+class TickerAnalyzer:
+    """
+    Memoized per-ticker analysis shared by the insights endpoints
+
+    Predictions and sentiment are memoized separately, so the overview
+    (predictions only) warms the cache the detailed view then reuses, and
+    the detailed view fetches both halves concurrently.
+    """
+
+    def __init__(self, predict: Callable[[str], Dict], sentiment: Callable[[str], Dict],
+                 ttl: float = ANALYSIS_TTL, workers: int = ANALYSIS_WORKERS):
+        self._predict = predict
+        self._sentiment = sentiment
+        self.predictions = SingleFlightMemo(ttl)
+        self.sentiments = SingleFlightMemo(ttl)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+
+    def prediction(self, ticker: str) -> Dict:
+        ticker = ticker.upper()
+        return self.predictions.get(ticker, lambda: self._predict(ticker))
+
+    def sentiment(self, ticker: str) -> Dict:
+        ticker = ticker.upper()
+        return self.sentiments.get(ticker, lambda: self._sentiment(ticker))
+
+    def iter_predictions(self, tickers: Iterable[str], window: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream (ticker, prediction or Exception) in input order
+
+        At most `window` predictions are in flight or buffered at a time,
+        so memory stays bounded however long the ticker stream is.
+        """
+        window = window or self.workers * 2
+        pending = deque()
+        for ticker in tickers:
+            pending.append((ticker.upper(), self._executor.submit(self.prediction, ticker)))
+            if len(pending) >= window:
+                yield self._collect(*pending.popleft())
+        while pending:
+            yield self._collect(*pending.popleft())
+
+    @staticmethod
+    def _collect(ticker: str, future: Future) -> Tuple[str, Any]:
+        try:
+            return ticker, future.result()
+        except Exception as e:
+            return ticker, e
+
+    def cached_sentiment(self, ticker: str) -> Optional[Dict]:
+        """Sentiment already computed for a ticker, without fetching news"""
+        return self.sentiments.peek(ticker.upper())
+
+    def analyze(self, ticker: str, with_sentiment: bool = True) -> Dict[str, Any]:
+        """
+        Prediction and (optionally) sentiment for one ticker, run side by side
+
+        Returns:
+            Dict with "prediction" and "sentiment"; a failed half holds its Exception
+        """
+        ticker = ticker.upper()
+        prediction_future = self._executor.submit(self.prediction, ticker)
+        sentiment_future: Optional[Future] = (
+            self._executor.submit(self.sentiment, ticker) if with_sentiment else None
+        )
+
+        result = {}
+        for key, future in (("prediction", prediction_future), ("sentiment", sentiment_future)):
+            if future is None:
+                result[key] = None
+                continue
+            try:
+                result[key] = future.result()
+            except Exception as e:
+                result[key] = e
+        return result
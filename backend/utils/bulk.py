@@ -0,0 +1,100 @@
+import io
+import os
+import json
+import itertools
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NPY_MEDIA_TYPE = "application/x-npy"
+
+# Rows scored per model call (and per streamed response chunk)
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "256"))
+# Request bodies above this many bytes are spooled to a temporary file
+BULK_SPOOL_MEMORY = int(os.getenv("BULK_SPOOL_MEMORY", str(8 * 1024 * 1024)))
+
+async def spool_body(request) -> BinaryIO:
+    """
+    Copy a request body to a spooled temporary file as it arrives
+
+    The body is read incrementally, so memory stays bounded by
+    BULK_SPOOL_MEMORY however large the upload is. The caller closes the file.
+    """
+    spool = SpooledTemporaryFile(max_size=BULK_SPOOL_MEMORY)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_ndjson(fp: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """(line number, parsed object or the ValueError) for each non-empty line"""
+    for line_no, line in enumerate(fp, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+class NpyReader:
+    """
+    Stream the rows of a 2-D .npy matrix without loading all of it
+
+    Only the header is parsed up front, so shape and dtype problems are
+    reported before any work starts.
+    """
+
+    def __init__(self, fp: BinaryIO, columns: int):
+        version = npy_format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran_order, dtype = npy_format.read_array_header_1_0(fp)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = npy_format.read_array_header_2_0(fp)
+        else:
+            raise ValueError(f"Unsupported .npy version {version}")
+
+        if len(shape) != 2 or shape[1] != columns:
+            raise ValueError(f"Expected a (rows, {columns}) matrix, got shape {shape}")
+        if fortran_order:
+            raise ValueError("Fortran-ordered arrays are not supported, save with C order")
+        if dtype.kind not in "fiu":
+            raise ValueError(f"Expected a numeric matrix, got dtype {dtype}")
+
+        self.fp = fp
+        self.rows = shape[0]
+        self.columns = columns
+        self.dtype = dtype
+
+    def iter_chunks(self, size: int) -> Iterator[np.ndarray]:
+        row_bytes = self.dtype.itemsize * self.columns
+        remaining = self.rows
+        while remaining > 0:
+            n = min(size, remaining)
+            data = self.fp.read(n * row_bytes)
+            if len(data) != n * row_bytes:
+                raise ValueError("Truncated .npy body")
+            yield np.frombuffer(data, dtype=self.dtype).reshape(n, self.columns).astype(np.float64)
+            remaining -= n
+
+def npy_vector_header(length: int) -> bytes:
+    """Header of a float64 vector .npy file whose data is streamed afterwards"""
+    buffer = io.BytesIO()
+    npy_format.write_array_header_1_0(
+        buffer, {"descr": "<f8", "fortran_order": False, "shape": (length,)}
+    )
+    return buffer.getvalue()
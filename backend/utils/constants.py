@@ -2,4 +2,52 @@ TICKER_LIST = [
     "AAPL", "GOOGL", "MSFT", "TSLA",
     "RELIANCE.NS", "TCS.NS", "INFY.NS",
     "WIPRO.NS", "^NSEI", "^BSESN", "^GSPC"
-]
\ No newline at end of file
+]
+
+# Stock ticker to company/index name mapping
+TICKER_MAPPING = {
+    # US Stocks
+    "AAPL": "Apple",
+    "GOOGL": "Alphabet",
+    "MSFT": "Microsoft",
+    "TSLA": "Tesla",
+    
+    # Indian Stocks
+    "RELIANCE.NS": "Reliance Industries",
+    "TCS.NS": "Tata Consultancy Services",
+    "HDFCBANK.NS": "HDFC Bank",
+    "INFY.NS": "Infosys",
+    "HINDUNILVR.NS": "Hindustan Unilever",
+    "ICICIBANK.NS": "ICICI Bank",
+    "BHARTIARTL.NS": "Bharti Airtel",
+    "ITC.NS": "ITC Limited",
+    "SBIN.NS": "State Bank of India",
+    "LT.NS": "Larsen & Toubro",
+    "HCLTECH.NS": "HCL Technologies",
+    "ASIANPAINT.NS": "Asian Paints",
+    "MARUTI.NS": "Maruti Suzuki",
+    "BAJFINANCE.NS": "Bajaj Finance",
+    "TITAN.NS": "Titan Company",
+    "WIPRO.NS": "Wipro",
+    "TECHM.NS": "Tech Mahindra",
+    "ULTRACEMCO.NS": "UltraTech Cement",
+    "NESTLEIND.NS": "Nestle India",
+    "POWERGRID.NS": "Power Grid Corporation",
+    
+    # Market Indices (with ^ prefix)
+    "^GSPC": "S&P 500",
+    "^DJI": "Dow Jones",
+    "^IXIC": "NASDAQ",
+    "^RUT": "Russell 2000",
+    "^VIX": "VIX volatility",
+    "^TNX": "10-Year Treasury",
+    "^NSEI": "NIFTY 50",
+    "^BSESN": "BSE SENSEX",
+    "^FTSE": "FTSE 100",
+    "^GDAXI": "DAX",
+    "^N225": "Nikkei 225",
+    
+    # Crypto
+    "BTC-USD": "Bitcoin",
+    "ETH-USD": "Ethereum",
+}
@@ -0,0 +1,276 @@
+import os
+import time
+import logging
+import threading
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.paths import get_data_dir, get_processed_data_path
+from utils.market_data import read_bars_csv
+from utils.warehouse import sync_ticker
+from utils import sentiment_index
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Model input, in training order
+FEATURE_NAMES = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
+# News joined onto each bar: mean story score and story count since the previous
+# bar, and the time-decayed sentiment index at the bar's end of day
+SENTIMENT_FEATURES = ['Sentiment', 'SentimentStories', 'SentimentIndex']
+# Decayed weighted sum / weight behind SentimentIndex, carried to continue the index incrementally
+_INDEX_STATE = ['IndexSum', 'IndexWeight']
+STORE_COLUMNS = FEATURE_NAMES + ['Close'] + SENTIMENT_FEATURES + _INDEX_STATE + ['Imputed']
+
+# Trailing rows recomputed on every update (late news, partial intraday bars)
+RECOMPUTE_ROWS = int(os.getenv("FEATURE_STORE_RECOMPUTE_ROWS", "5"))
+# Bars before the first recomputed row needed by the rolling features (MA50)
+LOOKBACK_BARS = 60
+# |SentimentIndex| beyond which the prediction's sentimentScore is Positive / Negative
+SENTIMENT_LABEL_BAND = float(os.getenv("SENTIMENT_LABEL_BAND", "0.1"))
+
+_frames: Dict[str, pd.DataFrame] = {}
+# ticker -> (last bar key, sentiment index version) the stored frame was built from
+_built_from: Dict[str, Tuple] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def get_feature_store_dir() -> Path:
+    """Directory holding one joined feature CSV per ticker"""
+    override = os.getenv("FEATURE_STORE_DIR")
+    path = Path(override) if override else get_data_dir() / "features"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _ticker_path(ticker: str) -> Path:
+    return get_feature_store_dir() / f"{ticker.upper()}.csv"
+
+def _ticker_lock(ticker: str) -> threading.Lock:
+    with _locks_guard:
+        if ticker not in _locks:
+            _locks[ticker] = threading.Lock()
+        return _locks[ticker]
+
+def _load(ticker: str) -> pd.DataFrame:
+    if ticker in _frames:
+        return _frames[ticker]
+    path = _ticker_path(ticker)
+    if path.exists():
+        try:
+            frame = pd.read_csv(path, index_col="Date", parse_dates=True, keep_default_na=False,
+                                dtype={"Imputed": str})
+            _frames[ticker] = frame
+            return frame
+        except Exception as e:
+            logger.error(f"Error reading feature store file for {ticker}: {e}")
+    return pd.DataFrame(columns=STORE_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+def _save(ticker: str, frame: pd.DataFrame):
+    """Write atomically so a crash never leaves a half-written file"""
+    path = _ticker_path(ticker)
+    tmp_path = path.with_suffix(".csv.tmp")
+    frame.to_csv(tmp_path, index_label="Date")
+    os.replace(tmp_path, path)
+
+def compute_price_features(hist: pd.DataFrame) -> pd.DataFrame:
+    """
+    The 8 model features for every bar of an OHLCV history
+
+    Matches the training notebook: MA10/MA50 are rolling means of Close,
+    Returns is the close-to-close change and Volatility is the 10-bar rolling
+    std of Close (in price units, not of returns). While a rolling window is
+    still short the feature is imputed and named in the Imputed column.
+    """
+    close = hist['Close'].astype(float)
+    bars = np.arange(1, len(hist) + 1)
+
+    frame = pd.DataFrame(index=hist.index)
+    for name in ('Open', 'High', 'Low', 'Volume'):
+        frame[name] = hist[name].astype(float)
+    ma10 = close.rolling(window=10).mean()
+    ma50 = close.rolling(window=50).mean()
+    returns = close.pct_change()
+    volatility = close.rolling(window=10).std()
+
+    frame['MA10'] = ma10.fillna(close.expanding().mean())
+    frame['MA50'] = ma50.fillna(frame['MA10'])
+    frame['Returns'] = returns.fillna(0.0)
+    frame['Volatility'] = volatility.fillna(close.expanding().std()).fillna(close * 0.02)
+    frame['Close'] = close
+
+    imputed = [
+        ';'.join(name for name, missing in (
+            ('MA10', ma10_nan), ('MA50', ma50_nan), ('Returns', returns_nan), ('Volatility', vol_nan)
+        ) if missing)
+        for ma10_nan, ma50_nan, returns_nan, vol_nan in zip(
+            ma10.isna(), ma50.isna(), returns.isna() & (bars > 1), volatility.isna()
+        )
+    ]
+    frame['Imputed'] = imputed
+    return frame
+
+def _end_of_day(date: pd.Timestamp) -> int:
+    return int(pd.Timestamp(date).normalize().tz_localize(timezone.utc).timestamp()) + 86400
+
+def join_sentiment(ticker: str, dates: pd.DatetimeIndex, prior: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Sentiment columns for consecutive bar dates
+
+    Stories published between two bars' ends of day count towards the later
+    bar. The decayed index continues from `prior` (the stored row before the
+    first date) so only the new dates' stories are read.
+    """
+    prev_eod = _end_of_day(prior.name) if prior is not None else None
+    weighted_sum = float(prior['IndexSum']) if prior is not None else 0.0
+    weight = float(prior['IndexWeight']) if prior is not None else 0.0
+
+    stories = sentiment_index.stories_since(ticker, prev_eod)
+    published = np.array([s[0] for s in stories], dtype=np.int64)
+    scores = np.array([s[1] for s in stories], dtype=np.float64)
+    weights = np.array([s[2] for s in stories], dtype=np.float64)
+
+    rows = []
+    start = 0
+    for date in dates:
+        eod = _end_of_day(date)
+        end = int(np.searchsorted(published, eod, side='right'))
+        if prev_eod is not None:
+            factor = sentiment_index.decay(eod - prev_eod)
+            weighted_sum *= factor
+            weight *= factor
+        new_scores, new_weights = scores[start:end], weights[start:end]
+        age_factors = np.power(0.5, (eod - published[start:end]) / (sentiment_index.HALF_LIFE_HOURS * 3600))
+        weighted_sum += float(np.sum(new_weights * new_scores * age_factors))
+        weight += float(np.sum(new_weights * age_factors))
+
+        rows.append({
+            'Sentiment': float(np.average(new_scores, weights=new_weights)) if end > start else 0.0,
+            'SentimentStories': end - start,
+            'SentimentIndex': weighted_sum / weight if weight > 0 else 0.0,
+            'IndexSum': weighted_sum,
+            'IndexWeight': weight,
+        })
+        start, prev_eod = end, eod
+
+    return pd.DataFrame(rows, index=dates, columns=SENTIMENT_FEATURES + _INDEX_STATE)
+
+def _bar_key(hist: pd.DataFrame) -> Tuple:
+    last = hist.iloc[-1]
+    return (hist.index[-1], float(last['Close']), float(last['Volume']), len(hist))
+
+def update_ticker(ticker: str, hist: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Bring a ticker's joined features up to date with its bars and news
+
+    Rows already stored are kept except the trailing RECOMPUTE_ROWS, which
+    are recomputed together with any new bars from a short lookback window
+    of history. A restated history (stored closes no longer match the
+    warehouse) rebuilds the ticker in full.
+
+    Returns:
+        The full stored frame (STORE_COLUMNS, indexed by date)
+    """
+    ticker = ticker.upper()
+    hist = hist if hist is not None else sync_ticker(ticker)
+    if hist.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+    news_version = sentiment_index.index_version(ticker)
+
+    with _ticker_lock(ticker):
+        stored = _load(ticker)
+        keep = stored.iloc[:max(len(stored) - RECOMPUTE_ROWS, 0)]
+        keep = keep[keep.index < hist.index[-1]]
+        if not keep.empty:
+            overlap = hist['Close'].reindex(keep.index).astype(float)
+            if overlap.isna().any() or not np.allclose(overlap, keep['Close'].astype(float)):
+                logger.info(f"Feature store: history of {ticker} changed, rebuilding")
+                keep = keep.iloc[:0]
+
+        first = hist.index.searchsorted(keep.index[-1], side='right') if not keep.empty else 0
+        window = hist.iloc[max(first - LOOKBACK_BARS, 0):]
+        price = compute_price_features(window).iloc[first - max(first - LOOKBACK_BARS, 0):]
+        sentiment = join_sentiment(ticker, price.index, keep.iloc[-1] if not keep.empty else None)
+        fresh = price.join(sentiment)[STORE_COLUMNS]
+
+        frame = pd.concat([keep, fresh]) if not keep.empty else fresh
+        _save(ticker, frame)
+        _frames[ticker] = frame
+        _built_from[ticker] = (_bar_key(hist), news_version)
+
+    logger.info(f"Feature store updated {ticker}: {len(fresh)} rows computed, {len(frame)} stored")
+    return frame
+
+def get_features(ticker: str) -> pd.DataFrame:
+    """Joined features of a ticker, updated only if its bars or news changed since the last build"""
+    ticker = ticker.upper()
+    hist = sync_ticker(ticker)
+    if hist.empty:
+        raise ValueError(f"No data found for ticker {ticker}")
+    frame = _frames.get(ticker)
+    if frame is not None and _built_from.get(ticker) == (_bar_key(hist), sentiment_index.index_version(ticker)):
+        return frame
+    return update_ticker(ticker, hist)
+
+def latest_features(ticker: str) -> Dict:
+    """
+    Inference row of a ticker in one lookup
+
+    Returns:
+        Dict with features (FEATURE_NAMES order), sentiment (SENTIMENT_FEATURES),
+        news_weight (decayed story weight behind the index, 0 without news),
+        imputed feature names and the bar date
+    """
+    frame = get_features(ticker)
+    row = frame.iloc[-1]
+    return {
+        "features": [float(row[name]) for name in FEATURE_NAMES],
+        "sentiment": {name: float(row[name]) for name in SENTIMENT_FEATURES},
+        "news_weight": float(row['IndexWeight']),
+        "imputed": [name for name in str(row['Imputed']).split(';') if name],
+        "bar": str(frame.index[-1].date()),
+    }
+
+def training_frame(ticker: str) -> pd.DataFrame:
+    """
+    Features, news sentiment and Close for every bar a model is trained on
+
+    Tickers with a training file in data/processed read its full history
+    (the rows the shipped models were trained on, without network access),
+    whose price features are defined as in compute_price_features, joined
+    with news like the store. Other tickers read the feature store.
+    """
+    ticker = ticker.upper()
+    path = get_processed_data_path(ticker)
+    if path is None:
+        return get_features(ticker)[FEATURE_NAMES + SENTIMENT_FEATURES + ['Close']].copy()
+
+    price = read_bars_csv(path).dropna(subset=FEATURE_NAMES + ['Close'])
+    if price.empty:
+        raise ValueError(f"No training rows in {path.name}")
+    sentiment = join_sentiment(ticker, price.index)
+    return price[FEATURE_NAMES].join(sentiment[SENTIMENT_FEATURES]).join(price['Close'])
+
+def sentiment_label(row: Dict) -> Optional[str]:
+    """Positive / Neutral / Negative from a latest_features row's news index, None without any news"""
+    if not row["news_weight"]:
+        return None
+    value = row["sentiment"]["SentimentIndex"]
+    if value > SENTIMENT_LABEL_BAND:
+        return "Positive"
+    if value < -SENTIMENT_LABEL_BAND:
+        return "Negative"
+    return "Neutral"
+
+if __name__ == "__main__":
+    # python -m utils.feature_store AAPL MSFT ...   (build or update the joined features)
+    import sys
+
+    for symbol in sys.argv[1:]:
+        start = time.perf_counter()
+        built = update_ticker(symbol)
+        print(f"{symbol.upper()}: {len(built)} rows in {time.perf_counter() - start:.2f}s -> {_ticker_path(symbol)}")
@@ -1,11 +1,10 @@
 import pandas as pd
 import os
-import yfinance as yf
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from typing import Dict, List, Optional, Tuple
-import warnings
+from utils.warehouse import get_history, parse_period
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,8 +42,7 @@ def get_stock_basic_features(ticker: str, period: str = "60d") -> Optional[Dict]
         Dictionary with basic stock features or None if error
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        hist = get_history(ticker, days=parse_period(period))
         
         if hist.empty:
             logger.warning(f"No historical data found for {ticker}")
@@ -80,18 +78,17 @@ def get_stock_basic_features(ticker: str, period: str = "60d") -> Optional[Dict]
         else:
             features['returns'] = 0.0
         
-        # Volatility calculation
-        daily_returns = hist['Close'].pct_change().dropna()
-        if len(daily_returns) >= 20:
-            features['volatility'] = float(daily_returns.rolling(window=20).std().iloc[-1])
+        # Volatility: 10-bar rolling std of Close in price units, as the model uses
+        if len(hist) >= 10:
+            features['volatility'] = float(hist['Close'].rolling(window=10).std().iloc[-1])
         else:
-            features['volatility'] = float(daily_returns.std()) if len(daily_returns) > 0 else 0.02
+            features['volatility'] = float(hist['Close'].std()) if len(hist) > 1 else features['close'] * 0.02
         
         # Handle NaN values
         for key, value in features.items():
             if pd.isna(value):
                 if key == 'volatility':
-                    features[key] = 0.02
+                    features[key] = features['close'] * 0.02
                 elif key in ['ma10', 'ma50']:
                     features[key] = features['close']
                 else:
@@ -208,8 +205,7 @@ def get_comprehensive_features(ticker: str, period: str = "60d") -> Optional[Dic
     """
     try:
         # Get historical data
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        hist = get_history(ticker, days=parse_period(period))
         
         if hist.empty:
             logger.warning(f"No historical data found for {ticker}")
@@ -292,7 +288,7 @@ def get_feature_importance_info() -> Dict:
             "ma10": "10-day moving average",
             "ma50": "50-day moving average",
             "returns": "Daily returns (price change percentage)",
-            "volatility": "Price volatility (20-day rolling standard deviation)",
+            "volatility": "Price volatility (10-day rolling standard deviation of Close, in price units)",
             "rsi": "Relative Strength Index (14-day)",
             "macd": "MACD line",
             "macd_signal": "MACD signal line",
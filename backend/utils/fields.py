@@ -0,0 +1,48 @@
+from typing import Any, Dict, Iterable, Optional
+
+# Selection tree: key -> nested selection ({} selects the whole value)
+Selection = Dict[str, Dict]
+
+def parse_fields(value: Optional[str], allowed: Iterable[str]) -> Optional[Selection]:
+    """
+    Parse a `fields=` parameter like "symbol,trend,sentiment.summary"
+
+    Names are comma-separated, dots select keys of nested objects (applied
+    to every element of a list). Only top-level names are validated.
+
+    Returns:
+        Selection tree, or None when every field is wanted
+    """
+    if value is None or not value.strip():
+        return None
+    allowed = set(allowed)
+    selection: Selection = {}
+    for path in value.split(","):
+        keys = [key.strip() for key in path.split(".")]
+        if not all(keys):
+            continue
+        if keys[0] not in allowed:
+            raise ValueError(f"Unknown field: {keys[0]} (one of {sorted(allowed)})")
+        node = selection
+        for i, key in enumerate(keys):
+            if key in node and not node[key]:
+                break  # already selected whole
+            if i == len(keys) - 1:
+                node[key] = {}
+            else:
+                node = node.setdefault(key, {})
+    return selection
+
+def wants(selection: Optional[Selection], *names: str) -> bool:
+    """Whether any of these top-level fields is selected"""
+    return selection is None or any(name in selection for name in names)
+
+def select_fields(data: Any, selection: Optional[Selection]) -> Any:
+    """Prune a response to the selected fields"""
+    if not selection:
+        return data
+    if isinstance(data, list):
+        return [select_fields(item, selection) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: select_fields(data[key], nested) for key, nested in selection.items() if key in data}
@@ -0,0 +1,230 @@
+import json
+import logging
+import threading
+import warnings
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.paths import get_models_dir, get_processed_data_path
+from utils.model_registry import LEGACY_VERSION, get_version_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = ['Open', 'High', 'Low', 'Volume', 'MA10', 'MA50', 'Returns', 'Volatility']
+
+# Quantile grid stored per ticker: 1%, 2%, ..., 99%
+CALIBRATION_LEVELS = np.round(np.linspace(0.01, 0.99, 99), 2)
+# Same chronological split the training notebook used (test_size=0.2, shuffle=False)
+HOLDOUT_FRACTION = 0.2
+# Trend thresholds shared by /predict and /compare
+TREND_BAND = 0.02
+
+_calibrations: Dict[tuple, Optional[Dict]] = {}
+_calibration_lock = threading.Lock()
+
+def get_calibration_path(ticker: str, version: str = LEGACY_VERSION):
+    if version == LEGACY_VERSION:
+        return get_models_dir() / f"{ticker}_calibration.json"
+    return get_version_dir(ticker, version) / "calibration.json"
+
+def build_calibration(ticker: str, model, scaler, version: str = LEGACY_VERSION) -> Optional[Dict]:
+    """
+    Split-conformal calibration of a ticker model
+
+    Runs the model over the chronological holdout of the processed data and
+    stores the quantiles of the relative residual (actual / predicted - 1).
+    At serving time those quantiles turn one point prediction into a full
+    predictive distribution without any extra model calls.
+
+    Args:
+        ticker: Stock ticker symbol
+        model: Fitted regressor
+        scaler: Fitted scaler matching the model
+        version: Model version the calibration belongs to
+
+    Returns:
+        Calibration dict, or None if no processed data is available
+    """
+    path = get_processed_data_path(ticker)
+    if path is None:
+        logger.warning(f"No processed data for {ticker}, cannot calibrate intervals")
+        return None
+
+    df = pd.read_csv(path)
+    df = df.dropna(subset=FEATURE_NAMES + ["Close"])
+    holdout = df.iloc[int(len(df) * (1 - HOLDOUT_FRACTION)):]
+    if len(holdout) < 20:
+        logger.warning(f"Not enough holdout rows to calibrate {ticker}")
+        return None
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        predicted = model.predict(scaler.transform(holdout[FEATURE_NAMES]))
+
+    actual = holdout["Close"].to_numpy(dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    valid = predicted != 0
+    residuals = actual[valid] / predicted[valid] - 1
+
+    calibration = {
+        "ticker": ticker,
+        "version": version,
+        "method": "split_conformal",
+        "levels": CALIBRATION_LEVELS.tolist(),
+        "quantiles": np.quantile(residuals, CALIBRATION_LEVELS).tolist(),
+        "holdout_rows": int(valid.sum()),
+        "holdout_start": str(holdout["Date"].iloc[0]) if "Date" in holdout else None,
+        "mean_abs_error_pct": float(np.mean(np.abs(residuals)) * 100),
+        "created_at": datetime.now().isoformat(),
+    }
+
+    try:
+        with open(get_calibration_path(ticker, version), "w") as f:
+            json.dump(calibration, f)
+    except OSError as e:
+        logger.warning(f"Could not persist calibration for {ticker}: {e}")
+
+    logger.info(f"Calibrated {ticker} on {calibration['holdout_rows']} holdout rows")
+    return calibration
+
+def load_calibration(ticker: str, model=None, scaler=None, version: str = LEGACY_VERSION) -> Optional[Dict]:
+    """Load a model version's calibration from memory or disk, building it on first use"""
+    key = (ticker, version)
+    if key in _calibrations:
+        return _calibrations[key]
+
+    with _calibration_lock:
+        if key in _calibrations:
+            return _calibrations[key]
+
+        calibration = None
+        path = get_calibration_path(ticker, version)
+        if path.exists():
+            try:
+                with open(path) as f:
+                    calibration = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not read calibration for {ticker}@{version}: {e}")
+
+        if calibration is None and model is not None and scaler is not None:
+            try:
+                calibration = build_calibration(ticker, model, scaler, version)
+            except Exception as e:
+                logger.error(f"Error calibrating {ticker}@{version}: {e}")
+
+        _calibrations[key] = calibration
+        return calibration
+
+def forecast_distribution(predicted: np.ndarray, calibration: Dict) -> np.ndarray:
+    """
+    Turn point predictions into price quantiles
+
+    Args:
+        predicted: Array of point predictions, shape (n,)
+        calibration: Calibration dict from build_calibration
+
+    Returns:
+        Array of shape (n, len(levels)) with the price at each quantile level
+    """
+    residual_quantiles = np.asarray(calibration["quantiles"], dtype=np.float64)
+    return np.asarray(predicted, dtype=np.float64)[:, None] * (1 + residual_quantiles[None, :])
+
+def _quantile_at(levels: np.ndarray, values: np.ndarray, q: float) -> float:
+    return float(np.interp(q, levels, values))
+
+def classify_trend(predicted: float, current_close: float) -> str:
+    if predicted > current_close * (1 + TREND_BAND):
+        return "Bullish"
+    if predicted < current_close * (1 - TREND_BAND):
+        return "Bearish"
+    return "Neutral"
+
+def heuristic_confidence(predicted: float, current_close: float) -> float:
+    """Legacy distance-based confidence, used only when no calibration exists"""
+    if current_close <= 0:
+        return 75
+    prediction_diff = abs(predicted - current_close) / current_close
+    return max(60, min(95, 90 - (prediction_diff * 100)))
+
+def summarize_forecasts(predicted: np.ndarray, current_closes: np.ndarray,
+                        calibrations: list) -> list:
+    """
+    Trend, confidence and P10/P50/P90 interval for a batch of predictions
+
+    Confidence is the calibrated probability of the predicted outcome:
+    P(close above today's) for Bullish, P(close below) for Bearish and
+    P(close within the trend band) for Neutral.
+
+    Args:
+        predicted: Point predictions from one batched model call
+        current_closes: Latest close per row
+        calibrations: Calibration dict (or None) per row
+
+    Returns:
+        List of dicts with trend, confidence, confidence_method and interval
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    current_closes = np.asarray(current_closes, dtype=np.float64)
+    summaries = []
+
+    for i, calibration in enumerate(calibrations):
+        value = float(predicted[i])
+        current_close = float(current_closes[i])
+        trend = classify_trend(value, current_close)
+
+        if calibration is None or current_close <= 0:
+            summaries.append({
+                "trend": trend,
+                "confidence": heuristic_confidence(value, current_close),
+                "confidence_method": "heuristic",
+                "interval": None,
+            })
+            continue
+
+        levels = np.asarray(calibration["levels"], dtype=np.float64)
+        prices = forecast_distribution(predicted[i:i + 1], calibration)[0]
+        moves = prices / current_close - 1
+
+        if trend == "Bullish":
+            probability = np.mean(moves > 0)
+        elif trend == "Bearish":
+            probability = np.mean(moves < 0)
+        else:
+            probability = np.mean(np.abs(moves) <= TREND_BAND)
+
+        summaries.append({
+            "trend": trend,
+            "confidence": float(probability * 100),
+            "confidence_method": calibration.get("method", "split_conformal"),
+            "interval": {
+                "p10": round(_quantile_at(levels, prices, 0.10), 2),
+                "p50": round(_quantile_at(levels, prices, 0.50), 2),
+                "p90": round(_quantile_at(levels, prices, 0.90), 2),
+            },
+        })
+
+    return summaries
+
+def summarize_forecast(predicted: float, current_close: float, calibration: Optional[Dict]) -> Dict:
+    """Single-row convenience wrapper around summarize_forecasts"""
+    return summarize_forecasts(np.array([predicted]), np.array([current_close]), [calibration])[0]
+
+if __name__ == "__main__":
+    # Rebuild calibration files for every ticker: python -m utils.forecast
+    import joblib
+    from utils.constants import TICKER_LIST
+
+    for ticker in TICKER_LIST:
+        models_dir = get_models_dir()
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore")
+            model = joblib.load(models_dir / f"{ticker}_xg.pkl")
+            scaler = joblib.load(models_dir / f"{ticker}_scaler.pkl")
+        calibration = build_calibration(ticker, model, scaler)
+        if calibration:
+            print(f"{ticker}: MAE {calibration['mean_abs_error_pct']:.2f}% on {calibration['holdout_rows']} rows")
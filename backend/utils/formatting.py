@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional
+
+# raw: numeric fields (default); display: the preformatted strings the UI shows
+RESPONSE_FORMATS = ("raw", "display")
+
+NOT_AVAILABLE = "N/A"
+
+def format_price(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else NOT_AVAILABLE
+
+def format_change(amount: Optional[float], percent: Optional[float]) -> str:
+    """e.g. "+1.23 (+0.50%)" """
+    if amount is None or percent is None:
+        return NOT_AVAILABLE
+    return f"{amount:+.2f} ({percent:+.2f}%)"
+
+def format_percent(value: Optional[float], decimals: int = 0) -> str:
+    return f"{value:.{decimals}f}%" if value is not None else NOT_AVAILABLE
+
+def format_volume(value: Optional[float]) -> str:
+    return f"{value:,.0f}" if value is not None else NOT_AVAILABLE
+
+def display_prediction(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """String-formatted view of a /predict response"""
+    display = dict(payload)
+    display["price"] = format_price(payload["price"])
+    display["change"] = format_change(payload["change"], payload["change_percent"])
+    display["volume"] = format_volume(payload["volume"])
+    display["prediction"] = format_price(payload["prediction"])
+    display["confidence"] = format_percent(payload["confidence"])
+    if payload.get("horizons"):
+        display["horizons"] = [
+            {**row, "confidence": format_percent(row["confidence"])} for row in payload["horizons"]
+        ]
+    return display
+
+def display_comparison(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """String-formatted view of one /compare entry"""
+    if not entry.get("success"):
+        return entry
+    display = dict(entry)
+    display["current_price"] = format_price(entry["current_price"])
+    display["current_change"] = format_change(entry["current_change"], entry["current_change_percent"])
+    display["volume"] = format_volume(entry["volume"])
+    display["predicted_price"] = format_price(entry["predicted_price"])
+    display["predicted_change"] = format_change(entry["predicted_change"], entry["predicted_change_percent"])
+    display["confidence"] = format_percent(entry["confidence"])
+    display["volatility"] = f"{entry['volatility']:.4f}"
+    display["recent_return"] = f"{entry['recent_return']:.4f}"
+    return display
@@ -0,0 +1,184 @@
+import os
+import logging
+import threading
+import warnings
+from datetime import datetime
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+
+from utils.paths import get_models_dir, get_data_dir
+from utils.forecast import FEATURE_NAMES, CALIBRATION_LEVELS, HOLDOUT_FRACTION
+from utils.feature_store import training_frame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "auto": use the pooled model for symbols without their own model, "off": never
+GLOBAL_MODEL_MODE = os.getenv("GLOBAL_MODEL", "auto").lower()
+
+NORMALIZED_FEATURE_NAMES = [
+    "HighRel", "LowRel", "MA10Rel", "MA50Rel", "Returns", "VolatilityRel", "LogVolume"
+]
+
+_artifact: Optional[Dict] = None
+_artifact_loaded = False
+_artifact_lock = threading.Lock()
+
+def get_global_model_path():
+    return get_models_dir() / "global_xg.pkl"
+
+def normalize_features(features) -> np.ndarray:
+    """
+    Make raw 8-feature rows comparable across tickers
+
+    Prices are expressed relative to the bar's Open, volatility as a fraction
+    of Open and volume on a log scale, so one model can serve any symbol.
+
+    Args:
+        features: Array-like of shape (n, 8) in FEATURE_NAMES order
+
+    Returns:
+        Array of shape (n, 7) in NORMALIZED_FEATURE_NAMES order
+    """
+    x = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    open_, high, low, volume, ma10, ma50, returns, volatility = x.T
+    safe_open = np.where(open_ != 0, open_, np.nan)
+
+    return np.column_stack([
+        high / safe_open - 1,
+        low / safe_open - 1,
+        ma10 / safe_open - 1,
+        ma50 / safe_open - 1,
+        returns,
+        volatility / safe_open,
+        np.log1p(np.clip(volume, 0, None)),
+    ])
+
+def train_global_model() -> Optional[Dict]:
+    """
+    Train the pooled cross-ticker model on every ticker with a file in data/processed
+
+    Rows come from training_frame (the full processed history, offline).
+    The target is Close / Open - 1 of the same row (the notebook's target,
+    expressed relative to Open). The last 20% of each ticker is held out
+    and its residuals calibrate the prediction intervals.
+
+    Returns:
+        Artifact dict, or None if no ticker has training data
+    """
+    from xgboost import XGBRegressor
+
+    processed_dir = get_data_dir() / "processed"
+    files = sorted(processed_dir.glob("*_processed.csv")) if processed_dir.exists() else []
+    if not files:
+        logger.warning("No processed data found, cannot train global model")
+        return None
+
+    train_x, train_y, test_x, test_y, tickers = [], [], [], [], []
+    for path in files:
+        ticker = path.name[:-len("_processed.csv")]
+        try:
+            df = training_frame(ticker).dropna(subset=FEATURE_NAMES + ["Close"])
+        except Exception as e:
+            logger.warning(f"Skipping {ticker} in global model training: {e}")
+            continue
+        if df.empty:
+            continue
+        x = normalize_features(df[FEATURE_NAMES].to_numpy())
+        y = df["Close"].to_numpy(dtype=np.float64) / df["Open"].to_numpy(dtype=np.float64) - 1
+        split = int(len(df) * (1 - HOLDOUT_FRACTION))
+        train_x.append(x[:split]); train_y.append(y[:split])
+        test_x.append(x[split:]); test_y.append(y[split:])
+        tickers.append(ticker)
+    if not tickers:
+        logger.warning("No training rows found, cannot train global model")
+        return None
+
+    model = XGBRegressor(n_estimators=200, learning_rate=0.05, max_depth=5,
+                         random_state=42, tree_method="hist")
+    model.fit(np.vstack(train_x), np.concatenate(train_y))
+
+    # Calibrate on price ratios so intervals match the per-ticker calibrations
+    x_test, y_test = np.vstack(test_x), np.concatenate(test_y)
+    predicted_price_rel = 1 + model.predict(x_test)
+    residuals = (1 + y_test) / predicted_price_rel - 1
+
+    artifact = {
+        "model": model,
+        "feature_names": NORMALIZED_FEATURE_NAMES,
+        "tickers": tickers,
+        "calibration": {
+            "ticker": "GLOBAL",
+            "method": "split_conformal",
+            "levels": CALIBRATION_LEVELS.tolist(),
+            "quantiles": np.quantile(residuals, CALIBRATION_LEVELS).tolist(),
+            "holdout_rows": int(len(residuals)),
+            "mean_abs_error_pct": float(np.mean(np.abs(residuals)) * 100),
+        },
+        "created_at": datetime.now().isoformat(),
+    }
+
+    try:
+        joblib.dump(artifact, get_global_model_path())
+    except OSError as e:
+        logger.warning(f"Could not persist global model: {e}")
+
+    logger.info(f"Trained global model on {len(tickers)} tickers")
+    return artifact
+
+def load_global_model() -> Optional[Dict]:
+    """Load the pooled model once per process (None if disabled or unavailable)"""
+    global _artifact, _artifact_loaded
+
+    if GLOBAL_MODEL_MODE == "off":
+        return None
+    if _artifact_loaded:
+        return _artifact
+
+    with _artifact_lock:
+        if _artifact_loaded:
+            return _artifact
+
+        path = get_global_model_path()
+        if path.exists():
+            try:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore")
+                    _artifact = joblib.load(path)
+            except Exception as e:
+                logger.warning(f"Could not load global model: {e}")
+
+        if _artifact is None:
+            try:
+                _artifact = train_global_model()
+            except Exception as e:
+                logger.error(f"Error training global model: {e}")
+
+        _artifact_loaded = True
+        return _artifact
+
+def predict_global(artifact: Dict, features) -> np.ndarray:
+    """
+    Predict Close for any number of symbols in one model call
+
+    Args:
+        artifact: Global model artifact
+        features: Raw feature rows, shape (n, 8)
+
+    Returns:
+        Predicted Close per row
+    """
+    x = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    predicted_rel = artifact["model"].predict(normalize_features(x))
+    return x[:, 0] * (1 + np.asarray(predicted_rel, dtype=np.float64))
+
+if __name__ == "__main__":
+    # Retrain the pooled model: python -m utils.global_model
+    artifact = train_global_model()
+    if artifact:
+        calibration = artifact["calibration"]
+        print(f"Global model: {len(artifact['tickers'])} tickers, "
+              f"holdout MAE {calibration['mean_abs_error_pct']:.2f}% on {calibration['holdout_rows']} rows")
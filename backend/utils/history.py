@@ -0,0 +1,205 @@
+import struct
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+HISTORY_ENCODINGS = ("json", "columnar", "binary")
+
+# Binary layout: magic, point count, first day (days since epoch),
+# then uint16 day deltas (n - 1) and float32 closes (n), little-endian.
+BINARY_MAGIC = b"SPH1"
+BINARY_HEADER = struct.Struct("<4sIi")
+BINARY_MEDIA_TYPE = "application/x-stai-price-history"
+
+def history_to_arrays(hist: pd.DataFrame, column: str = "Close") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert a history DataFrame into (epoch days, prices) NumPy arrays
+
+    Args:
+        hist: Historical stock data indexed by date
+        column: Price column to extract
+
+    Returns:
+        Tuple of int64 days since epoch and float64 prices
+    """
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    days = index.normalize().values.astype("datetime64[D]").astype(np.int64)
+    prices = hist[column].to_numpy(dtype=np.float64)
+    return days, prices
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously selected point
+    and the average of the next bucket. A threshold of 2 keeps just the
+    first and last points.
+
+    Returns:
+        Sorted indices of the selected points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+    if threshold == 2:
+        return np.array([0, n - 1], dtype=np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Bucket edges over the interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a])
+        )
+
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min/max bucket downsampling
+
+    Keeps the first and last points, splits the points in between into
+    (threshold - 2) // 2 buckets and keeps the lowest and highest point of
+    each, preserving spikes that averaging would hide.
+
+    Returns:
+        Sorted, de-duplicated indices of the selected points (at most threshold)
+    """
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    n_buckets = (threshold - 2) // 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+    picks = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        picks.append(start + int(np.argmin(bucket)))
+        picks.append(start + int(np.argmax(bucket)))
+
+    picks.extend([0, n - 1])
+    return np.unique(np.asarray(picks, dtype=np.int64))
+
+def downsample(days: np.ndarray, prices: np.ndarray, points: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a price series to roughly the requested number of points"""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    if method == "lttb":
+        idx = lttb_indices(days.astype(np.float64), prices, points)
+    else:
+        idx = minmax_indices(prices, points)
+
+    return days[idx], prices[idx]
+
+def encode_json(days: np.ndarray, prices: np.ndarray) -> list:
+    """Row-oriented encoding, the original [{date, price}] shape"""
+    dates = np.datetime_as_string(days.astype("datetime64[D]"), unit="D").tolist()
+    rounded = np.round(prices, 2).tolist()
+    return [{"date": d, "price": p} for d, p in zip(dates, rounded)]
+
+def encode_columnar(days: np.ndarray, prices: np.ndarray) -> Dict:
+    """Column-oriented encoding with delta-encoded day offsets"""
+    if len(days) == 0:
+        return {"start_date": None, "day_deltas": [], "price": []}
+
+    return {
+        "start_date": str(days[:1].astype("datetime64[D]")[0]),
+        "day_deltas": np.diff(days).tolist(),
+        "price": np.round(prices, 2).tolist(),
+    }
+
+def encode_binary(days: np.ndarray, prices: np.ndarray) -> bytes:
+    """Packed binary encoding: header, uint16 day deltas, float32 prices"""
+    start_day = int(days[0]) if len(days) else 0
+    deltas = np.diff(days)
+    if len(deltas) and deltas.max() > np.iinfo(np.uint16).max:
+        raise ValueError("Gap between bars too large for binary encoding")
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, len(days), start_day)
+    return (
+        header
+        + deltas.astype("<u2").tobytes()
+        + prices.astype("<f4").tobytes()
+    )
+
+def decode_binary(payload: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of encode_binary, mainly for clients and debugging"""
+    magic, n, start_day = BINARY_HEADER.unpack_from(payload)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a price history payload")
+
+    offset = BINARY_HEADER.size
+    deltas = np.frombuffer(payload, dtype="<u2", count=max(n - 1, 0), offset=offset)
+    offset += deltas.nbytes
+    prices = np.frombuffer(payload, dtype="<f4", count=n, offset=offset)
+
+    days = np.empty(n, dtype=np.int64)
+    if n:
+        days[0] = start_day
+        np.cumsum(deltas, out=days[1:])
+        days[1:] += start_day
+    return days, prices.astype(np.float64)
+
+def serialize_history(hist: pd.DataFrame, points: Optional[int] = None,
+                      method: str = "lttb", encoding: str = "json"):
+    """
+    Serialize a history DataFrame for the /price-history endpoint
+
+    Args:
+        hist: Historical stock data indexed by date
+        points: Optional target number of points after downsampling
+        method: Downsampling method ("lttb" or "minmax")
+        encoding: Output encoding ("json", "columnar" or "binary")
+
+    Returns:
+        Tuple of (payload, original point count, returned point count)
+    """
+    if encoding not in HISTORY_ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    days, prices = history_to_arrays(hist)
+    total = len(days)
+
+    if points is not None and points < total:
+        days, prices = downsample(days, prices, points, method)
+
+    if encoding == "binary":
+        payload = encode_binary(days, prices)
+    elif encoding == "columnar":
+        payload = encode_columnar(days, prices)
+    else:
+        payload = encode_json(days, prices)
+
+    return payload, total, len(days)
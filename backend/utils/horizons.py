@@ -0,0 +1,219 @@
+import os
+import logging
+import threading
+import warnings
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.paths import get_models_dir
+from utils.feature_store import training_frame
+from utils.model_registry import LEGACY_VERSION, get_version_dir
+from utils.forecast import FEATURE_NAMES, CALIBRATION_LEVELS, HOLDOUT_FRACTION, summarize_forecasts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Horizons (in trading days) every multi-horizon model is trained for
+DEFAULT_HORIZONS = tuple(
+    int(h) for h in os.getenv("MULTI_HORIZONS", "1,5,20").split(",") if h.strip()
+)
+
+# (ticker, model version) -> artifact, None when that version has none
+_models: Dict[tuple, Optional[Dict]] = {}
+_models_lock = threading.Lock()
+
+def get_horizon_model_path(ticker: str, version: str = LEGACY_VERSION):
+    if version == LEGACY_VERSION:
+        return get_models_dir() / f"{ticker}_horizons.pkl"
+    return get_version_dir(ticker, version) / "horizons.pkl"
+
+def parse_horizons(value: str) -> List[int]:
+    """Parse "1,5,20" into a sorted list of unique positive ints"""
+    try:
+        horizons = sorted({int(h) for h in value.split(",") if h.strip()})
+    except ValueError:
+        raise ValueError(f"Invalid horizons: {value}")
+    if not horizons or horizons[0] < 1:
+        raise ValueError("Horizons must be positive integers")
+    return horizons
+
+def build_targets(close: pd.Series, horizons) -> pd.DataFrame:
+    """
+    Target matrix with one column per horizon
+
+    Horizon 1 is the row's own Close, exactly what the per-ticker models were
+    trained on in the notebook; horizon h is the Close h - 1 bars later.
+    """
+    return pd.DataFrame({f"h{h}": close.shift(-(h - 1)) for h in horizons})
+
+def train_multi_horizon_model(ticker: str, scaler, horizons=DEFAULT_HORIZONS,
+                              version: str = LEGACY_VERSION) -> Optional[Dict]:
+    """
+    Train one multi-output XGBoost model covering all horizons
+
+    Uses the scaler of the ticker's model version and the notebook's hyperparameters and
+    chronological 80/20 split, on the training_frame rows (the full
+    processed history when the ticker has one). The holdout residuals of every horizon are
+    stored alongside the model and the scaler so intervals and inputs come
+    out of the same artifact.
+
+    Args:
+        ticker: Stock ticker symbol
+        scaler: Fitted feature scaler of the model version
+        horizons: Horizons in trading days
+        version: Registry model version the artifact belongs to
+
+    Returns:
+        Artifact dict, or None if the ticker has no data
+    """
+    from xgboost import XGBRegressor
+
+    try:
+        df = training_frame(ticker).dropna(subset=FEATURE_NAMES + ["Close"])
+    except ValueError as e:
+        logger.warning(f"Cannot train multi-horizon model for {ticker}: {e}")
+        return None
+
+    horizons = tuple(sorted(set(horizons)))
+    targets = build_targets(df["Close"], horizons)
+    valid = targets.notna().all(axis=1)
+    x, y = df.loc[valid, FEATURE_NAMES], targets[valid]
+
+    split = int(len(x) * (1 - HOLDOUT_FRACTION))
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        x_train = scaler.transform(x.iloc[:split])
+        x_test = scaler.transform(x.iloc[split:])
+
+    model = XGBRegressor(n_estimators=100, learning_rate=0.1, max_depth=5,
+                         random_state=42, tree_method="hist")
+    model.fit(x_train, y.iloc[:split].to_numpy())
+
+    predicted = np.asarray(model.predict(x_test)).reshape(len(x_test), len(horizons))
+    actual = y.iloc[split:].to_numpy()
+
+    calibrations = {}
+    for i, h in enumerate(horizons):
+        residuals = actual[:, i] / predicted[:, i] - 1
+        calibrations[h] = {
+            "ticker": ticker,
+            "horizon": h,
+            "method": "split_conformal",
+            "levels": CALIBRATION_LEVELS.tolist(),
+            "quantiles": np.quantile(residuals, CALIBRATION_LEVELS).tolist(),
+            "holdout_rows": int(len(residuals)),
+            "mean_abs_error_pct": float(np.mean(np.abs(residuals)) * 100),
+        }
+
+    artifact = {
+        "ticker": ticker,
+        "horizons": list(horizons),
+        "feature_names": FEATURE_NAMES,
+        "model_version": version,
+        "scaler": scaler,
+        "model": model,
+        "calibrations": calibrations,
+        "created_at": datetime.now().isoformat(),
+    }
+
+    try:
+        joblib.dump(artifact, get_horizon_model_path(ticker, version))
+    except OSError as e:
+        logger.warning(f"Could not persist multi-horizon model for {ticker}@{version}: {e}")
+
+    logger.info(f"Trained multi-horizon model for {ticker}@{version}: horizons {list(horizons)}")
+    return artifact
+
+def load_multi_horizon_model(ticker: str, version: str = LEGACY_VERSION) -> Optional[Dict]:
+    """
+    Load the multi-horizon artifact trained for a model version
+
+    Never trains (that is `python -m utils.horizons`): a version without an
+    artifact returns None. Artifacts written before they carried their
+    scaler belong to the legacy version and get its scaler.
+    """
+    key = (ticker, version)
+    if key in _models:
+        return _models[key]
+
+    with _models_lock:
+        if key in _models:
+            return _models[key]
+
+        artifact = None
+        path = get_horizon_model_path(ticker, version)
+        if path.exists():
+            try:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore")
+                    artifact = joblib.load(path)
+                    if "scaler" not in artifact:
+                        artifact["scaler"] = joblib.load(get_models_dir() / f"{ticker}_scaler.pkl")
+            except Exception as e:
+                logger.warning(f"Could not load multi-horizon model for {ticker}@{version}: {e}")
+                artifact = None
+
+        _models[key] = artifact
+        return artifact
+
+def predict_horizons(artifact: Dict, features_df: pd.DataFrame, current_close: float,
+                     horizons: List[int]) -> List[Dict]:
+    """
+    Predict several horizons from one feature row
+
+    The row is scaled with the artifact's own scaler, the one it was trained
+    with. All horizons come out of a single model.predict call; trend,
+    confidence and intervals are then computed for every horizon in one batch.
+
+    Args:
+        artifact: Multi-horizon artifact from load_multi_horizon_model
+        features_df: Raw feature row(s) in FEATURE_NAMES order, shape (1, 8)
+        current_close: Latest close price
+        horizons: Requested horizons, a subset of artifact["horizons"]
+
+    Returns:
+        One dict per requested horizon
+    """
+    trained = artifact["horizons"]
+    missing = [h for h in horizons if h not in trained]
+    if missing:
+        raise ValueError(f"Horizons {missing} not available, supported horizons: {trained}")
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        features_scaled = artifact["scaler"].transform(features_df)
+    row = np.asarray(artifact["model"].predict(features_scaled)).reshape(-1)
+    columns = [trained.index(h) for h in horizons]
+    predicted = row[columns]
+
+    summaries = summarize_forecasts(
+        predicted,
+        np.full(len(horizons), current_close),
+        [artifact["calibrations"].get(h) for h in horizons],
+    )
+
+    return [
+        {
+            "horizon": h,
+            "prediction": round(float(value), 2),
+            **summary,
+        }
+        for h, value, summary in zip(horizons, predicted, summaries)
+    ]
+
+if __name__ == "__main__":
+    # Rebuild the multi-horizon model of every ticker's active version: python -m utils.horizons
+    from utils.constants import TICKER_LIST
+    from utils.model_registry import get_active_model
+
+    for ticker in TICKER_LIST:
+        _, scaler, version = get_active_model(ticker)
+        artifact = train_multi_horizon_model(ticker, scaler, version=version)
+        if artifact:
+            errors = {h: round(c["mean_abs_error_pct"], 2) for h, c in artifact["calibrations"].items()}
+            print(f"{ticker}: holdout MAE % by horizon {errors}")
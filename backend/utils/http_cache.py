@@ -0,0 +1,219 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from utils.market_calendar import calendar_for
+from utils.analysis import ANALYSIS_TTL
+from utils.sentiment import SENTIMENT_CACHE_TTL
+from utils.responses import encode_json
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are sent uncompressed (headers would outweigh the savings)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+# Max-age while a symbol's market is trading (bars and predictions move)
+OPEN_MAX_AGE = int(os.getenv("HTTP_CACHE_OPEN_MAX_AGE", "60"))
+# Upper bound on max-age while a market is closed (otherwise until the next open)
+CLOSED_MAX_AGE = int(os.getenv("HTTP_CACHE_CLOSED_MAX_AGE", "21600"))
+TICKERS_MAX_AGE = 3600
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Top-level JSON keys stamped per request (datetime.now()), left out of the ETag
+VOLATILE_FIELDS = ("timestamp", "comparison_id")
+
+def market_max_age(symbols: List[str]) -> int:
+    """
+    Seconds the data of these symbols stays current
+
+    While any of their markets trades (or has closed but its final bar has not
+    settled yet) that is OPEN_MAX_AGE; once all are settled, until the
+    earliest next open, capped at CLOSED_MAX_AGE.
+    """
+    now = time.time()
+    max_age = CLOSED_MAX_AGE
+    for symbol in symbols:
+        calendar = calendar_for(symbol)
+        if calendar.always_open or not calendar.is_settled(now):
+            return OPEN_MAX_AGE
+        max_age = min(max_age, int(calendar.next_open().timestamp() - now))
+    return max(max_age, OPEN_MAX_AGE)
+
+def _symbol(rest: str, query: Dict) -> List[str]:
+    return [rest.split("/")[0]]
+
+def _query_tickers(rest: str, query: Dict) -> List[str]:
+    return [t for value in query.get("tickers", []) for t in value.split(",") if t.strip()]
+
+# Path prefix -> max-age in seconds from (rest of the path, query), None for no-store.
+# The first matching prefix wins; unlisted GET routes are revalidated on every use (no-cache).
+CACHE_POLICIES: Tuple[Tuple[str, Callable[[str, Dict], Optional[int]]], ...] = (
+    ("/price-history/", lambda rest, query: market_max_age(_symbol(rest, query))),
+    ("/predict/", lambda rest, query: market_max_age(_symbol(rest, query))),
+    # Predictions are memoized for ANALYSIS_TTL, news for SENTIMENT_CACHE_TTL
+    ("/insights/detailed/", lambda rest, query: int(min(market_max_age(_symbol(rest, query)), SENTIMENT_CACHE_TTL))),
+    ("/insights", lambda rest, query: int(ANALYSIS_TTL)),
+    ("/compare/", lambda rest, query: market_max_age(_query_tickers(rest, query)) if rest == "" else None),
+    ("/sentiment/", lambda rest, query: int(SENTIMENT_CACHE_TTL)),
+    ("/tickers", lambda rest, query: TICKERS_MAX_AGE),
+    ("/market/", lambda rest, query: OPEN_MAX_AGE),
+    ("/predictions/", lambda rest, query: OPEN_MAX_AGE),
+    ("/health", lambda rest, query: None),
+    ("/debug", lambda rest, query: None),
+)
+
+def cache_control(path: str, query: Dict) -> str:
+    """Cache-Control of a successful GET response"""
+    if query.get("live", [""])[0].lower() == "true":
+        return "no-store"
+    for prefix, policy in CACHE_POLICIES:
+        if path.startswith(prefix) or path == prefix.rstrip("/"):
+            max_age = policy(path[len(prefix):], query)
+            return "no-store" if max_age is None else f"public, max-age={max_age}, s-maxage={max_age}"
+    return "no-cache"
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """br (when brotli is installed) or gzip if the client accepts it, else None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in (("br",) if brotli is not None else ()) + ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def etag_for(body: bytes, content_type: str) -> str:
+    """
+    Weak ETag of a response body
+
+    Per-request stamps (VOLATILE_FIELDS of a JSON object) are left out, so
+    a response whose data did not change still revalidates with a 304.
+    """
+    digest_input = body
+    if content_type.startswith("application/json") and any(f'"{name}"'.encode() in body for name in VOLATILE_FIELDS):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            digest_input = encode_json({k: v for k, v in data.items() if k not in VOLATILE_FIELDS})
+    return f'W/"{hashlib.md5(digest_input).hexdigest()}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" are the same validator
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+class HttpCacheMiddleware:
+    """
+    Compression and HTTP caching headers for every response
+
+    Successful GETs get a Cache-Control from CACHE_POLICIES (market-aware:
+    data of a closed, settled market is cacheable until its next open) and
+    a weak ETag of the body (without per-request timestamps), answering a
+    matching If-None-Match with 304.
+    JSON and text bodies above COMPRESS_MIN_BYTES are compressed with
+    brotli or gzip per Accept-Encoding, with Vary: Accept-Encoding so
+    shared caches keep one copy per encoding.
+
+    Buffered responses only: a streamed body (more_body on the first chunk,
+    e.g. /bulk NDJSON) is passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        is_get = scope["method"] == "GET"
+        if encoding is None and not is_get:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict] = None
+        chunks: List[bytes] = []
+        streaming = False
+
+        async def buffered_send(message):
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            if not chunks and message.get("more_body", False):
+                streaming = True
+                await send(start)
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._send(scope, request_headers, encoding, start, b"".join(chunks), send)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _send(self, scope, request_headers: Headers, encoding: Optional[str],
+                    start: Dict, body: bytes, send):
+        headers = MutableHeaders(raw=list(start["headers"]))
+        content_type = headers.get("content-type", "")
+        compressible = (
+            len(body) >= self.minimum_size
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and "content-encoding" not in headers
+        )
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        if scope["method"] == "GET" and start["status"] == 200:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            if "cache-control" not in headers:
+                headers["Cache-Control"] = cache_control(scope["path"], query)
+            if "etag" not in headers:
+                headers["ETag"] = etag_for(body, content_type)
+            if_none_match = request_headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match, headers["etag"]):
+                kept = [(k, v) for k, v in headers.raw if k not in (b"content-length", b"content-type")]
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if compressible and encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,284 @@
+import os
+import json
+import logging
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Set
+from zoneinfo import ZoneInfo
+
+from utils.universe import infer_exchange
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional JSON {"IN": ["2026-03-03", ...], "US": [...]} adding holidays the rules below
+# cannot derive (lunar-calendar Indian holidays, one-off closures)
+HOLIDAYS_FILE = os.getenv("MARKET_HOLIDAYS_FILE")
+# Minutes after the close until the provider's daily bar is final
+SETTLE_MINUTES = float(os.getenv("MARKET_SETTLE_MINUTES", "30"))
+
+def easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based, -1 for last) given weekday of a month"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def observed(day: date) -> date:
+    """US rule: Saturday holidays are observed on Friday, Sunday ones on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def us_holidays(year: int) -> Set[date]:
+    """NYSE / Nasdaq full-day closures"""
+    days = {
+        nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),   # Washington's Birthday
+        easter(year) - timedelta(days=2),  # Good Friday
+        nth_weekday(year, 5, 0, -1),  # Memorial Day
+        observed(date(year, 7, 4)),
+        nth_weekday(year, 9, 0, 1),   # Labor Day
+        nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        observed(date(year, 12, 25)),
+    }
+    if year >= 2022:
+        days.add(observed(date(year, 6, 19)))
+    # New Year's Day falling on a Saturday is not observed on the previous Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(observed(new_year))
+    return days
+
+def us_early_closes(year: int) -> Dict[date, dtime]:
+    """NYSE / Nasdaq 13:00 closes: July 3 (Mon-Thu), the day after Thanksgiving, Christmas Eve"""
+    days = {nth_weekday(year, 11, 3, 4) + timedelta(days=1): dtime(13, 0)}
+    if date(year, 7, 3).weekday() <= 3:
+        days[date(year, 7, 3)] = dtime(13, 0)
+    # Christmas Eve on a Friday is the observed Christmas holiday instead
+    if date(year, 12, 24).weekday() <= 3:
+        days[date(year, 12, 24)] = dtime(13, 0)
+    return days
+
+def india_holidays(year: int) -> Set[date]:
+    """NSE / BSE fixed-date closures; lunar-calendar holidays come from MARKET_HOLIDAYS_FILE"""
+    return {
+        date(year, 1, 26),   # Republic Day
+        easter(year) - timedelta(days=2),  # Good Friday
+        date(year, 5, 1),    # Maharashtra Day
+        date(year, 8, 15),   # Independence Day
+        date(year, 10, 2),   # Gandhi Jayanti
+        date(year, 12, 25),
+    }
+
+def uk_holidays(year: int) -> Set[date]:
+    """LSE closures (England and Wales bank holidays)"""
+    def substitute(day: date, taken: Set[date]) -> date:
+        while day.weekday() >= 5 or day in taken:
+            day += timedelta(days=1)
+        return day
+
+    days = {
+        substitute(date(year, 1, 1), set()),
+        easter(year) - timedelta(days=2),
+        easter(year) + timedelta(days=1),
+        nth_weekday(year, 5, 0, 1),
+        nth_weekday(year, 5, 0, -1),
+        nth_weekday(year, 8, 0, -1),
+    }
+    christmas = substitute(date(year, 12, 25), set())
+    days.update({christmas, substitute(date(year, 12, 26), {christmas})})
+    return days
+
+def uk_early_closes(year: int) -> Dict[date, dtime]:
+    """LSE 12:30 closes on Christmas Eve and New Year's Eve"""
+    return {date(year, 12, 24): dtime(12, 30), date(year, 12, 31): dtime(12, 30)}
+
+def germany_holidays(year: int) -> Set[date]:
+    """Xetra closures"""
+    return {
+        date(year, 1, 1),
+        easter(year) - timedelta(days=2),
+        easter(year) + timedelta(days=1),
+        date(year, 5, 1),
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 26),
+        date(year, 12, 31),
+    }
+
+def japan_holidays(year: int) -> Set[date]:
+    """TSE year-end closures; national holidays come from MARKET_HOLIDAYS_FILE"""
+    return {date(year, 1, 1), date(year, 1, 2), date(year, 1, 3), date(year, 12, 31)}
+
+@lru_cache(maxsize=1)
+def _holiday_overrides() -> Dict[str, Set[date]]:
+    if not HOLIDAYS_FILE:
+        return {}
+    try:
+        with open(HOLIDAYS_FILE) as f:
+            return {name: {date.fromisoformat(d) for d in days} for name, days in json.load(f).items()}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable market holidays file {HOLIDAYS_FILE}: {e}")
+        return {}
+
+class ExchangeCalendar:
+    """
+    Trading sessions of one exchange in its own time zone
+
+    Answers whether the market is open, when the last session closed and
+    when the next one opens, so callers can tell when upstream daily bars
+    can actually change instead of refetching on a fixed TTL.
+    """
+
+    def __init__(self, name: str, timezone: str, open_time: dtime, close_time: dtime,
+                 holidays: Callable[[int], Iterable[date]] = lambda year: (),
+                 early_closes: Callable[[int], Dict[date, dtime]] = lambda year: {},
+                 weekend: Iterable[int] = (5, 6), always_open: bool = False):
+        self.name = name
+        self.zone = ZoneInfo(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.weekend = set(weekend)
+        self.always_open = always_open
+        self._holiday_rule = holidays
+        self._holidays: Dict[int, Set[date]] = {}
+        self._early_close_rule = early_closes
+        self._early_closes: Dict[int, Dict[date, dtime]] = {}
+
+    def local(self, now: Optional[datetime] = None) -> datetime:
+        return now.astimezone(self.zone) if now is not None else datetime.now(self.zone)
+
+    def holidays(self, year: int) -> Set[date]:
+        if year not in self._holidays:
+            extra = {d for d in _holiday_overrides().get(self.name, ()) if d.year == year}
+            self._holidays[year] = set(self._holiday_rule(year)) | extra
+        return self._holidays[year]
+
+    def early_closes(self, year: int) -> Dict[date, dtime]:
+        """Shortened sessions of a year -> their close time"""
+        if year not in self._early_closes:
+            self._early_closes[year] = dict(self._early_close_rule(year))
+        return self._early_closes[year]
+
+    def is_trading_day(self, day: date) -> bool:
+        if self.always_open:
+            return True
+        return day.weekday() not in self.weekend and day not in self.holidays(day.year)
+
+    def _session(self, day: date):
+        close_time = self.early_closes(day.year).get(day, self.close_time)
+        return (datetime.combine(day, self.open_time, tzinfo=self.zone),
+                datetime.combine(day, close_time, tzinfo=self.zone))
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        if self.always_open:
+            return True
+        local = self.local(now)
+        opens, closes = self._session(local.date())
+        return self.is_trading_day(local.date()) and opens <= local < closes
+
+    def last_close(self, now: Optional[datetime] = None) -> datetime:
+        """Close of the most recent completed session (now for always-open markets)"""
+        local = self.local(now)
+        if self.always_open:
+            return local
+        day = local.date()
+        while True:
+            closes = self._session(day)[1]
+            if self.is_trading_day(day) and closes <= local:
+                return closes
+            day -= timedelta(days=1)
+
+    def next_open(self, now: Optional[datetime] = None) -> datetime:
+        """Open of the next session (now if the market is open)"""
+        local = self.local(now)
+        if self.is_open(local):
+            return local
+        day = local.date()
+        while True:
+            opens = self._session(day)[0]
+            if self.is_trading_day(day) and opens > local:
+                return opens
+            day += timedelta(days=1)
+
+    def is_settled(self, fetched_at: float, now: Optional[datetime] = None) -> bool:
+        """
+        Whether bars fetched at `fetched_at` (epoch seconds) are still current
+
+        True while the market is closed and the fetch happened after the last
+        close had settled: nothing upstream can have changed since.
+        """
+        if self.is_open(now):
+            return False
+        settled = self.last_close(now) + timedelta(minutes=SETTLE_MINUTES)
+        return fetched_at >= settled.timestamp() and self.local(now) >= settled
+
+    def status(self, now: Optional[datetime] = None) -> Dict:
+        local = self.local(now)
+        is_open = self.is_open(local)
+        # While open, the next session is the one after today's close
+        next_open = self.next_open(self._session(local.date())[1] if is_open and not self.always_open else local)
+        return {
+            "calendar": self.name,
+            "timezone": str(self.zone),
+            "open": is_open,
+            "always_open": self.always_open,
+            "last_close": self.last_close(local).isoformat(),
+            "next_open": next_open.isoformat(),
+            "next_close": None if self.always_open else self._session(
+                local.date() if is_open else next_open.date()
+            )[1].isoformat(),
+            "seconds_until_open": 0 if is_open else int((next_open - local).total_seconds()),
+        }
+
+CALENDARS = {
+    "US": ExchangeCalendar("US", "America/New_York", dtime(9, 30), dtime(16, 0), us_holidays, us_early_closes),
+    "IN": ExchangeCalendar("IN", "Asia/Kolkata", dtime(9, 15), dtime(15, 30), india_holidays),
+    "LSE": ExchangeCalendar("LSE", "Europe/London", dtime(8, 0), dtime(16, 30), uk_holidays, uk_early_closes),
+    "XETRA": ExchangeCalendar("XETRA", "Europe/Berlin", dtime(9, 0), dtime(17, 30), germany_holidays),
+    "TSE": ExchangeCalendar("TSE", "Asia/Tokyo", dtime(9, 0), dtime(15, 30), japan_holidays),
+    "CRYPTO": ExchangeCalendar("CRYPTO", "UTC", dtime(0, 0), dtime(0, 0), always_open=True),
+}
+
+# Listing exchange (utils.universe.infer_exchange) -> calendar
+EXCHANGE_CALENDARS = {
+    "US": "US",
+    "NSE": "IN",
+    "BSE": "IN",
+    "LSE": "LSE",
+    "XETRA": "XETRA",
+    "TSE": "TSE",
+    "CRYPTO": "CRYPTO",
+}
+
+def calendar_for(symbol: str) -> ExchangeCalendar:
+    """Trading calendar of a symbol, from its exchange suffix (US when unknown)"""
+    return CALENDARS[EXCHANGE_CALENDARS.get(infer_exchange(symbol.upper()), "US")]
+
+def is_market_open(symbol: str, now: Optional[datetime] = None) -> bool:
+    return calendar_for(symbol).is_open(now)
+
+def is_settled(symbol: str, fetched_at: float, now: Optional[datetime] = None) -> bool:
+    """Whether a symbol's bars fetched at `fetched_at` cannot have changed since"""
+    return calendar_for(symbol).is_settled(fetched_at, now)
+
+def market_status(symbol: str, now: Optional[datetime] = None) -> Dict:
+    return {"symbol": symbol.upper(), **calendar_for(symbol).status(now)}
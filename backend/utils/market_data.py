@@ -0,0 +1,246 @@
+import os
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from utils.paths import get_data_dir
+from utils.resilience import YAHOO
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Provider used when no suffix route matches ("yahoo" or "local")
+DEFAULT_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo").lower()
+# Suffix routes, e.g. ".NS:local,.BO:local,^:yahoo" ("^" matches index symbols)
+PROVIDER_ROUTES = os.getenv("MARKET_DATA_ROUTES", "")
+
+def normalize_ohlcv(hist: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Keep OHLCV columns on a tz-naive daily DatetimeIndex named Date"""
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+    frame = hist[[c for c in OHLCV_COLUMNS if c in hist.columns]].copy()
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize()
+    frame.index.name = "Date"
+    frame = frame[~frame.index.duplicated(keep="last")].dropna(how="all")
+    return frame.sort_index()
+
+def read_bars_csv(path: Path) -> pd.DataFrame:
+    """
+    Bars from a CSV with a Date column
+
+    Also reads the raw exports of notebooks/data_collection.ipynb, where
+    yfinance wrote a "Price" header followed by Ticker and Date rows.
+    """
+    frame = pd.read_csv(path)
+    first = frame.columns[0]
+    if first != "Date":
+        dates = pd.to_datetime(frame[first], errors="coerce", format="%Y-%m-%d")
+        frame = frame[dates.notna()].rename(columns={first: "Date"})
+    frame = frame.set_index(pd.DatetimeIndex(pd.to_datetime(frame.pop("Date")), name="Date"))
+    return frame.apply(pd.to_numeric, errors="coerce")
+
+class MarketDataProvider:
+    """
+    Source of daily OHLCV bars
+
+    Providers answer bulk requests: one call returns the history of every
+    requested ticker, so a batch of symbols costs one round trip where the
+    upstream supports it.
+    """
+
+    name = "base"
+    # ResilientClient guarding remote providers (None for local ones)
+    client = None
+
+    def history(self, tickers: List[str], start: datetime,
+                end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Daily bars for several tickers
+
+        Args:
+            tickers: Ticker symbols
+            start: Inclusive start date
+            end: Inclusive end date (None for up to today)
+
+        Returns:
+            Normalized OHLCV DataFrame per ticker (empty if unknown)
+        """
+        raise NotImplementedError
+
+    def display_name(self, ticker: str) -> Optional[str]:
+        """Company name for a ticker, if the provider knows it"""
+        return None
+
+    def window_end(self, ticker: str) -> datetime:
+        """Date that "last N days" windows of a ticker are measured back from (now for live providers)"""
+        return datetime.now()
+
+def _make_session():
+    """Shared HTTP session so all Yahoo calls reuse pooled connections"""
+    try:
+        from curl_cffi import requests as curl_requests
+        return curl_requests.Session(impersonate="chrome")
+    except ImportError:
+        return None
+
+class YahooProvider(MarketDataProvider):
+    name = "yahoo"
+    client = YAHOO
+
+    def __init__(self):
+        self.session = _make_session()
+
+    def _download(self, tickers: List[str], start: datetime, end: Optional[datetime]) -> pd.DataFrame:
+        kwargs = {"session": self.session} if self.session is not None else {}
+        return yf.download(
+            tickers,
+            start=start.strftime("%Y-%m-%d"),
+            # yfinance's end is exclusive
+            end=(end + pd.Timedelta(days=1)).strftime("%Y-%m-%d") if end is not None else None,
+            group_by="ticker",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+            **kwargs,
+        )
+
+    def history(self, tickers: List[str], start: datetime,
+                end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        tickers = [t.upper() for t in tickers]
+        data = self.client.call(self._download, tickers, start, end)
+
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                frame = data[ticker] if ticker in data.columns.get_level_values(0) else None
+            else:
+                frame = data if len(tickers) == 1 else None
+            frames[ticker] = normalize_ohlcv(frame)
+        return frames
+
+    def display_name(self, ticker: str) -> Optional[str]:
+        kwargs = {"session": self.session} if self.session is not None else {}
+        return self.client.call(lambda: yf.Ticker(ticker, **kwargs).info).get("longName")
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Bars from files on disk, for offline runs, tests and benchmarks
+
+    Looks for {ticker}.parquet / {ticker}.csv in data/raw, then for the
+    training files in data/processed. Files are parsed once and kept in
+    memory, so repeated requests cost only a slice. The files end where
+    they were exported, so day-count windows end at their last bar.
+    """
+
+    name = "local"
+
+    def __init__(self, roots: Optional[List[Path]] = None):
+        data_dir = get_data_dir()
+        self.roots = roots or [data_dir / "raw", data_dir / "processed"]
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _find(self, ticker: str) -> Optional[Path]:
+        for root in self.roots:
+            for name in (f"{ticker}.parquet", f"{ticker}.csv", f"{ticker}_processed.csv"):
+                path = root / name
+                if path.exists():
+                    return path
+        return None
+
+    def _load(self, ticker: str) -> pd.DataFrame:
+        if ticker in self._frames:
+            return self._frames[ticker]
+
+        path = self._find(ticker)
+        if path is None:
+            frame = normalize_ohlcv(None)
+        elif path.suffix == ".parquet":
+            frame = normalize_ohlcv(pd.read_parquet(path).set_index("Date"))
+        else:
+            frame = normalize_ohlcv(read_bars_csv(path))
+
+        with self._lock:
+            self._frames[ticker] = frame
+        return frame
+
+    def window_end(self, ticker: str) -> datetime:
+        frame = self._load(ticker.upper())
+        return frame.index[-1].to_pydatetime() if not frame.empty else datetime.now()
+
+    def history(self, tickers: List[str], start: datetime,
+                end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        frames = {}
+        for ticker in tickers:
+            frame = self._load(ticker.upper())
+            frame = frame[frame.index >= pd.Timestamp(start).normalize()]
+            if end is not None:
+                frame = frame[frame.index <= pd.Timestamp(end).normalize()]
+            frames[ticker.upper()] = frame.copy()
+        return frames
+
+PROVIDER_TYPES = {
+    "yahoo": YahooProvider,
+    "local": LocalFileProvider,
+}
+
+_providers: Dict[str, MarketDataProvider] = {}
+_providers_lock = threading.Lock()
+
+def get_provider_by_name(name: str) -> MarketDataProvider:
+    """One provider instance (and connection pool) per process"""
+    name = name.lower()
+    if name not in PROVIDER_TYPES:
+        raise ValueError(f"Unknown market data provider: {name}")
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = PROVIDER_TYPES[name]()
+        return _providers[name]
+
+def parse_routes(spec: str) -> List[tuple]:
+    """Parse ".NS:local,^:yahoo" into (pattern, provider) pairs, longest pattern first"""
+    routes = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        pattern, _, provider = item.partition(":")
+        if not provider:
+            raise ValueError(f"Invalid market data route: {item}")
+        routes.append((pattern.strip().upper(), provider.strip().lower()))
+    return sorted(routes, key=lambda route: len(route[0]), reverse=True)
+
+_routes = parse_routes(PROVIDER_ROUTES)
+
+def get_provider(ticker: str) -> MarketDataProvider:
+    """Pick the provider for a ticker by its exchange suffix (or ^ index prefix)"""
+    ticker = ticker.upper()
+    for pattern, provider in _routes:
+        if (pattern.startswith("^") and ticker.startswith(pattern)) or \
+                (not pattern.startswith("^") and ticker.endswith(pattern)):
+            return get_provider_by_name(provider)
+    return get_provider_by_name(DEFAULT_PROVIDER)
+
+def group_by_provider(tickers: List[str]) -> Dict[str, List[str]]:
+    """Split tickers into one bulk request per provider"""
+    groups: Dict[str, List[str]] = {}
+    for ticker in tickers:
+        groups.setdefault(get_provider(ticker).name, []).append(ticker.upper())
+    return groups
+
+def provider_routes() -> Dict:
+    return {
+        "default": DEFAULT_PROVIDER,
+        "routes": [{"match": pattern, "provider": provider} for pattern, provider in _routes],
+    }
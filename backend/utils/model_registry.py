@@ -0,0 +1,297 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+
+from utils.paths import get_models_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The flat models/{ticker}_xg.pkl + {ticker}_scaler.pkl pair
+LEGACY_VERSION = "legacy"
+
+_loaded: Dict[Tuple[str, str], Tuple[object, object]] = {}
+_active: Dict[str, str] = {}
+_shadow: Dict[str, Optional[str]] = {}
+_shadow_stats: Dict[str, Dict] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+# Background work: preloading candidates and shadow scoring
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-registry")
+
+def _ticker_lock(ticker: str) -> threading.Lock:
+    with _locks_guard:
+        if ticker not in _locks:
+            _locks[ticker] = threading.Lock()
+        return _locks[ticker]
+
+def _check_ticker(ticker: str):
+    """Reject names that would resolve outside the ticker's registry directory"""
+    if not ticker or ticker in (".", "..") or "/" in ticker or "\\" in ticker:
+        raise ValueError(f"Invalid ticker: {ticker!r}")
+
+def _require_versions(ticker: str):
+    if not list_versions(ticker):
+        raise FileNotFoundError(f"No model versions found for {ticker}")
+
+def get_registry_dir() -> Path:
+    return get_models_dir() / "registry"
+
+def get_version_dir(ticker: str, version: str) -> Path:
+    return get_registry_dir() / ticker / version
+
+def _pointer_path(ticker: str) -> Path:
+    return get_registry_dir() / ticker / "ACTIVE.json"
+
+def _version_files(ticker: str, version: str) -> Tuple[Path, Path]:
+    if version == LEGACY_VERSION:
+        models_dir = get_models_dir()
+        return models_dir / f"{ticker}_xg.pkl", models_dir / f"{ticker}_scaler.pkl"
+    version_dir = get_version_dir(ticker, version)
+    return version_dir / "model.pkl", version_dir / "scaler.pkl"
+
+def _read_pointer(ticker: str) -> Dict:
+    path = _pointer_path(ticker)
+    if path.exists():
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading model pointer for {ticker}: {e}")
+    return {"active": LEGACY_VERSION, "history": [], "shadow": None}
+
+def _write_pointer(ticker: str, pointer: Dict):
+    """Atomically replace the ACTIVE.json pointer of a ticker that has versions"""
+    _require_versions(ticker)
+    path = _pointer_path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp_path, path)
+
+def list_versions(ticker: str) -> List[str]:
+    """All versions available for a ticker, legacy first"""
+    _check_ticker(ticker)
+    versions = []
+    model_path, scaler_path = _version_files(ticker, LEGACY_VERSION)
+    if model_path.exists() and scaler_path.exists():
+        versions.append(LEGACY_VERSION)
+
+    ticker_dir = get_registry_dir() / ticker
+    if ticker_dir.exists():
+        versions.extend(sorted(p.name for p in ticker_dir.iterdir() if p.is_dir()))
+    return versions
+
+def _load_version(ticker: str, version: str) -> Tuple[object, object]:
+    """Load (model, scaler) for a version, caching it in memory"""
+    key = (ticker, version)
+    if key in _loaded:
+        return _loaded[key]
+
+    model_path, scaler_path = _version_files(ticker, version)
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    if not scaler_path.exists():
+        raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        warnings.filterwarnings("ignore", message=".*InconsistentVersionWarning.*")
+        model = joblib.load(model_path)
+        scaler = joblib.load(scaler_path)
+
+    _loaded[key] = (model, scaler)
+    logger.info(f"✅ Loaded model {ticker}@{version}")
+    return model, scaler
+
+def get_active_version(ticker: str) -> str:
+    if ticker not in _active:
+        _active[ticker] = _read_pointer(ticker)["active"]
+    return _active[ticker]
+
+def get_active_model(ticker: str) -> Tuple[object, object, str]:
+    """
+    Get the active (model, scaler, version) for a ticker
+
+    Models are loaded once and then served from memory; the active version
+    only changes through activate(), which swaps it after preloading.
+    """
+    ticker = ticker.upper()
+    version = get_active_version(ticker)
+    key = (ticker, version)
+    if key not in _loaded:
+        with _ticker_lock(ticker):
+            _load_version(ticker, version)
+    model, scaler = _loaded[key]
+    return model, scaler, version
+
+def register_version(ticker: str, model_path: str, scaler_path: str,
+                     version: Optional[str] = None, calibration_path: Optional[str] = None) -> str:
+    """Copy a trained model/scaler pair into the registry as a new version"""
+    ticker = ticker.upper()
+    version = version or datetime.now().strftime("v%Y%m%d-%H%M%S")
+    if version == LEGACY_VERSION:
+        raise ValueError(f"'{LEGACY_VERSION}' is reserved")
+
+    version_dir = get_version_dir(ticker, version)
+    if version_dir.exists():
+        raise ValueError(f"Version {version} already exists for {ticker}")
+
+    version_dir.mkdir(parents=True)
+    shutil.copy2(model_path, version_dir / "model.pkl")
+    shutil.copy2(scaler_path, version_dir / "scaler.pkl")
+    if calibration_path:
+        shutil.copy2(calibration_path, version_dir / "calibration.json")
+
+    logger.info(f"Registered {ticker}@{version}")
+    return version
+
+def activate(ticker: str, version: str) -> Dict:
+    """
+    Preload a version and atomically make it the active one
+
+    The candidate is loaded before the swap, so requests keep being served
+    by the previous version until the new one is fully in memory.
+    """
+    ticker = ticker.upper()
+    _require_versions(ticker)
+    if version not in list_versions(ticker):
+        raise FileNotFoundError(f"Unknown version {version} for {ticker}")
+
+    # Load outside the swap so in-flight requests are never blocked on disk
+    _load_version(ticker, version)
+
+    with _ticker_lock(ticker):
+        pointer = _read_pointer(ticker)
+        previous = pointer["active"]
+        if previous != version:
+            pointer["history"] = (pointer.get("history", []) + [previous])[-20:]
+        pointer["active"] = version
+        pointer["activated_at"] = datetime.now().isoformat()
+        _write_pointer(ticker, pointer)
+        _active[ticker] = version
+
+    logger.info(f"Activated {ticker}@{version} (previous: {previous})")
+    return {"ticker": ticker, "active": version, "previous": previous}
+
+def activate_in_background(ticker: str, version: str) -> Future:
+    """Preload and activate on the registry worker, returning a Future"""
+    return _executor.submit(activate, ticker, version)
+
+def rollback(ticker: str) -> Dict:
+    """Re-activate the previously active version"""
+    ticker = ticker.upper()
+    _require_versions(ticker)
+    pointer = _read_pointer(ticker)
+    history = pointer.get("history", [])
+    if not history:
+        raise ValueError(f"No previous version to roll back to for {ticker}")
+
+    target = history[-1]
+    _load_version(ticker, target)
+
+    with _ticker_lock(ticker):
+        pointer = _read_pointer(ticker)
+        previous = pointer["active"]
+        pointer["history"] = pointer.get("history", [])[:-1]
+        pointer["active"] = target
+        pointer["activated_at"] = datetime.now().isoformat()
+        _write_pointer(ticker, pointer)
+        _active[ticker] = target
+
+    logger.info(f"Rolled back {ticker} from {previous} to {target}")
+    return {"ticker": ticker, "active": target, "previous": previous}
+
+def set_shadow(ticker: str, version: Optional[str]) -> Dict:
+    """Set (or clear with None) the shadow version scored alongside live traffic"""
+    ticker = ticker.upper()
+    _require_versions(ticker)
+    if version is not None:
+        if version not in list_versions(ticker):
+            raise FileNotFoundError(f"Unknown version {version} for {ticker}")
+        _load_version(ticker, version)
+
+    with _ticker_lock(ticker):
+        pointer = _read_pointer(ticker)
+        pointer["shadow"] = version
+        _write_pointer(ticker, pointer)
+        _shadow[ticker] = version
+        _shadow_stats.pop(ticker, None)
+
+    return {"ticker": ticker, "shadow": version}
+
+def get_shadow_version(ticker: str) -> Optional[str]:
+    if ticker not in _shadow:
+        _shadow[ticker] = _read_pointer(ticker).get("shadow")
+    return _shadow[ticker]
+
+def _score_shadow(ticker: str, version: str, features_df, primary_value: float):
+    try:
+        model, scaler = _load_version(ticker, version)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=UserWarning)
+            shadow_value = float(model.predict(scaler.transform(features_df))[0])
+
+        diff = abs(shadow_value - primary_value) / abs(primary_value) if primary_value else 0.0
+        # Same lock as set_shadow, which resets the stats when the shadow changes
+        with _ticker_lock(ticker):
+            if _shadow.get(ticker) != version:
+                return
+            stats = _shadow_stats.setdefault(ticker, {
+                "version": version, "count": 0, "mean_abs_diff_pct": 0.0, "max_abs_diff_pct": 0.0,
+            })
+            stats["count"] += 1
+            stats["mean_abs_diff_pct"] += (diff * 100 - stats["mean_abs_diff_pct"]) / stats["count"]
+            stats["max_abs_diff_pct"] = max(stats["max_abs_diff_pct"], diff * 100)
+            stats["last_primary"] = primary_value
+            stats["last_shadow"] = shadow_value
+            stats["last_scored_at"] = datetime.now().isoformat()
+    except Exception as e:
+        logger.warning(f"Shadow scoring failed for {ticker}@{version}: {e}")
+
+def shadow_evaluate(ticker: str, features_df, primary_value: float):
+    """Score the shadow version (if any) in the background; never affects the response"""
+    ticker = ticker.upper()
+    version = get_shadow_version(ticker)
+    if version and version != get_active_version(ticker):
+        _executor.submit(_score_shadow, ticker, version, features_df.copy(), float(primary_value))
+
+def registry_status(ticker: str) -> Dict:
+    ticker = ticker.upper()
+    versions = list_versions(ticker)
+    pointer = _read_pointer(ticker)
+    with _ticker_lock(ticker):
+        shadow_stats = dict(_shadow_stats[ticker]) if ticker in _shadow_stats else None
+    return {
+        "ticker": ticker,
+        "active": get_active_version(ticker),
+        "versions": versions,
+        "history": pointer.get("history", []),
+        "activated_at": pointer.get("activated_at"),
+        "shadow": pointer.get("shadow"),
+        "shadow_stats": shadow_stats,
+        "loaded_versions": [v for (t, v) in _loaded if t == ticker],
+    }
+
+if __name__ == "__main__":
+    # Register a new version: python -m utils.model_registry TICKER model.pkl scaler.pkl [version]
+    import sys
+
+    if len(sys.argv) < 4:
+        print("Usage: python -m utils.model_registry TICKER model.pkl scaler.pkl [version]")
+        sys.exit(1)
+
+    version = register_version(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+    print(f"Registered {sys.argv[1].upper()}@{version}; activate it with POST /models/{sys.argv[1].upper()}/activate/{version}")
@@ -0,0 +1,277 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.paths import get_models_dir, get_processed_data_path
+from utils.forecast import FEATURE_NAMES, HOLDOUT_FRACTION
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Decile edges of the training distribution used for PSI
+QUANTILE_EDGES = np.round(np.linspace(0.1, 0.9, 9), 2)
+# Observations needed before a ticker's drift status is reported
+MIN_OBSERVATIONS = int(os.getenv("DRIFT_MIN_OBSERVATIONS", "20"))
+# Conventional PSI thresholds: < 0.1 stable, 0.1-0.25 moderate, > 0.25 drift
+PSI_MODERATE = 0.1
+PSI_DRIFT = 0.25
+# |live mean - training mean| in training standard deviations flagged as skew
+SKEW_THRESHOLD = float(os.getenv("DRIFT_SKEW_THRESHOLD", "3.0"))
+_PSI_EPSILON = 1e-4
+
+_training_stats: Dict[str, Optional[Dict]] = {}
+_monitors: Dict[str, "FeatureMonitor"] = {}
+_lock = threading.Lock()
+
+def get_feature_stats_path(ticker: str):
+    return get_models_dir() / f"{ticker}_feature_stats.json"
+
+def _bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    return np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+
+def build_training_stats(ticker: str) -> Optional[Dict]:
+    """
+    Per-feature distribution of the rows the ticker model was trained on
+
+    Uses the same chronological split as training (the first 80% of the
+    processed data) and stores mean, std, range, decile edges and the
+    fraction of training rows in each decile bin.
+    """
+    path = get_processed_data_path(ticker)
+    if path is None:
+        logger.warning(f"No processed data for {ticker}, cannot build feature stats")
+        return None
+
+    df = pd.read_csv(path).dropna(subset=FEATURE_NAMES)
+    train = df.iloc[:int(len(df) * (1 - HOLDOUT_FRACTION))]
+    if train.empty:
+        return None
+
+    features = {}
+    for name in FEATURE_NAMES:
+        values = train[name].to_numpy(dtype=np.float64)
+        edges = np.quantile(values, QUANTILE_EDGES)
+        counts = _bin_counts(values, edges)
+        features[name] = {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "edges": edges.tolist(),
+            "fractions": (counts / counts.sum()).tolist(),
+        }
+
+    stats = {
+        "ticker": ticker,
+        "rows": int(len(train)),
+        "features": features,
+        "created_at": datetime.now().isoformat(),
+    }
+
+    try:
+        with open(get_feature_stats_path(ticker), "w") as f:
+            json.dump(stats, f)
+    except OSError as e:
+        logger.warning(f"Could not persist feature stats for {ticker}: {e}")
+
+    return stats
+
+def load_training_stats(ticker: str) -> Optional[Dict]:
+    """Load a ticker's training feature stats, building them on first use"""
+    if ticker in _training_stats:
+        return _training_stats[ticker]
+
+    stats = None
+    path = get_feature_stats_path(ticker)
+    if path.exists():
+        try:
+            with open(path) as f:
+                stats = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read feature stats for {ticker}: {e}")
+
+    if stats is None:
+        try:
+            stats = build_training_stats(ticker)
+        except Exception as e:
+            logger.error(f"Error building feature stats for {ticker}: {e}")
+
+    _training_stats[ticker] = stats
+    return stats
+
+def population_stability_index(actual_counts, expected_fractions) -> float:
+    actual = np.asarray(actual_counts, dtype=np.float64)
+    actual = np.clip(actual / max(actual.sum(), 1), _PSI_EPSILON, None)
+    expected = np.clip(np.asarray(expected_fractions, dtype=np.float64), _PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+class FeatureMonitor:
+    """
+    Streaming statistics of the live feature vectors of one ticker
+
+    Memory is constant per feature: a Welford mean/variance accumulator,
+    one counter per training decile bin, and out-of-range and imputation
+    counters. Each bar is counted once, however many requests score it.
+    """
+
+    def __init__(self, ticker: str, training: Optional[Dict]):
+        self.ticker = ticker
+        self.training = training
+        n = len(FEATURE_NAMES)
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.out_of_range = np.zeros(n, dtype=np.int64)
+        self.imputed = np.zeros(n, dtype=np.int64)
+        self.bins = np.zeros((n, len(QUANTILE_EDGES) + 1), dtype=np.int64)
+        self.last_vector: Optional[List[float]] = None
+        self.last_bar: Optional[str] = None
+        self.last_seen: Optional[str] = None
+
+    def update(self, features: List[float], imputed: List[str], bar: Optional[str] = None):
+        if bar is not None and bar == self.last_bar:
+            return
+        x = np.asarray(features, dtype=np.float64)
+        if not np.all(np.isfinite(x)):
+            return
+
+        # Welford's online mean / variance
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+        for i, name in enumerate(FEATURE_NAMES):
+            if name in imputed:
+                self.imputed[i] += 1
+            if self.training:
+                reference = self.training["features"][name]
+                self.bins[i, np.searchsorted(reference["edges"], x[i], side="right")] += 1
+                if x[i] < reference["min"] or x[i] > reference["max"]:
+                    self.out_of_range[i] += 1
+
+        self.last_vector = x.tolist()
+        self.last_bar = bar
+        self.last_seen = datetime.now().isoformat()
+
+    def report(self) -> Dict:
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.zeros(len(FEATURE_NAMES))
+        features = {}
+        drifted, skewed = [], []
+
+        for i, name in enumerate(FEATURE_NAMES):
+            entry = {
+                "live_mean": float(self.mean[i]),
+                "live_std": float(std[i]),
+                "imputed_rate": float(self.imputed[i] / self.count) if self.count else 0.0,
+            }
+            if self.training:
+                reference = self.training["features"][name]
+                train_std = reference["std"] or 1.0
+                shift = (self.mean[i] - reference["mean"]) / train_std
+                psi = population_stability_index(self.bins[i], reference["fractions"])
+                entry.update({
+                    "train_mean": reference["mean"],
+                    "train_std": reference["std"],
+                    "mean_shift_std": float(shift),
+                    "psi": psi,
+                    "out_of_range_rate": float(self.out_of_range[i] / self.count) if self.count else 0.0,
+                })
+                if self.last_vector is not None:
+                    entry["latest_z"] = float((self.last_vector[i] - reference["mean"]) / train_std)
+                if self.count >= MIN_OBSERVATIONS and psi > PSI_DRIFT:
+                    drifted.append(name)
+                if self.count and abs(shift) > SKEW_THRESHOLD:
+                    skewed.append(name)
+            features[name] = entry
+
+        if self.training is None:
+            status = "no_reference"
+        elif self.count < MIN_OBSERVATIONS:
+            status = "insufficient_data"
+        elif drifted:
+            status = "drift"
+        elif any(entry["psi"] > PSI_MODERATE for entry in features.values()):
+            status = "moderate"
+        else:
+            status = "stable"
+
+        return {
+            "ticker": self.ticker,
+            "status": status,
+            "observations": self.count,
+            "drifted_features": drifted,
+            "skewed_features": skewed,
+            "imputed_features": [n for i, n in enumerate(FEATURE_NAMES) if self.imputed[i]],
+            "last_seen": self.last_seen,
+            "last_bar": self.last_bar,
+            "features": features,
+        }
+
+def _get_monitor(ticker: str) -> FeatureMonitor:
+    monitor = _monitors.get(ticker)
+    if monitor is None:
+        training = load_training_stats(ticker)
+        with _lock:
+            monitor = _monitors.setdefault(ticker, FeatureMonitor(ticker, training))
+    return monitor
+
+def record_features(ticker: str, features: List[float], imputed: List[str], bar: Optional[str] = None):
+    """Feed one live feature vector into the ticker's monitor (never raises)"""
+    try:
+        monitor = _get_monitor(ticker.upper())
+        with _lock:
+            monitor.update(features, imputed, bar)
+        if imputed:
+            logger.info(f"Imputed features for {ticker}: {', '.join(imputed)}")
+    except Exception as e:
+        logger.warning(f"Feature monitoring failed for {ticker}: {e}")
+
+def drift_report(ticker: str) -> Optional[Dict]:
+    monitor = _monitors.get(ticker.upper())
+    if monitor is None:
+        return None
+    with _lock:
+        return monitor.report()
+
+def drift_summary() -> List[Dict]:
+    """One line per monitored ticker, most drifted first"""
+    with _lock:
+        reports = [monitor.report() for monitor in _monitors.values()]
+
+    def worst_psi(report):
+        return max((f.get("psi", 0.0) for f in report["features"].values()), default=0.0)
+
+    return sorted(
+        [
+            {
+                "ticker": r["ticker"],
+                "status": r["status"],
+                "observations": r["observations"],
+                "max_psi": worst_psi(r),
+                "drifted_features": r["drifted_features"],
+                "skewed_features": r["skewed_features"],
+                "imputed_features": r["imputed_features"],
+                "last_seen": r["last_seen"],
+            }
+            for r in reports
+        ],
+        key=lambda r: r["max_psi"],
+        reverse=True,
+    )
+
+if __name__ == "__main__":
+    # Rebuild training feature stats for every ticker: python -m utils.monitoring
+    from utils.constants import TICKER_LIST
+
+    for ticker in TICKER_LIST:
+        stats = build_training_stats(ticker)
+        if stats:
+            print(f"{ticker}: feature stats from {stats['rows']} training rows")
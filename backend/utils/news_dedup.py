@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import zlib
+import hashlib
+import unicodedata
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+# MinHash permutations, split into LSH bands of NUM_PERM / LSH_BANDS rows
+NUM_PERM = 64
+LSH_BANDS = 16
+# Estimated Jaccard similarity (of character shingles) above which two articles are one story
+DUPLICATE_THRESHOLD = float(os.getenv("NEWS_DUPLICATE_THRESHOLD", "0.5"))
+# Articles are forgotten after this many hours or beyond this many entries
+DEDUP_WINDOW_HOURS = float(os.getenv("NEWS_DEDUP_WINDOW_HOURS", "48"))
+DEDUP_MAX_ARTICLES = int(os.getenv("NEWS_DEDUP_MAX_ARTICLES", "20000"))
+
+SHINGLE_SIZE = 5
+_MERSENNE_PRIME = (1 << 31) - 1
+_SPACES = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """
+    Case-folded letters, marks and digits of any script, single-spaced
+
+    Marks are kept so scripts like Devanagari keep their vowel signs.
+    """
+    text = unicodedata.normalize("NFKC", str(text or "")).casefold()
+    text = "".join(ch if unicodedata.category(ch)[0] in "LMN" else " " for ch in text)
+    return _SPACES.sub(" ", text).strip()
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hashed character shingles; robust to small rewordings of short headlines"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+def article_text(article: Dict[str, Any]) -> str:
+    """Title plus the start of the description, the part syndicated copies share"""
+    return f"{article.get('title') or ''} {(article.get('description') or '')[:200]}"
+
+def article_key(article: Dict[str, Any]) -> str:
+    return article.get("url") or normalize_text(article.get("title", ""))
+
+def canonical_url(url: str) -> str:
+    """URL without fragment and tracking parameters, with a lowercase scheme and host"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urlencode(query), ""))
+
+def story_id(members: List[Dict[str, Any]]) -> str:
+    """
+    Stable id of a story for persistent storage
+
+    Cluster ids only live as long as the in-memory index (a restart or
+    eviction assigns new ones), so stored stories are keyed on their
+    earliest published copy: its canonical URL, or its title and publish
+    date when it has no URL. Later fetches with more or fewer copies of the
+    story keep the id as long as that copy is among them.
+    """
+    first = min(members, key=lambda m: (str(m.get("publishedAt") or "9999"), str(m.get("url") or "")))
+    if first.get("url"):
+        key = canonical_url(first["url"])
+    else:
+        key = f"{normalize_text(first.get('title', ''))}|{str(first.get('publishedAt') or '')[:10]}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+class NearDuplicateIndex:
+    """
+    MinHash / LSH index clustering near-duplicate articles
+
+    Each article gets a MinHash signature; signatures are split into bands
+    and articles sharing any band bucket are candidates, confirmed by their
+    estimated Jaccard similarity. An article joins the cluster of its most
+    similar candidate, so syndicated copies collapse into one story across
+    search terms and tickers.
+
+    Memory is bounded: articles older than `window_hours` (by insertion) or
+    beyond `max_articles` are evicted from the buckets, and a cluster's cached
+    sentiment is dropped with its last member.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS,
+                 threshold: float = DUPLICATE_THRESHOLD, window_hours: float = DEDUP_WINDOW_HOURS,
+                 max_articles: int = DEDUP_MAX_ARTICLES, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = window_hours * 3600
+        self.max_articles = max_articles
+
+        # key -> (inserted_at, signature, cluster_id), oldest first
+        self._articles: "OrderedDict[str, Tuple[float, np.ndarray, str]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [{} for _ in range(bands)]
+        self._cluster_sizes: Dict[str, int] = {}
+        self._scores: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature; all _MERSENNE_PRIME (never a real minimum) for text without shingles"""
+        hashed = shingles(text) % _MERSENNE_PRIME
+        if hashed.size == 0:
+            return np.full(len(self._a), _MERSENNE_PRIME, dtype=np.uint64)
+        # (a * x + b) mod p for every permutation and shingle, minimum per permutation
+        return ((np.outer(self._a, hashed) + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _evict(self, now: float):
+        while self._articles:
+            key, (inserted_at, signature, cluster_id) = next(iter(self._articles.items()))
+            if now - inserted_at <= self.window and len(self._articles) < self.max_articles:
+                break
+            self._articles.popitem(last=False)
+            for band, band_key in enumerate(self._band_keys(signature)):
+                members = self._buckets[band].get(band_key)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._buckets[band][band_key]
+            self._cluster_sizes[cluster_id] -= 1
+            if not self._cluster_sizes[cluster_id]:
+                del self._cluster_sizes[cluster_id]
+                self._scores.pop(cluster_id, None)
+
+    def assign(self, key: str, text: str) -> str:
+        """
+        Cluster id of an article, adding it to the index if it is new
+
+        Articles without any text to compare are never clustered: each is
+        its own story.
+        """
+        signature = self.signature(text)
+        comparable = bool(np.any(signature != _MERSENNE_PRIME))
+        band_keys = self._band_keys(signature) if comparable else []
+        now = time.time()
+
+        with self._lock:
+            self._evict(now)
+            known = self._articles.get(key)
+            if known is not None:
+                return known[2]
+
+            candidates = set()
+            for band, band_key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(band_key, ()))
+
+            cluster_id, best = key, self.threshold
+            for candidate in candidates:
+                _, candidate_signature, candidate_cluster = self._articles[candidate]
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity >= best:
+                    cluster_id, best = candidate_cluster, similarity
+
+            self._articles[key] = (now, signature, cluster_id)
+            for band, band_key in enumerate(band_keys):
+                self._buckets[band].setdefault(band_key, set()).add(key)
+            self._cluster_sizes[cluster_id] = self._cluster_sizes.get(cluster_id, 0) + 1
+            return cluster_id
+
+    def get_score(self, cluster_id: str) -> Optional[Any]:
+        with self._lock:
+            return self._scores.get(cluster_id)
+
+    def set_score(self, cluster_id: str, score: Any):
+        with self._lock:
+            if cluster_id in self._cluster_sizes:
+                self._scores[cluster_id] = score
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "articles": len(self._articles),
+                "clusters": len(self._cluster_sizes),
+                "scored_clusters": len(self._scores),
+            }
+
+# Shared by every ticker so a story syndicated across searches is one cluster
+news_index = NearDuplicateIndex()
+
+def cluster_articles(articles: List[Dict[str, Any]],
+                     index: Optional[NearDuplicateIndex] = None) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Group articles into stories
+
+    Returns:
+        (cluster id, member articles) per story, in order of first appearance
+    """
+    index = index or news_index
+    clusters: Dict[str, List[Dict[str, Any]]] = {}
+    for article in articles:
+        cluster_id = index.assign(article_key(article), article_text(article))
+        clusters.setdefault(cluster_id, []).append(article)
+    return list(clusters.items())
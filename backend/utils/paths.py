@@ -0,0 +1,46 @@
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# backend/utils/paths.py -> backend
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+def _first_existing(candidates, default: Path) -> Path:
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return default
+
+def get_data_dir() -> Path:
+    """
+    Get the data directory - handles both local and Railway deployment
+
+    Locally the data lives next to backend/ (project_root/data); in the
+    Railway image only backend/ is copied, so backend/data is used.
+    STAI_DATA_DIR overrides both.
+    """
+    override = os.getenv("STAI_DATA_DIR")
+    if override:
+        return Path(override)
+
+    return _first_existing(
+        [BACKEND_ROOT / "data", BACKEND_ROOT.parent / "data"],
+        BACKEND_ROOT / "data",
+    )
+
+def get_models_dir() -> Path:
+    """Get the directory holding the per-ticker .pkl models"""
+    return _first_existing(
+        [BACKEND_ROOT / "models", BACKEND_ROOT.parent / "models"],
+        BACKEND_ROOT / "models",
+    )
+
+def get_processed_data_path(ticker: str) -> Optional[Path]:
+    """Get the processed training CSV for a ticker, or None if missing"""
+    path = get_data_dir() / "processed" / f"{ticker}_processed.csv"
+    return path if path.exists() else None
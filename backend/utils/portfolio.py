@@ -0,0 +1,154 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+
+from utils.warehouse import get_history, sync_tickers
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+# Tickers with fewer aligned daily returns than this are left out
+MIN_OBSERVATIONS = 30
+
+def aligned_returns(tickers: List[str], days: int = 365) -> Tuple[np.ndarray, List[str], List[str]]:
+    """
+    Daily close-to-close returns of several tickers on shared dates
+
+    Closes are aligned on the union of trading dates and forward-filled
+    across exchange holidays (at most 3 bars), then only dates where every
+    kept ticker has a return are retained, so row i is the same day for all.
+
+    Returns:
+        Tuple of (returns matrix shape (days, n), kept tickers, dropped tickers)
+    """
+    sync_tickers(tickers)
+
+    closes, dropped = {}, []
+    for ticker in tickers:
+        try:
+            # Measured back from the last bar the ticker's provider can have
+            hist = get_history(ticker, days=days)
+        except Exception as e:
+            logger.warning(f"No history for {ticker}: {e}")
+            hist = None
+        if hist is None or len(hist) <= MIN_OBSERVATIONS:
+            dropped.append(ticker)
+            continue
+        closes[ticker] = hist["Close"].astype(float)
+
+    if not closes:
+        return np.empty((0, 0)), [], dropped
+
+    frame = pd.DataFrame(closes).sort_index().ffill(limit=3)
+    returns = frame.pct_change(fill_method=None).iloc[1:].dropna()
+    if len(returns) < MIN_OBSERVATIONS:
+        return np.empty((0, 0)), [], dropped + list(closes)
+
+    return returns.to_numpy(dtype=np.float64), list(returns.columns), dropped
+
+def normalize_weights(weights: Optional[List[float]], n: int) -> np.ndarray:
+    """Equal weights by default; given weights are scaled to sum to 1 (shorts allowed)"""
+    if weights is None:
+        return np.full(n, 1.0 / n)
+    w = np.asarray(weights, dtype=np.float64)
+    if w.shape != (n,):
+        raise ValueError(f"Expected {n} weights, got {len(weights)}")
+    total = w.sum()
+    if not np.isfinite(total) or abs(total) < 1e-12:
+        raise ValueError("Weights must not sum to zero")
+    return w / total
+
+def value_at_risk(portfolio_returns: np.ndarray, confidence: float) -> Tuple[float, float]:
+    """Historical one-day VaR and CVaR (expected shortfall) as positive loss fractions"""
+    threshold = np.quantile(portfolio_returns, 1 - confidence)
+    tail = portfolio_returns[portfolio_returns <= threshold]
+    return float(-threshold), float(-tail.mean()) if len(tail) else float(-threshold)
+
+def correlation_clusters(corr: np.ndarray, tickers: List[str], threshold: float) -> List[List[str]]:
+    """
+    Group tickers whose returns move together
+
+    Average-linkage clustering on the correlation distance sqrt((1 - rho) / 2);
+    clusters are cut where the average correlation drops below `threshold`.
+    """
+    if len(tickers) < 2:
+        return [list(tickers)]
+    distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+    np.fill_diagonal(distance, 0)
+    labels = fcluster(
+        linkage(squareform(distance, checks=False), method="average"),
+        t=np.sqrt((1 - threshold) / 2),
+        criterion="distance",
+    )
+    clusters: Dict[int, List[str]] = {}
+    for ticker, label in zip(tickers, labels):
+        clusters.setdefault(int(label), []).append(ticker)
+    return sorted(clusters.values(), key=len, reverse=True)
+
+def portfolio_risk(returns: np.ndarray, tickers: List[str], weights: np.ndarray,
+                   expected_returns: Optional[np.ndarray] = None, confidence: float = 0.95,
+                   cluster_threshold: float = 0.5, include_correlation: bool = False) -> Dict:
+    """
+    Risk and return of a weighted portfolio from one aligned returns matrix
+
+    Everything is derived from the same (days, n) matrix with a handful of
+    vectorized operations: one covariance, one matrix-vector product for
+    the portfolio series and one for the risk contributions.
+
+    Args:
+        returns: Aligned daily returns, shape (days, n)
+        tickers: Column tickers
+        weights: Normalized weights, shape (n,)
+        expected_returns: Expected next-bar return per ticker (defaults to
+            the historical mean daily return)
+        confidence: VaR / CVaR confidence level
+        cluster_threshold: Minimum average correlation within a cluster
+        include_correlation: Also return the full correlation matrix
+
+    Returns:
+        Dict of portfolio metrics
+    """
+    cov = np.cov(returns, rowvar=False).reshape(len(tickers), len(tickers))
+    std = np.sqrt(np.diag(cov))
+    corr = cov / np.outer(std, std).clip(min=1e-18)
+
+    if expected_returns is None:
+        expected_returns = returns.mean(axis=0)
+
+    portfolio_series = returns @ weights
+    marginal = cov @ weights
+    variance = float(weights @ marginal)
+    daily_vol = np.sqrt(max(variance, 0.0))
+    contributions = weights * marginal / variance if variance > 0 else np.zeros_like(weights)
+    var, cvar = value_at_risk(portfolio_series, confidence)
+
+    result = {
+        "observations": int(returns.shape[0]),
+        "expected_return": float(weights @ expected_returns),
+        "daily_volatility": float(daily_vol),
+        "annualized_volatility": float(daily_vol * np.sqrt(TRADING_DAYS)),
+        "var": var,
+        "cvar": cvar,
+        "confidence": confidence,
+        "diversification_ratio": float(np.abs(weights) @ std / daily_vol) if daily_vol > 0 else None,
+        "positions": [
+            {
+                "ticker": ticker,
+                "weight": float(w),
+                "expected_return": float(mu),
+                "annualized_volatility": float(s * np.sqrt(TRADING_DAYS)),
+                "risk_contribution": float(rc),
+            }
+            for ticker, w, mu, s, rc in zip(tickers, weights, expected_returns, std, contributions)
+        ],
+        "clusters": correlation_clusters(corr, tickers, cluster_threshold),
+    }
+    if include_correlation:
+        result["correlation"] = np.round(corr, 4).tolist()
+    return result
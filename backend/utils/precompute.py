@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.paths import get_data_dir
+from utils.market_calendar import CALENDARS, calendar_for
+from utils.warehouse import sync_tickers
+from utils.responses import encode_json
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set PRECOMPUTE=off to always predict live
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE", "on").lower() != "off"
+# Minutes after the close before the final bar is fetched and predictions are computed
+PRECOMPUTE_DELAY_MINUTES = float(os.getenv("PRECOMPUTE_DELAY_MINUTES", "30"))
+# Seconds between scheduler checks
+PRECOMPUTE_CHECK_INTERVAL = float(os.getenv("PRECOMPUTE_CHECK_INTERVAL", "60"))
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", "4"))
+# Symbols per batched /compare computation
+PRECOMPUTE_BATCH = 100
+
+PAYLOAD_KINDS = ("predict", "compare")
+
+# Markets with sessions (24/7 markets have no close to precompute after)
+PRECOMPUTE_MARKETS = [name for name, calendar in CALENDARS.items() if not calendar.always_open]
+
+def market_for(symbol: str) -> Optional[str]:
+    """Calendar a symbol trades on (None for markets that never close)"""
+    calendar = calendar_for(symbol)
+    return None if calendar.always_open else calendar.name
+
+def is_open(market: str, now: Optional[datetime] = None) -> bool:
+    return CALENDARS[market].is_open(now)
+
+def last_close(market: str, now: Optional[datetime] = None) -> datetime:
+    """Close of the most recent completed session"""
+    return CALENDARS[market].last_close(now)
+
+class PrecomputeStore:
+    """
+    Predictions computed after a market's close, per market and session
+
+    Each market is one JSON file ({session, computed_at, predict, compare}),
+    so every worker and restart serves the same results. A payload is only
+    served while its market is closed and it belongs to the last completed
+    session; otherwise callers compute live.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = directory
+        self._markets: Dict[str, Dict] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, market: str) -> Path:
+        directory = self.directory or Path(os.getenv("PRECOMPUTE_DIR") or get_data_dir() / "precomputed")
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{market}.json"
+
+    def _state(self, market: str) -> Optional[Dict]:
+        """In-memory state, reloaded when another worker rewrote the file"""
+        path = self._path(market)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return self._markets.get(market)
+        with self._lock:
+            if self._mtimes.get(market) != mtime:
+                try:
+                    with open(path) as f:
+                        self._markets[market] = json.load(f)
+                    self._mtimes[market] = mtime
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable precomputed predictions {path}: {e}")
+            return self._markets.get(market)
+
+    def session(self, market: str) -> Optional[str]:
+        state = self._state(market)
+        return state["session"] if state else None
+
+    def save(self, market: str, session: str, payloads: Dict[str, Dict[str, Dict]]):
+        state = {"session": session, "computed_at": datetime.now().isoformat(timespec="seconds"), **payloads}
+        path = self._path(market)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(encode_json(state))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._markets[market] = state
+            self._mtimes[market] = path.stat().st_mtime
+
+    def get(self, kind: str, symbol: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        symbol = symbol.upper()
+        market = market_for(symbol)
+        if market is None or is_open(market, now):
+            return None
+        state = self._state(market)
+        if not state or state["session"] != last_close(market, now).date().isoformat():
+            return None
+        payload = state.get(kind, {}).get(symbol)
+        return {**payload, "precomputed_at": state["computed_at"]} if payload else None
+
+    def status(self) -> Dict:
+        status = {}
+        for market in PRECOMPUTE_MARKETS:
+            state = self._state(market)
+            status[market] = {
+                "open": is_open(market),
+                "last_close": last_close(market).isoformat(),
+                "session": state["session"] if state else None,
+                "computed_at": state["computed_at"] if state else None,
+                "predictions": len(state.get("predict", {})) if state else 0,
+            }
+        return status
+
+precomputed = PrecomputeStore()
+
+def get_precomputed(kind: str, symbol: str) -> Optional[Dict]:
+    """Stored payload ("predict" or "compare") for a symbol, or None to compute live"""
+    if not PRECOMPUTE_ENABLED:
+        return None
+    return precomputed.get(kind, symbol)
+
+class PrecomputeScheduler:
+    """
+    Background thread computing every modelled symbol's next-session prediction after its market closes
+
+    Markets follow their own calendars (utils/market_calendar.py), so
+    weekends and exchange holidays are skipped. PRECOMPUTE_DELAY_MINUTES
+    after a session's close the market's symbols are re-synced in bulk and
+    predicted once (batched), then served until the next session opens.
+    """
+
+    def __init__(self, symbols: Callable[[], List[str]], predict: Callable[[str], Dict],
+                 compare: Callable[[List[str]], List[Dict]], store: PrecomputeStore = precomputed):
+        self._symbols = symbols
+        self._predict = predict
+        self._compare = compare
+        self.store = store
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def due_markets(self, now: Optional[datetime] = None) -> List[str]:
+        due = []
+        for market in PRECOMPUTE_MARKETS:
+            close = last_close(market, now)
+            ready = CALENDARS[market].local(now) >= close + timedelta(minutes=PRECOMPUTE_DELAY_MINUTES)
+            if not is_open(market, now) and ready and self.store.session(market) != close.date().isoformat():
+                due.append(market)
+        return due
+
+    def run_market(self, market: str) -> int:
+        """Compute and store every prediction of one market, returning how many succeeded"""
+        session = last_close(market).date().isoformat()
+        symbols = [s for s in self._symbols() if market_for(s) == market]
+        started = time.perf_counter()
+        logger.info(f"Precomputing {len(symbols)} {market} predictions for the {session} session")
+
+        # Final bars first, one bulk request per provider
+        sync_tickers(symbols, force=True)
+
+        compare: Dict[str, Dict] = {}
+        for i in range(0, len(symbols), PRECOMPUTE_BATCH):
+            for entry in self._compare(symbols[i:i + PRECOMPUTE_BATCH]):
+                if entry.get("success"):
+                    compare[entry["symbol"]] = entry
+
+        def predict_one(symbol: str):
+            try:
+                return symbol, self._predict(symbol)
+            except Exception as e:
+                logger.debug(f"Precompute skipped {symbol}: {e}")
+                return symbol, None
+
+        with ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="precompute") as pool:
+            predict = {symbol: payload for symbol, payload in pool.map(predict_one, symbols) if payload}
+
+        self.store.save(market, session, {"predict": predict, "compare": compare})
+        logger.info(
+            f"Precomputed {len(predict)} {market} predictions in {time.perf_counter() - started:.1f}s"
+        )
+        return len(predict)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            for market in self.due_markets():
+                try:
+                    self.run_market(market)
+                except Exception as e:
+                    logger.error(f"Precompute for {market} failed: {e}")
+            self._stop.wait(PRECOMPUTE_CHECK_INTERVAL)
+
+    def start(self):
+        if not PRECOMPUTE_ENABLED or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="precompute")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
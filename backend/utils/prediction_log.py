@@ -0,0 +1,263 @@
+import os
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from utils.paths import get_data_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set PREDICTION_LOG=off to disable logging entirely
+PREDICTION_LOG_ENABLED = os.getenv("PREDICTION_LOG", "on").lower() != "off"
+# Rows written per transaction and the longest a row waits in memory
+BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH", "200"))
+FLUSH_INTERVAL = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL", "1.0"))
+# Rows buffered before new ones are dropped (logging must never block requests)
+QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE", "10000"))
+
+COLUMNS = [
+    "logged_at", "ticker", "source", "model", "model_version", "bar_date",
+    "current_close", "previous_close", "predicted_close", "p10", "p50", "p90",
+    "trend", "confidence", "features",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    logged_at TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    source TEXT NOT NULL,
+    model TEXT,
+    model_version TEXT,
+    bar_date TEXT,
+    current_close REAL,
+    previous_close REAL,
+    predicted_close REAL NOT NULL,
+    p10 REAL,
+    p50 REAL,
+    p90 REAL,
+    trend TEXT,
+    confidence REAL,
+    features TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ticker_time ON predictions (ticker, logged_at);
+CREATE INDEX IF NOT EXISTS idx_predictions_ticker_bar ON predictions (ticker, bar_date);
+"""
+# Columns added after the first release, created on logs written before them
+MIGRATIONS = (("previous_close", "REAL"),)
+# One distinct prediction: repeated requests for the same bar log the same forecast again
+PREDICTION_KEY = ["ticker", "bar_date", "model_version", "source"]
+
+_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+_dropped = 0
+
+def get_prediction_log_path() -> Path:
+    override = os.getenv("PREDICTION_LOG_DB")
+    return Path(override) if override else get_data_dir() / "prediction_log.sqlite3"
+
+def _connect() -> sqlite3.Connection:
+    path = get_prediction_log_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    # WAL lets the query endpoint read while the writer appends
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    for column, sql_type in MIGRATIONS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE predictions ADD COLUMN {column} {sql_type}")
+    return conn
+
+def _write_batch(conn: sqlite3.Connection, rows: List[tuple]):
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows
+        )
+
+def _writer_loop():
+    conn = _connect()
+    while True:
+        rows = [_queue.get()]
+        # Gather whatever else arrives within the flush interval, up to a batch
+        try:
+            while len(rows) < BATCH_SIZE:
+                rows.append(_queue.get(timeout=FLUSH_INTERVAL))
+        except queue.Empty:
+            pass
+
+        try:
+            _write_batch(conn, rows)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} prediction log rows: {e}")
+        finally:
+            for _ in rows:
+                _queue.task_done()
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, daemon=True, name="prediction-log")
+            _writer.start()
+
+def log_prediction(ticker: str, source: str, predicted_close: float,
+                   current_close: Optional[float] = None, previous_close: Optional[float] = None,
+                   model: Optional[str] = None,
+                   model_version: Optional[str] = None, bar_date: Optional[str] = None,
+                   interval: Optional[Dict] = None, trend: Optional[str] = None,
+                   confidence: Optional[float] = None, features: Optional[list] = None):
+    """
+    Queue one prediction for the background writer (never blocks, never raises)
+
+    `previous_close` is the close of the bar before the target bar, the
+    baseline its direction is scored against.
+    """
+    global _dropped
+    if not PREDICTION_LOG_ENABLED:
+        return
+
+    interval = interval or {}
+    row = (
+        datetime.now().isoformat(timespec="seconds"),
+        ticker.upper(),
+        source,
+        model,
+        model_version,
+        bar_date,
+        float(current_close) if current_close is not None else None,
+        float(previous_close) if previous_close is not None else None,
+        float(predicted_close),
+        interval.get("p10"),
+        interval.get("p50"),
+        interval.get("p90"),
+        trend,
+        float(confidence) if confidence is not None else None,
+        json.dumps([float(f) for f in features]) if features is not None else None,
+    )
+
+    try:
+        _ensure_writer()
+        _queue.put_nowait(row)
+    except queue.Full:
+        _dropped += 1
+        if _dropped % 1000 == 1:
+            logger.warning(f"Prediction log queue full, {_dropped} rows dropped so far")
+    except Exception as e:
+        logger.warning(f"Could not queue prediction log row for {ticker}: {e}")
+
+def flush(timeout: float = 5.0):
+    """Wait until queued rows are written (used on shutdown)"""
+    if _writer is None:
+        return
+    done = threading.Event()
+
+    def wait_for_queue():
+        _queue.join()
+        done.set()
+
+    threading.Thread(target=wait_for_queue, daemon=True).start()
+    if not done.wait(timeout):
+        logger.warning(f"Prediction log flush timed out with {_queue.qsize()} rows pending")
+
+def query_predictions(ticker: str, limit: int = 100, since: Optional[str] = None,
+                      source: Optional[str] = None) -> pd.DataFrame:
+    """Most recent logged predictions of a ticker, newest first"""
+    if not get_prediction_log_path().exists():
+        return pd.DataFrame(columns=["id"] + COLUMNS)
+
+    sql = f"SELECT id, {', '.join(COLUMNS)} FROM predictions WHERE ticker = ?"
+    params: list = [ticker.upper()]
+    if since:
+        sql += " AND logged_at >= ?"
+        params.append(since)
+    if source:
+        sql += " AND source = ?"
+        params.append(source)
+    sql += " ORDER BY logged_at DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    conn = _connect()
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def join_realized(predictions: pd.DataFrame, closes: pd.Series) -> pd.DataFrame:
+    """
+    Attach the realized close of each prediction's target bar
+
+    The models predict the close of the bar their features come from, so a
+    prediction is realized once that bar's final close is known; rows whose
+    bar has not closed yet (or is unknown) keep NaN.
+
+    Direction is scored against the previous bar's close: `current_close` is
+    the target bar itself once it has closed. Rows logged without
+    `previous_close` take it from `closes` when it covers the bar before.
+    """
+    frame = predictions.copy()
+    for column in ("current_close", "previous_close", "predicted_close", "p10", "p50", "p90", "confidence"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    realized = pd.Series(
+        closes.to_numpy(dtype=float),
+        index=pd.DatetimeIndex(closes.index).strftime("%Y-%m-%d") if len(closes) else [],
+        dtype=float,
+    )
+    frame["realized_close"] = frame["bar_date"].map(realized)
+    baseline = frame["previous_close"].fillna(frame["bar_date"].map(realized.shift(1)))
+
+    # A bar logged intraday is only final once a later bar exists
+    last_bar = realized.index[-1] if len(realized) else None
+    frame.loc[frame["bar_date"] == last_bar, "realized_close"] = float("nan")
+
+    frame["error_pct"] = (frame["predicted_close"] / frame["realized_close"] - 1) * 100
+    predicted_up = frame["predicted_close"] > baseline
+    realized_up = frame["realized_close"] > baseline
+    frame["direction_hit"] = (predicted_up == realized_up).where(frame["realized_close"].notna() & baseline.notna())
+    frame["in_interval"] = (
+        (frame["realized_close"] >= frame["p10"]) & (frame["realized_close"] <= frame["p90"])
+    ).where(frame["realized_close"].notna() & frame["p10"].notna())
+    return frame
+
+def distinct_predictions(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per PREDICTION_KEY, the most recently logged (frame is newest first)
+
+    Rows without a bar (manual predictions) are all kept.
+    """
+    keyed = frame["bar_date"].notna()
+    return pd.concat([frame[keyed].drop_duplicates(subset=PREDICTION_KEY), frame[~keyed]])
+
+def accuracy_summary(frame: pd.DataFrame) -> Dict:
+    """
+    Accuracy over distinct predictions, so a bar requested many times
+    weighs as much as one requested once
+    """
+    distinct = distinct_predictions(frame)
+    realized = distinct[distinct["realized_close"].notna()]
+    if realized.empty:
+        return {"logged": int(len(frame)), "predictions": int(len(distinct)), "realized": 0}
+    interval_rows = realized["in_interval"].dropna()
+    direction_rows = realized["direction_hit"].dropna()
+    return {
+        "logged": int(len(frame)),
+        "predictions": int(len(distinct)),
+        "realized": int(len(realized)),
+        "mean_abs_error_pct": float(realized["error_pct"].abs().mean()),
+        "direction_hit_rate": float(direction_rows.astype(float).mean()) if len(direction_rows) else None,
+        "p10_p90_coverage": float(interval_rows.astype(float).mean()) if len(interval_rows) else None,
+    }
@@ -0,0 +1,81 @@
+import heapq
+import itertools
+from typing import Any, Callable, Dict, List, Optional
+
+RANK_KEYS = ("confidence", "change", "sentiment_adjusted")
+
+# Weight of a +1 / -1 sentiment score on the sentiment-adjusted rank
+SENTIMENT_WEIGHT = 0.25
+
+_LABEL_SCORES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+class TopK:
+    """
+    Keep the k highest-scoring items seen so far
+
+    A min-heap of size k: pushing is O(log k) and memory stays O(k) no
+    matter how many items are streamed through it.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[tuple] = []
+        # Tie-breaker so items themselves are never compared
+        self._counter = itertools.count()
+
+    def push(self, score: float, item: Any):
+        if self.k <= 0:
+            return
+        entry = (score, -next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Any]:
+        """Items from highest to lowest score (earlier items win ties)"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+def predicted_change_pct(prediction_data: Dict[str, Any]) -> float:
+    """Predicted move from the current price in percent (0 if unknown)"""
+    price = prediction_data.get("price")
+    predicted = prediction_data.get("prediction")
+    if not price or predicted is None:
+        return 0.0
+    return (predicted - price) / price * 100
+
+def sentiment_value(prediction_data: Dict[str, Any], news_score: Optional[float] = None) -> float:
+    """News sentiment score in [-1, 1] when known, else the prediction's momentum label"""
+    if news_score is not None:
+        return news_score
+    return _LABEL_SCORES.get(str(prediction_data.get("sentimentScore", "")).lower(), 0.0)
+
+def make_scorer(rank_by: str, news_score: Callable[[str], Optional[float]] = lambda t: None):
+    """
+    Build score(stock_info, bearish) for a ranking key
+
+    Scores are oriented so that higher is always "ranks first": for bearish
+    lists the predicted change is negated (biggest drop first) and the
+    sentiment adjustment rewards negative news.
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {list(RANK_KEYS)}")
+
+    def score(stock_info: Dict[str, Any], bearish: bool = False) -> float:
+        prediction_data = stock_info["prediction_data"]
+        if rank_by == "confidence":
+            return float(stock_info["confidence"])
+        if rank_by == "change":
+            change = predicted_change_pct(prediction_data)
+            return -change if bearish else change
+        sentiment = sentiment_value(prediction_data, news_score(stock_info["ticker"]))
+        direction = -1 if bearish else 1
+        return float(stock_info["confidence"]) * (1 + SENTIMENT_WEIGHT * direction * sentiment)
+
+    return score
+
+def page(top: TopK, offset: int, limit: int) -> List[Any]:
+    return top.items()[offset:offset + limit]
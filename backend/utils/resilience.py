@@ -0,0 +1,285 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upstream calls run here so a hung provider can be abandoned at its deadline
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("UPSTREAM_WORKERS", "16")), thread_name_prefix="upstream"
+)
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider's circuit is open or every attempt failed"""
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail immediately for `recovery_timeout` seconds. Then a single
+    trial call is let through; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of first attempts
+
+    Every first attempt deposits `ratio` tokens and every retry withdraws
+    one, so an outage can add at most `ratio` extra load instead of
+    multiplying it by the number of retries.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class ResilientClient:
+    """
+    Failure policy for one upstream provider
+
+    Every call gets a hard deadline, optional hedging (a second identical
+    request if the first is slow), jittered retries drawn from a shared
+    budget and a circuit breaker that fails fast while the provider is down.
+    """
+
+    def __init__(self, name: str, timeout: float = 10.0, retries: int = 2,
+                 hedge_after: Optional[float] = None, failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0, retry_ratio: float = 0.2):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.budget = RetryBudget(retry_ratio)
+        self.stats = {"calls": 0, "failures": 0, "retries": 0, "hedges": 0, "rejected": 0}
+        self.last_error: Optional[str] = None
+
+    @property
+    def degraded(self) -> bool:
+        return self.breaker.state != "closed"
+
+    def _attempt(self, fn: Callable, args, kwargs):
+        futures = [_executor.submit(fn, *args, **kwargs)]
+        deadline = time.monotonic() + self.timeout
+
+        if self.hedge_after and self.hedge_after < self.timeout:
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done:
+                self.stats["hedges"] += 1
+                futures.append(_executor.submit(fn, *args, **kwargs))
+
+        # First successful response wins; errors only count once all copies fail
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+        if error is None:
+            raise TimeoutError(f"{self.name} did not respond within {self.timeout:.1f}s")
+        raise error
+
+    def call(self, fn: Callable, *args, retry_on: Optional[Callable[[Any], bool]] = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) under the provider's policy
+
+        Args:
+            fn: The upstream call
+            retry_on: Optional predicate on the result that marks it as a
+                retryable failure (e.g. an HTTP 5xx response); the last
+                result is returned if retries run out
+
+        Raises:
+            ProviderUnavailable: Circuit open or all attempts failed
+        """
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise ProviderUnavailable(f"{self.name} circuit is open")
+
+        self.stats["calls"] += 1
+        self.budget.deposit()
+        result = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                if not self.budget.withdraw():
+                    break
+                self.stats["retries"] += 1
+                time.sleep(backoff_delay(attempt - 1))
+
+            try:
+                result = self._attempt(fn, args, kwargs)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"{self.name} call failed (attempt {attempt + 1}): {e}")
+                continue
+
+            if retry_on is not None and retry_on(result):
+                self.last_error = f"Retryable result: {result}"
+                continue
+
+            self.breaker.record_success()
+            return result
+
+        self.stats["failures"] += 1
+        self.breaker.record_failure()
+        if result is not None:
+            return result
+        raise ProviderUnavailable(f"{self.name} failed: {self.last_error}")
+
+    def status(self) -> Dict:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+class StaleWhileRevalidateCache:
+    """
+    Cache that keeps serving expired values while refreshing them
+
+    Fresh entries (younger than `ttl`) are returned as is. Stale entries
+    (younger than `ttl + stale_ttl`) are returned immediately while one
+    background refresh runs. If a load fails, any cached value is served
+    instead of the error.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]):
+        value = loader()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]):
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    _executor.submit(self._refresh, key, loader)
+                return value
+
+        try:
+            return self._load(key, loader)
+        except Exception:
+            if entry is not None:
+                logger.warning(f"Serving expired cache entry for {key}")
+                return entry[1]
+            raise
+
+def _env_float(name: str, default: str) -> Optional[float]:
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+YAHOO = ResilientClient(
+    "yahoo",
+    timeout=float(os.getenv("YAHOO_TIMEOUT", "8")),
+    hedge_after=_env_float("YAHOO_HEDGE_AFTER", "2"),
+)
+NEWS_API = ResilientClient(
+    "newsapi",
+    timeout=float(os.getenv("NEWSAPI_TIMEOUT", "10")),
+    retries=1,
+)
+
+def provider_status() -> Dict:
+    return {
+        "providers": {client.name: client.status() for client in (YAHOO, NEWS_API)},
+        "timestamp": datetime.now().isoformat(),
+    }
@@ -0,0 +1,50 @@
+import json
+import math
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+def _finite(value: Any) -> Any:
+    """NaN and infinities as None, like orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+def encode_json(content: Any) -> bytes:
+    """
+    Compact JSON bytes, via orjson when it is installed
+
+    Either way NaN and infinities are written as null (valid JSON).
+    """
+    if orjson is None:
+        return json.dumps(
+            _finite(jsonable_encoder(content)), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    return orjson.dumps(
+        content,
+        default=jsonable_encoder,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when it is installed
+
+    Used for the routes that return plain dicts (typed routes are already
+    serialized by Pydantic). orjson also handles numpy scalars and arrays
+    and anything else it does not know goes through FastAPI's encoder.
+    With or without orjson NaN is written as null instead of failing.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -2,75 +2,30 @@ import requests
 import random
 import os
 from dotenv import load_dotenv
-import joblib
+from utils.constants import TICKER_MAPPING
+from utils.resilience import NEWS_API, ProviderUnavailable, StaleWhileRevalidateCache
+from utils.sentiment_engine import get_engine
+from utils.news_dedup import news_index, cluster_articles, story_id
+from utils import sentiment_index
 
 load_dotenv()
 
 NEWS_API_KEY = os.getenv('NEWS_API_KEY')
 
-# Get the current script directory (utils folder)
-script_dir = os.path.dirname(os.path.abspath(__file__))
-# Get the project root (parent of utils)
-project_root = os.path.dirname(script_dir)
+# Headlines change slowly; serve cached sentiment and refresh it in the background
+SENTIMENT_CACHE_TTL = float(os.getenv('SENTIMENT_CACHE_TTL', '900'))
+_sentiment_cache = StaleWhileRevalidateCache(
+    ttl=SENTIMENT_CACHE_TTL,
+    stale_ttl=float(os.getenv('SENTIMENT_STALE_TTL', '21600')),
+)
 
-# Load sentiment models with correct paths - models are inside utils/models
-sentiment_model_path = os.path.join(script_dir, "model", "logistic_model.pkl")
-vectorizer_path = os.path.join(script_dir, "model", "tfidf_vectorizer.pkl")
-
-print(f"Looking for sentiment model at: {sentiment_model_path}")
-print(f"Looking for vectorizer at: {vectorizer_path}")
-
-try:
-    sentiment_model = joblib.load(sentiment_model_path)
-    vectorizer = joblib.load(vectorizer_path)
-    print("Sentiment models loaded successfully!")
-except FileNotFoundError as e:
-    print(f"Warning: Could not load sentiment models - {e}")
-    print("Please ensure the model files are in the utils/models/ directory")
-    sentiment_model = None
-    vectorizer = None
-
-# Stock ticker to company/index name mapping
-TICKER_MAPPING = {
-    # Indian Stocks
-    "RELIANCE.NS": "Reliance Industries",
-    "TCS.NS": "Tata Consultancy Services",
-    "HDFCBANK.NS": "HDFC Bank",
-    "INFY.NS": "Infosys",
-    "HINDUNILVR.NS": "Hindustan Unilever",
-    "ICICIBANK.NS": "ICICI Bank",
-    "BHARTIARTL.NS": "Bharti Airtel",
-    "ITC.NS": "ITC Limited",
-    "SBIN.NS": "State Bank of India",
-    "LT.NS": "Larsen & Toubro",
-    "HCLTECH.NS": "HCL Technologies",
-    "ASIANPAINT.NS": "Asian Paints",
-    "MARUTI.NS": "Maruti Suzuki",
-    "BAJFINANCE.NS": "Bajaj Finance",
-    "TITAN.NS": "Titan Company",
-    "WIPRO.NS": "Wipro",
-    "TECHM.NS": "Tech Mahindra",
-    "ULTRACEMCO.NS": "UltraTech Cement",
-    "NESTLEIND.NS": "Nestle India",
-    "POWERGRID.NS": "Power Grid Corporation",
-    
-    # Market Indices (with ^ prefix)
-    "^GSPC": "S&P 500",
-    "^DJI": "Dow Jones",
-    "^IXIC": "NASDAQ",
-    "^RUT": "Russell 2000",
-    "^VIX": "VIX volatility",
-    "^TNX": "10-Year Treasury",
-    "^NSEI": "NIFTY 50",
-    "^BSESN": "BSE SENSEX",
-    "^FTSE": "FTSE 100",
-    "^GDAXI": "DAX",
-    "^N225": "Nikkei 225",
-    
-    # Crypto
-    "BTC-USD": "Bitcoin",
-    "ETH-USD": "Ethereum",
-}
+# Headline classifier selected by SENTIMENT_ENGINE (see utils/sentiment_engine.py)
+sentiment_engine = get_engine()
+if sentiment_engine is None:
+    print("Warning: Could not load sentiment models")
+    print("Please ensure the model files are in the utils/model/ directory")
+else:
+    print(f"Sentiment engine loaded: {sentiment_engine.name}")
 
 def get_search_terms(ticker: str):
     """Generate search terms for better news retrieval"""
@@ -115,6 +70,10 @@ def get_search_terms(ticker: str):
             clean_ticker
         ]
 
+def news_get(url: str):
+    """GET a NewsAPI url with the provider's breaker, retry budget and deadline (5xx is retried)"""
+    return NEWS_API.call(requests.get, url, timeout=10, retry_on=lambda r: r.status_code >= 500)
+
 def fetch_news(ticker: str, page_size=10):
     """Fetch news with improved search strategy"""
     if not NEWS_API_KEY:
@@ -130,7 +89,7 @@ def fetch_news(ticker: str, page_size=10):
         )
         
         try:
-            r = requests.get(url, timeout=10)
+            r = news_get(url)
             if r.status_code == 200:
                 articles = r.json().get("articles", [])
                 if articles:
@@ -141,7 +100,7 @@ def fetch_news(ticker: str, page_size=10):
                 break
             else:
                 print(f"API request failed with status code: {r.status_code}")
-        except requests.RequestException as e:
+        except (requests.RequestException, ProviderUnavailable) as e:
             print(f"Request failed for term '{term}': {e}")
             continue
     
@@ -170,16 +129,16 @@ def fetch_news_alternative_sources(ticker: str, page_size=5):
     for term in search_terms:
         # Try with Indian sources first
         url = (
-            f"https://newsapi.org/v2/everything?q={term}&sources={indian_sources}&sortBy=publishedAt&pageSize={page_size}&apiKey={NEWS_API_KEY}"
+            f"https://newsapi.org/v2/everything?q={term}&sources={indian_sources}&sortBy=publishedAt&pageSize={page_size}&language=en&apiKey={NEWS_API_KEY}"
         )
         
         try:
-            r = requests.get(url, timeout=10)
+            r = news_get(url)
             if r.status_code == 200:
                 articles = r.json().get("articles", [])
                 if articles:
                     break
-        except requests.RequestException as e:
+        except (requests.RequestException, ProviderUnavailable) as e:
             print(f"Request failed for Indian sources: {e}")
             continue
         
@@ -189,40 +148,79 @@ def fetch_news_alternative_sources(ticker: str, page_size=5):
                 f"https://newsapi.org/v2/everything?q={term}&sortBy=publishedAt&pageSize={page_size}&language=en&apiKey={NEWS_API_KEY}"
             )
             try:
-                r = requests.get(url, timeout=10)
+                r = news_get(url)
                 if r.status_code == 200:
                     articles = r.json().get("articles", [])
                     if articles:
                         break
-            except requests.RequestException as e:
+            except (requests.RequestException, ProviderUnavailable) as e:
                 print(f"Request failed for general search: {e}")
                 continue
     
     return articles
 
-def analyze_sentiment(texts):
-    """Analyze sentiment of text list"""
+def score_sentiment(texts):
+    """Label, P(positive) and signed score for each text (neutral when the engine is unavailable)"""
     if not texts:
         return []
-        
-    if sentiment_model is None or vectorizer is None:
+    
+    neutral = {"label": "neutral", "probability": 0.5, "score": 0.0}
+    if sentiment_engine is None:
         print("Warning: Sentiment models not loaded, returning neutral sentiment")
-        return ["neutral"] * len(texts)
+        return [dict(neutral) for _ in texts]
     
     try:
-        # Clean and prepare texts
-        clean_texts = [str(text).strip() for text in texts if text]
-        if not clean_texts:
-            return []
-            
-        x = vectorizer.transform(clean_texts)
-        preds = sentiment_model.predict(x)
-        return ["negative" if p == 0 else "positive" for p in preds]
+        return sentiment_engine.classify([str(text).strip() for text in texts])
     except Exception as e:
         print(f"Error in sentiment analysis: {e}")
-        return ["neutral"] * len(texts)
+        return [dict(neutral) for _ in texts]
+
+def analyze_sentiment(texts):
+    """Analyze sentiment of text list"""
+    return [result["label"] for result in score_sentiment(texts)]
 
 def get_sentiment_for_ticker(ticker: str):
+    """Get sentiment analysis for a ticker, served from cache while NewsAPI is slow or down"""
+    try:
+        return _sentiment_cache.get(
+            ticker.upper(),
+            lambda: sentiment_from_index(ticker) or compute_sentiment_for_ticker(ticker)
+        )
+    except ProviderUnavailable as e:
+        print(f"News provider unavailable for {ticker}: {e}")
+        return {
+            "ticker": ticker.upper(),
+            "summary": {
+                "positive": 0,
+                "neutral": 0,
+                "negative": 0
+            },
+            "articles": [],
+            "message": "News provider temporarily unavailable"
+        }
+
+def sentiment_from_index(ticker: str):
+    """Sentiment stored by any worker within the cache TTL, without calling NewsAPI"""
+    index = sentiment_index.current_index(ticker)
+    if index is None or index["age_seconds"] > SENTIMENT_CACHE_TTL:
+        return None
+    
+    articles = sentiment_index.recent_stories(ticker)
+    sentiments = [article["sentiment"] for article in articles]
+    return {
+        "ticker": ticker.upper(),
+        "summary": {
+            "positive": sentiments.count('positive'),
+            "neutral": sentiments.count('neutral'),
+            "negative": sentiments.count('negative')
+        },
+        "engine": sentiment_engine.name if sentiment_engine is not None else None,
+        "article_count": len(articles),
+        "articles": articles,
+        "sentiment_index": index
+    }
+
+def compute_sentiment_for_ticker(ticker: str):
     """Get sentiment analysis for a ticker with improved Indian stock support"""
     print(f"Fetching sentiment for ticker: {ticker}")
     
@@ -234,8 +232,10 @@ def get_sentiment_for_ticker(ticker: str):
         print("No articles found with primary method, trying alternative sources...")
         articles = fetch_news_alternative_sources(ticker)
     
-    # If still no articles, return empty result
+    # If still no articles, return empty result (unless NewsAPI is down, then keep the cached one)
     if not articles:
+        if NEWS_API.degraded:
+            raise ProviderUnavailable("NewsAPI is degraded, no articles fetched")
         return {
             "ticker": ticker.upper(),
             "summary": {
@@ -247,9 +247,9 @@ def get_sentiment_for_ticker(ticker: str):
             "message": "No recent news articles found for this ticker"
         }
     
-    headlines = [a.get('title', '') for a in articles if a.get('title')]
+    titled_articles = [a for a in articles if a.get('title')]
     
-    if not headlines:
+    if not titled_articles:
         return {
             "ticker": ticker.upper(),
             "summary": {
@@ -261,8 +261,19 @@ def get_sentiment_for_ticker(ticker: str):
             "message": "No valid headlines found"
         }
     
-    print(f"Analyzing sentiment for {len(headlines)} headlines...")
-    sentiments = analyze_sentiment(headlines)
+    # Near-duplicate copies of a story form one cluster: scored once, counted once
+    stories = cluster_articles(titled_articles)
+    unscored = [(cluster_id, members) for cluster_id, members in stories if news_index.get_score(cluster_id) is None]
+    
+    print(f"Analyzing sentiment for {len(unscored)} new stories ({len(titled_articles)} articles, {len(stories)} stories)...")
+    for (cluster_id, members), result in zip(unscored, score_sentiment([members[0]["title"] for _, members in unscored])):
+        news_index.set_score(cluster_id, result)
+    
+    story_scores = [
+        news_index.get_score(cluster_id) or score_sentiment([members[0]["title"]])[0]
+        for cluster_id, members in stories
+    ]
+    sentiments = [result["label"] for result in story_scores]
     
     summary = {
         "positive": sentiments.count('positive'),
@@ -272,20 +283,41 @@ def get_sentiment_for_ticker(ticker: str):
     
     print(f"Sentiment summary: {summary}")
     
+    # Fold new stories into the ticker's time-decayed index (already stored ones are skipped)
+    index = sentiment_index.ingest(ticker, [
+        {
+            "story_id": story_id(members),
+            "publishedAt": members[0].get("publishedAt"),
+            "score": result["score"],
+            "label": result["label"],
+            "probability": result["probability"],
+            "title": members[0].get("title", ""),
+            "url": members[0].get("url", ""),
+            "sources": sorted({(m.get("source") or {}).get("name", "Unknown") for m in members})
+        }
+        for (_, members), result in zip(stories, story_scores)
+    ])
+    
     return {
         "ticker": ticker.upper(),
         "summary": summary,
+        "engine": sentiment_engine.name if sentiment_engine is not None else None,
+        "article_count": len(titled_articles),
         "articles": [
             {
-                "title": a.get("title", ""),
-                "url": a.get("url", ""),
-                "source": a.get("source", {}).get("name", "Unknown"),
-                "sentiment": s,
-                "publishedAt": a.get("publishedAt", "")
+                "title": members[0].get("title", ""),
+                "url": members[0].get("url", ""),
+                "source": (members[0].get("source") or {}).get("name", "Unknown"),
+                "sentiment": result["label"],
+                "probability": result["probability"],
+                "score": result["score"],
+                "publishedAt": members[0].get("publishedAt", ""),
+                "duplicates": len(members) - 1,
+                "sources": sorted({(m.get("source") or {}).get("name", "Unknown") for m in members})
             }
-            for a, s in zip(articles, sentiments)
-            if a.get("title")
-        ]
+            for (_, members), result in zip(stories, story_scores)
+        ],
+        "sentiment_index": index
     }
 
 def add_ticker_mapping(ticker: str, name: str):
@@ -299,7 +331,7 @@ def test_sentiment_setup():
     print("Testing sentiment analysis setup...")
     
     # Check if models are loaded
-    if sentiment_model is None or vectorizer is None:
+    if sentiment_engine is None:
         print("❌ Sentiment models not loaded")
         return False
     
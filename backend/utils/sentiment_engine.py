@@ -0,0 +1,270 @@
+import os
+import json
+import logging
+import threading
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = Path(__file__).resolve().parent / "model"
+
+# "tfidf" (the trained vectorizer + logistic model) or "hashed" (same model, no vocabulary)
+DEFAULT_ENGINE = os.getenv("SENTIMENT_ENGINE", "tfidf").lower()
+# Headlines whose P(positive) is within this distance of 0.5 are labelled neutral
+NEUTRAL_BAND = float(os.getenv("SENTIMENT_NEUTRAL_BAND", "0.05"))
+# Batches at least this large are classified across worker processes (hashed engine only)
+PARALLEL_MIN_TEXTS = int(os.getenv("SENTIMENT_PARALLEL_MIN", "5000"))
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "1"))
+
+HASHED_FEATURES = 2 ** 24
+
+def label_for(probability: float, neutral_band: float = NEUTRAL_BAND) -> str:
+    if probability >= 0.5 + neutral_band:
+        return "positive"
+    if probability <= 0.5 - neutral_band:
+        return "negative"
+    return "neutral"
+
+class SentimentEngine:
+    """
+    Headline classifier returning P(positive)
+
+    Engines produce raw logits; an optional Platt calibration (a * logit + b,
+    fitted on labelled headlines with `python -m utils.sentiment_engine
+    calibrate`) maps them to probabilities. Labels come from a neutral band
+    around 0.5 instead of a hard threshold.
+    """
+
+    name = "base"
+    # Whether chunks can be scored in separate processes without shared state
+    stateless = False
+
+    def __init__(self):
+        self.calibration = load_calibration(self.name)
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        texts = [str(text or "") for text in texts]
+        if not texts:
+            return np.empty(0)
+        if self.stateless and SENTIMENT_WORKERS > 1 and len(texts) >= PARALLEL_MIN_TEXTS:
+            chunks = np.array_split(np.asarray(texts, dtype=object), SENTIMENT_WORKERS)
+            parts = joblib.Parallel(n_jobs=SENTIMENT_WORKERS)(
+                joblib.delayed(self.logits)(list(chunk)) for chunk in chunks
+            )
+            logits = np.concatenate(parts)
+        else:
+            logits = self.logits(texts)
+        calibrated = self.calibration["a"] * logits + self.calibration["b"]
+        return 1 / (1 + np.exp(-calibrated))
+
+    def classify(self, texts: List[str], neutral_band: float = NEUTRAL_BAND) -> List[Dict]:
+        """Label, P(positive) and signed score in [-1, 1] per text"""
+        return [
+            {
+                "label": label_for(p, neutral_band),
+                "probability": round(float(p), 4),
+                "score": round(float(2 * p - 1), 4),
+            }
+            for p in self.predict_proba(texts)
+        ]
+
+class TfidfSentimentEngine(SentimentEngine):
+    """The trained TF-IDF vectorizer and logistic regression (utils/model/*.pkl)"""
+
+    name = "tfidf"
+
+    def __init__(self, model, vectorizer):
+        self.model = model
+        self.vectorizer = vectorizer
+        super().__init__()
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        return self.model.decision_function(self.vectorizer.transform(texts))
+
+def _idf_weights(vectorizer) -> np.ndarray:
+    try:
+        return np.asarray(vectorizer.idf_)
+    except AttributeError:
+        # Vectorizers pickled by older scikit-learn keep the IDF as a diagonal matrix
+        return np.asarray(vectorizer._tfidf._idf_diag.diagonal())
+
+class HashedSentimentEngine(SentimentEngine):
+    """
+    The logistic model on hashed token counts, without a vocabulary
+
+    Every vocabulary term's IDF and coefficient is moved to its hash bucket,
+    so TF-IDF weighting, L2 normalization and the linear score are the same
+    as the trained model's (up to hash collisions with unknown words) while
+    only two sparse vectors stay in memory. The featurizer has no state, so
+    large batches can be split across processes.
+    """
+
+    name = "hashed"
+    stateless = True
+
+    def __init__(self, idf: sparse.csr_matrix, coef: sparse.csr_matrix, intercept: float,
+                 n_features: int = HASHED_FEATURES, stop_words: Optional[str] = "english"):
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.n_features = n_features
+        self.hasher = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, stop_words=stop_words
+        )
+        super().__init__()
+
+    @classmethod
+    def from_tfidf(cls, model, vectorizer, n_features: int = HASHED_FEATURES) -> "HashedSentimentEngine":
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        buckets = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, lowercase=False, token_pattern=r"\S+"
+        ).transform(terms).indices
+        idf = sparse.csr_matrix((_idf_weights(vectorizer), (np.zeros(len(terms)), buckets)), shape=(1, n_features))
+        coef = sparse.csr_matrix((model.coef_[0], (np.zeros(len(terms)), buckets)), shape=(1, n_features))
+        return cls(idf, coef, float(model.intercept_[0]), n_features, vectorizer.stop_words)
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        counts = self.hasher.transform(texts)
+        weighted = normalize(counts.multiply(self.idf).tocsr())
+        return np.asarray((weighted @ self.coef.T).todense()).ravel() + self.intercept
+
+    def save(self, path: Path):
+        np.savez_compressed(
+            path,
+            buckets=self.idf.indices,
+            idf=self.idf.data,
+            coef=self.coef.toarray()[0, self.idf.indices],
+            intercept=self.intercept,
+            n_features=self.n_features,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "HashedSentimentEngine":
+        data = np.load(path)
+        n_features = int(data["n_features"])
+        rows = np.zeros(len(data["buckets"]))
+        idf = sparse.csr_matrix((data["idf"], (rows, data["buckets"])), shape=(1, n_features))
+        coef = sparse.csr_matrix((data["coef"], (rows, data["buckets"])), shape=(1, n_features))
+        return cls(idf, coef, float(data["intercept"]), n_features)
+
+def get_calibration_path(name: str) -> Path:
+    return MODEL_DIR / f"{name}_sentiment_calibration.json"
+
+def load_calibration(name: str) -> Dict[str, float]:
+    """Platt parameters for an engine (identity when not calibrated)"""
+    path = get_calibration_path(name)
+    if path.exists():
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sentiment calibration {path}: {e}")
+    return {"a": 1.0, "b": 0.0}
+
+def _load_pickles():
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore")
+        return (
+            joblib.load(MODEL_DIR / "logistic_model.pkl"),
+            joblib.load(MODEL_DIR / "tfidf_vectorizer.pkl"),
+        )
+
+def load_tfidf_engine() -> TfidfSentimentEngine:
+    model, vectorizer = _load_pickles()
+    return TfidfSentimentEngine(model, vectorizer)
+
+def load_hashed_engine() -> HashedSentimentEngine:
+    """From hashed_sentiment.npz, or converted in memory from the TF-IDF pickles"""
+    path = MODEL_DIR / "hashed_sentiment.npz"
+    if path.exists():
+        return HashedSentimentEngine.load(path)
+    model, vectorizer = _load_pickles()
+    return HashedSentimentEngine.from_tfidf(model, vectorizer)
+
+ENGINE_LOADERS = {
+    "tfidf": load_tfidf_engine,
+    "hashed": load_hashed_engine,
+}
+
+_engines: Dict[str, Optional[SentimentEngine]] = {}
+_engines_lock = threading.Lock()
+
+def get_engine(name: Optional[str] = None) -> Optional[SentimentEngine]:
+    """Engine by name (default SENTIMENT_ENGINE), loaded once; None if its files are missing"""
+    name = (name or DEFAULT_ENGINE).lower()
+    if name not in ENGINE_LOADERS:
+        raise ValueError(f"Unknown sentiment engine: {name}")
+    with _engines_lock:
+        if name not in _engines:
+            try:
+                _engines[name] = ENGINE_LOADERS[name]()
+                logger.info(f"Sentiment engine loaded: {name}")
+            except FileNotFoundError as e:
+                logger.warning(f"Could not load sentiment engine {name}: {e}")
+                _engines[name] = None
+        return _engines[name]
+
+def compare_engines(texts: List[str], names: Optional[List[str]] = None,
+                    neutral_band: float = NEUTRAL_BAND) -> Dict:
+    """Classify the same texts with several engines and measure how much they agree"""
+    names = names or list(ENGINE_LOADERS)
+    results = {}
+    for name in names:
+        engine = get_engine(name)
+        if engine is not None:
+            results[name] = engine.classify(texts, neutral_band)
+
+    agreement = None
+    if len(results) == 2:
+        first, second = results.values()
+        agreement = {
+            "label_agreement": float(np.mean([a["label"] == b["label"] for a, b in zip(first, second)])) if texts else None,
+            "max_probability_diff": max((abs(a["probability"] - b["probability"]) for a, b in zip(first, second)), default=None),
+        }
+
+    return {
+        "neutral_band": neutral_band,
+        "engines": results,
+        "agreement": agreement,
+    }
+
+if __name__ == "__main__":
+    # python -m utils.sentiment_engine build-hashed
+    # python -m utils.sentiment_engine calibrate <engine> labelled.csv   (columns: text,label with 0/1 labels)
+    import sys
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "build-hashed"
+    if command == "build-hashed":
+        model, vectorizer = _load_pickles()
+        engine = HashedSentimentEngine.from_tfidf(model, vectorizer)
+        engine.save(MODEL_DIR / "hashed_sentiment.npz")
+        sample = list(vectorizer.vocabulary_)[:500]
+        diff = np.abs(engine.predict_proba(sample) - TfidfSentimentEngine(model, vectorizer).predict_proba(sample))
+        print(f"Saved hashed engine ({engine.idf.nnz} buckets), max probability diff on vocabulary: {diff.max():.2e}")
+    elif command == "calibrate":
+        name, csv_path = sys.argv[2], sys.argv[3]
+        labelled = pd.read_csv(csv_path)
+        engine = ENGINE_LOADERS[name]()
+        logits = engine.logits(labelled["text"].astype(str).tolist()).reshape(-1, 1)
+        platt = LogisticRegression().fit(logits, labelled["label"].astype(int))
+        calibration = {"a": float(platt.coef_[0, 0]), "b": float(platt.intercept_[0])}
+        with open(get_calibration_path(name), "w") as f:
+            json.dump(calibration, f, indent=2)
+        print(f"{name}: {calibration} from {len(labelled)} headlines")
+    else:
+        print(f"Unknown command: {command}")
@@ -0,0 +1,290 @@
+import os
+import math
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.paths import get_data_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A story's weight halves every HALF_LIFE_HOURS after it was published
+HALF_LIFE_HOURS = float(os.getenv("SENTIMENT_HALF_LIFE_HOURS", "24"))
+# Per-source weights, e.g. "Reuters:1.5,Bloomberg:1.5,Yahoo Entertainment:0.5" (others weigh 1)
+SOURCE_WEIGHTS = os.getenv("SENTIMENT_SOURCE_WEIGHTS", "")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    ticker TEXT NOT NULL,
+    story_id TEXT NOT NULL,
+    published_at INTEGER NOT NULL,
+    score REAL NOT NULL,
+    weight REAL NOT NULL,
+    label TEXT,
+    probability REAL,
+    title TEXT,
+    url TEXT,
+    sources TEXT,
+    PRIMARY KEY (ticker, story_id)
+);
+CREATE INDEX IF NOT EXISTS idx_stories_ticker_time ON stories (ticker, published_at);
+CREATE TABLE IF NOT EXISTS index_state (
+    ticker TEXT PRIMARY KEY,
+    as_of INTEGER NOT NULL,
+    weighted_sum REAL NOT NULL,
+    weight REAL NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS index_series (
+    ticker TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (ticker, ts)
+) WITHOUT ROWID;
+"""
+
+def parse_source_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.rpartition(":")
+        if name.strip():
+            weights[name.strip().lower()] = float(weight)
+    return weights
+
+_source_weights = parse_source_weights(SOURCE_WEIGHTS)
+_write_lock = threading.Lock()
+
+def source_weight(sources: List[str]) -> float:
+    """Weight of a story: its most trusted source's weight"""
+    return max((_source_weights.get(s.lower(), 1.0) for s in sources), default=1.0)
+
+def decay(seconds: float, half_life_hours: float = HALF_LIFE_HOURS) -> float:
+    return math.pow(0.5, max(seconds, 0.0) / (half_life_hours * 3600))
+
+def parse_timestamp(value: str) -> int:
+    """Epoch seconds of an ISO date/time (UTC unless it has an offset); ValueError if invalid"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid ISO date/time: {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def parse_published(value: Optional[str]) -> int:
+    """Epoch seconds of a NewsAPI publishedAt timestamp (now if missing or invalid)"""
+    try:
+        return parse_timestamp(value) if value else int(datetime.now(timezone.utc).timestamp())
+    except ValueError:
+        return int(datetime.now(timezone.utc).timestamp())
+
+def get_index_path() -> Path:
+    override = os.getenv("SENTIMENT_INDEX_DB")
+    return Path(override) if override else get_data_dir() / "sentiment_index.sqlite3"
+
+def _connect() -> sqlite3.Connection:
+    path = get_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def ingest(ticker: str, stories: List[Dict]) -> Dict:
+    """
+    Add newly seen stories to a ticker's index
+
+    Stories already stored are ignored, so re-fetching the same headlines is
+    a no-op. The index keeps a decayed weighted sum and total weight: moving
+    it to a later time multiplies both by the decay factor and each new story
+    adds weight * score decayed by its age, so an update costs O(new stories)
+    no matter how much history exists.
+
+    Args:
+        ticker: Ticker symbol
+        stories: Dicts with story_id (news_dedup.story_id, stable across
+            restarts), publishedAt, score, label, probability, title, url
+            and sources
+
+    Returns:
+        Current index value (see current_index)
+    """
+    ticker = ticker.upper()
+    now = int(datetime.now(timezone.utc).timestamp())
+
+    with _write_lock:
+        conn = _connect()
+        try:
+            with conn:
+                added = []
+                for story in stories:
+                    published_at = min(parse_published(story.get("publishedAt")), now)
+                    sources = story.get("sources") or []
+                    weight = source_weight(sources)
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO stories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            ticker, story["story_id"], published_at, float(story["score"]), weight,
+                            story.get("label"), story.get("probability"), story.get("title"),
+                            story.get("url"), ",".join(sources),
+                        ),
+                    )
+                    if cursor.rowcount:
+                        added.append((published_at, float(story["score"]), weight))
+
+                state = conn.execute(
+                    "SELECT as_of, weighted_sum, weight FROM index_state WHERE ticker = ?", (ticker,)
+                ).fetchone()
+                as_of, weighted_sum, total_weight = (state["as_of"], state["weighted_sum"], state["weight"]) if state else (now, 0.0, 0.0)
+
+                # Move the state to now, then add the new stories at their age
+                factor = decay(now - as_of)
+                weighted_sum *= factor
+                total_weight *= factor
+                for published_at, score, weight in added:
+                    age_factor = decay(now - published_at)
+                    weighted_sum += weight * score * age_factor
+                    total_weight += weight * age_factor
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_state VALUES (?, ?, ?, ?, ?)",
+                    (ticker, now, weighted_sum, total_weight, now),
+                )
+                if total_weight > 0:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO index_series VALUES (?, ?, ?, ?)",
+                        (ticker, now, round(weighted_sum / total_weight, 4), round(total_weight, 4)),
+                    )
+        finally:
+            conn.close()
+
+    if added:
+        logger.info(f"Sentiment index {ticker}: {len(added)} new stories")
+    return current_index(ticker)
+
+def current_index(ticker: str) -> Optional[Dict]:
+    """
+    Time-decayed sentiment of a ticker right now
+
+    Decay scales the weighted sum and the weight alike, so the value only
+    moves when stories arrive while `weight` (how much recent news backs the
+    value) fades between updates.
+    """
+    ticker = ticker.upper()
+    if not get_index_path().exists():
+        return None
+    conn = _connect()
+    try:
+        state = conn.execute("SELECT * FROM index_state WHERE ticker = ?", (ticker,)).fetchone()
+        stories = conn.execute("SELECT COUNT(*) FROM stories WHERE ticker = ?", (ticker,)).fetchone()[0]
+    finally:
+        conn.close()
+    if state is None:
+        return None
+
+    now = int(datetime.now(timezone.utc).timestamp())
+    weight = state["weight"] * decay(now - state["as_of"])
+    return {
+        "value": round(state["weighted_sum"] / state["weight"], 4) if state["weight"] > 0 else None,
+        "weight": round(weight, 4),
+        "stories": stories,
+        "half_life_hours": HALF_LIFE_HOURS,
+        "updated_at": datetime.fromtimestamp(state["updated_at"], timezone.utc).isoformat(),
+        "age_seconds": now - state["updated_at"],
+    }
+
+def recent_stories(ticker: str, limit: int = 10) -> List[Dict]:
+    """Latest stored stories of a ticker, newest first"""
+    if not get_index_path().exists():
+        return []
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM stories WHERE ticker = ? ORDER BY published_at DESC LIMIT ?",
+            (ticker.upper(), limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "title": row["title"],
+            "url": row["url"],
+            "source": (row["sources"] or "Unknown").split(",")[0],
+            "sentiment": row["label"],
+            "probability": row["probability"],
+            "score": row["score"],
+            "publishedAt": datetime.fromtimestamp(row["published_at"], timezone.utc).isoformat().replace("+00:00", "Z"),
+            "sources": row["sources"].split(",") if row["sources"] else [],
+        }
+        for row in rows
+    ]
+
+def stories_since(ticker: str, since: Optional[int] = None) -> List[tuple]:
+    """(published_at, score, weight) of a ticker's stories published after `since` (epoch seconds), oldest first"""
+    if not get_index_path().exists():
+        return []
+    conn = _connect()
+    try:
+        return [tuple(row) for row in conn.execute(
+            "SELECT published_at, score, weight FROM stories WHERE ticker = ? AND published_at > ? ORDER BY published_at",
+            (ticker.upper(), since if since is not None else -1),
+        )]
+    finally:
+        conn.close()
+
+def index_version(ticker: str) -> Optional[tuple]:
+    """
+    (stored stories, latest publish time) of a ticker, None without stories
+
+    Changes only when new stories are ingested: a refresh that finds
+    nothing new keeps the version, so feature frames built on it stay valid.
+    """
+    if not get_index_path().exists():
+        return None
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*), MAX(published_at) FROM stories WHERE ticker = ?", (ticker.upper(),)
+        ).fetchone()
+    finally:
+        conn.close()
+    return tuple(row) if row[0] else None
+
+def query_series(ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+    """
+    Index values recorded at each update between two ISO dates/times
+
+    Raises:
+        ValueError: If start or end is not an ISO date/time
+    """
+    bounds = [(op, parse_timestamp(value)) for op, value in ((">=", start), ("<=", end)) if value]
+    if not get_index_path().exists():
+        return []
+    sql = "SELECT ts, value, weight FROM index_series WHERE ticker = ?"
+    params: list = [ticker.upper()]
+    for op, ts in bounds:
+        sql += f" AND ts {op} ?"
+        params.append(ts)
+    sql += " ORDER BY ts"
+
+    conn = _connect()
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(row["ts"], timezone.utc).isoformat(),
+            "value": row["value"],
+            "weight": row["weight"],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,320 @@
+import os
+import csv
+import bisect
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+from utils.constants import TICKER_LIST, TICKER_MAPPING
+from utils.paths import get_models_dir, get_data_dir
+from utils.resilience import ProviderUnavailable
+from utils.market_data import get_provider
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional CSV (symbol,name[,exchange]) with the full listing universe
+UNIVERSE_FILE = os.getenv("UNIVERSE_FILE")
+
+INDEX_EXCHANGES = {
+    "^NSEI": "NSE",
+    "^BSESN": "BSE",
+    "^GSPC": "US",
+    "^DJI": "US",
+    "^IXIC": "US",
+    "^RUT": "US",
+    "^VIX": "US",
+    "^TNX": "US",
+    "^FTSE": "LSE",
+    "^GDAXI": "XETRA",
+    "^N225": "TSE",
+}
+
+SUFFIX_EXCHANGES = {
+    ".NS": "NSE",
+    ".BO": "BSE",
+    ".L": "LSE",
+    ".DE": "XETRA",
+    ".T": "TSE",
+    "-USD": "CRYPTO",
+}
+
+def infer_exchange(symbol: str) -> str:
+    """Infer the listing exchange from the ticker suffix"""
+    if symbol in INDEX_EXCHANGES:
+        return INDEX_EXCHANGES[symbol]
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return exchange
+    return "US"
+
+def infer_asset_type(symbol: str) -> str:
+    if symbol.startswith("^"):
+        return "index"
+    if symbol.endswith("-USD"):
+        return "crypto"
+    return "stock"
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _entry_trigrams(symbol: str, name: str) -> set:
+    """Trigrams of the symbol and of each word of the name"""
+    grams = _trigrams(symbol)
+    for token in name.split():
+        grams |= _trigrams(token)
+    return grams
+
+class TickerUniverse:
+    """
+    In-memory index of every known symbol
+
+    Maps symbol -> {symbol, name, exchange, asset_type, has_model, has_data}
+    and answers prefix and fuzzy searches without touching the network.
+    Prefix search uses sorted arrays + bisect; fuzzy search uses a trigram
+    inverted index so both stay fast for tens of thousands of symbols.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._symbol_keys: List[str] = []
+        self._name_keys: List[tuple] = []
+        self._trigram_index: Dict[str, set] = {}
+        # Symbols whose name was looked up upstream, including misses kept as the symbol
+        self._names_fetched: set = set()
+
+    def add(self, symbol: str, name: Optional[str] = None, exchange: Optional[str] = None, **flags):
+        symbol = symbol.strip().upper()
+        if not symbol:
+            return
+
+        entry = self.entries.get(symbol)
+        if entry is None:
+            entry = {
+                "symbol": symbol,
+                "name": symbol,
+                "exchange": exchange or infer_exchange(symbol),
+                "asset_type": infer_asset_type(symbol),
+                "has_model": False,
+                "has_data": False,
+            }
+            self.entries[symbol] = entry
+
+        if name:
+            entry["name"] = name
+        if exchange:
+            entry["exchange"] = exchange
+        entry.update(flags)
+
+    def build_index(self):
+        """Rebuild the search structures after entries change"""
+        symbol_keys = sorted(self.entries)
+        name_keys = []
+        trigram_index: Dict[str, set] = {}
+
+        for symbol, entry in self.entries.items():
+            for token in entry["name"].lower().split():
+                name_keys.append((token, symbol))
+            for gram in _entry_trigrams(symbol, entry["name"]):
+                trigram_index.setdefault(gram, set()).add(symbol)
+
+        name_keys.sort()
+
+        with self._lock:
+            self._symbol_keys = symbol_keys
+            self._name_keys = name_keys
+            self._trigram_index = trigram_index
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        return self.entries.get(symbol.upper())
+
+    def get_name(self, symbol: str) -> Optional[str]:
+        """Known name, None if it still has to be fetched (a cached miss is the symbol itself)"""
+        entry = self.get(symbol)
+        if entry and (entry["name"] != entry["symbol"] or entry["symbol"] in self._names_fetched):
+            return entry["name"]
+        return None
+
+    def remember_name(self, symbol: str, name: str):
+        """Cache a name learned from upstream (or the symbol for a miss) so it is only fetched once"""
+        symbol = symbol.strip().upper()
+        with self._lock:
+            previous = self.entries.get(symbol)
+            indexed = set(previous["name"].lower().split()) if previous else set()
+            self.add(symbol, name=name)
+            self._names_fetched.add(symbol)
+
+            # Update the search structures in place instead of a full rebuild
+            if previous is None:
+                bisect.insort(self._symbol_keys, symbol)
+            for token in set(name.lower().split()) - indexed:
+                bisect.insort(self._name_keys, (token, symbol))
+            for gram in _entry_trigrams(symbol, name):
+                self._trigram_index.setdefault(gram, set()).add(symbol)
+
+    def symbols(self, with_model: Optional[bool] = None) -> List[str]:
+        if with_model is None:
+            return list(self._symbol_keys)
+        return [s for s in self._symbol_keys if self.entries[s]["has_model"] == with_model]
+
+    def _prefix_symbols(self, query: str, limit: int) -> List[str]:
+        keys = self._symbol_keys
+        results = []
+        i = bisect.bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query) and len(results) < limit:
+            results.append(keys[i])
+            i += 1
+        return results
+
+    def _prefix_names(self, query: str, limit: int) -> List[str]:
+        keys = self._name_keys
+        results = []
+        i = bisect.bisect_left(keys, (query, ""))
+        while i < len(keys) and keys[i][0].startswith(query) and len(results) < limit:
+            if keys[i][1] not in results:
+                results.append(keys[i][1])
+            i += 1
+        return results
+
+    def _fuzzy(self, query: str, limit: int, min_score: float = 0.5) -> List[str]:
+        # Score = share of the query's trigrams found in the symbol or a name word
+        grams = _trigrams(query)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._trigram_index.get(gram, ()))
+
+        scored = [
+            (shared / len(grams), symbol)
+            for symbol, shared in counts.items()
+            if shared / len(grams) >= min_score
+        ]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [symbol for _, symbol in scored[:limit]]
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict]:
+        """
+        Search symbols and names
+
+        Ranks exact symbol matches first, then symbol prefixes, name word
+        prefixes and finally fuzzy matches; within a rank, symbols with a
+        prediction model come first.
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        upper = query.upper()
+        lower = query.lower()
+        ranked: List[tuple] = []
+        seen = set()
+
+        def collect(symbols, rank):
+            for symbol in symbols:
+                if symbol not in seen:
+                    seen.add(symbol)
+                    ranked.append((rank, not self.entries[symbol]["has_model"], len(ranked), symbol))
+
+        with self._lock:
+            if upper in self.entries:
+                collect([upper], 0)
+            collect(self._prefix_symbols(upper, limit * 2), 1)
+            collect(self._prefix_names(lower, limit * 2), 2)
+            if fuzzy and len(seen) < limit:
+                collect(self._fuzzy(query, limit), 3)
+
+        ranked.sort()
+        return [
+            {**self.entries[symbol], "match": ("exact", "symbol", "name", "fuzzy")[rank]}
+            for rank, _, _, symbol in ranked[:limit]
+        ]
+
+def _model_symbols(models_dir: Path) -> set:
+    if not models_dir.exists():
+        return set()
+    models = {p.name[:-len("_xg.pkl")] for p in models_dir.glob("*_xg.pkl")}
+    scalers = {p.name[:-len("_scaler.pkl")] for p in models_dir.glob("*_scaler.pkl")}
+    return models & scalers
+
+def _data_symbols(data_dir: Path) -> set:
+    processed = data_dir / "processed"
+    if not processed.exists():
+        return set()
+    return {p.name[:-len("_processed.csv")] for p in processed.glob("*_processed.csv")}
+
+def _load_universe_file(universe: TickerUniverse, path: str):
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            count = 0
+            for row in reader:
+                symbol = row.get("symbol") or row.get("Symbol")
+                if symbol:
+                    universe.add(symbol, name=row.get("name") or row.get("Name"),
+                                 exchange=row.get("exchange") or row.get("Exchange"))
+                    count += 1
+        logger.info(f"Loaded {count} symbols from universe file {path}")
+    except Exception as e:
+        logger.error(f"Error loading universe file {path}: {e}")
+
+def build_universe() -> TickerUniverse:
+    """Build the universe from the constants, model files, data files and UNIVERSE_FILE"""
+    universe = TickerUniverse()
+
+    if UNIVERSE_FILE:
+        _load_universe_file(universe, UNIVERSE_FILE)
+
+    for symbol in TICKER_LIST:
+        universe.add(symbol)
+    for symbol, name in TICKER_MAPPING.items():
+        universe.add(symbol, name=name)
+
+    for symbol in _model_symbols(get_models_dir()):
+        universe.add(symbol, has_model=True)
+    for symbol in _data_symbols(get_data_dir()):
+        universe.add(symbol, has_data=True)
+
+    universe.build_index()
+    logger.info(
+        f"Ticker universe ready: {len(universe.entries)} symbols, "
+        f"{len(universe.symbols(with_model=True))} with models"
+    )
+    return universe
+
+_universe: Optional[TickerUniverse] = None
+_universe_lock = threading.Lock()
+
+def get_universe() -> TickerUniverse:
+    """Get the process-wide universe, building it on first use"""
+    global _universe
+    if _universe is None:
+        with _universe_lock:
+            if _universe is None:
+                _universe = build_universe()
+    return _universe
+
+def get_display_name(ticker: str) -> str:
+    """Get the display name from the ticker universe, asking Yahoo only once per unknown symbol"""
+    universe = get_universe()
+    name = universe.get_name(ticker)
+    if name:
+        return name
+
+    try:
+        name = get_provider(ticker).display_name(ticker)
+    except ProviderUnavailable as e:
+        # Don't remember the fallback, the name can be fetched once Yahoo recovers
+        logger.warning(f"Could not fetch name for {ticker}: {e}")
+        return ticker.upper()
+    except Exception as e:
+        logger.warning(f"Could not fetch name for {ticker}: {e}")
+        name = None
+
+    name = name or ticker.upper()
+    universe.remember_name(ticker, name)
+    return name
@@ -0,0 +1,277 @@
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from utils.paths import get_data_dir
+from utils.market_data import normalize_ohlcv, get_provider, group_by_provider, get_provider_by_name
+from utils.market_calendar import is_settled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How far back the first sync of a ticker goes
+BACKFILL_DAYS = int(os.getenv("WAREHOUSE_BACKFILL_DAYS", "400"))
+# Trailing window that is re-fetched and overwritten on every sync
+RESYNC_DAYS = int(os.getenv("WAREHOUSE_RESYNC_DAYS", "10"))
+# Minimum seconds between two upstream syncs of the same ticker
+SYNC_INTERVAL = int(os.getenv("WAREHOUSE_SYNC_INTERVAL", "900"))
+# Relative close difference on overlapping bars that counts as a restatement
+RESTATEMENT_TOLERANCE = float(os.getenv("WAREHOUSE_RESTATEMENT_TOLERANCE", "0.001"))
+# Past SYNC_INTERVAL, stored bars this many seconds older are still served
+# immediately while the sync runs in the background
+STALE_TTL = int(os.getenv("WAREHOUSE_STALE_TTL", "3600"))
+
+_frames: Dict[str, pd.DataFrame] = {}
+_last_sync: Dict[str, float] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_revalidating = set()
+
+def get_warehouse_dir() -> Path:
+    """Directory holding one OHLCV CSV per ticker"""
+    override = os.getenv("WAREHOUSE_DIR")
+    path = Path(override) if override else get_data_dir() / "warehouse"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _ticker_path(ticker: str) -> Path:
+    return get_warehouse_dir() / f"{ticker.upper()}.csv"
+
+def _ticker_lock(ticker: str) -> threading.Lock:
+    with _locks_guard:
+        if ticker not in _locks:
+            _locks[ticker] = threading.Lock()
+        return _locks[ticker]
+
+def _load(ticker: str) -> pd.DataFrame:
+    """Load a ticker from memory, falling back to its CSV on disk"""
+    if ticker in _frames:
+        return _frames[ticker]
+
+    path = _ticker_path(ticker)
+    if path.exists():
+        try:
+            frame = pd.read_csv(path, index_col="Date", parse_dates=True)
+            frame = normalize_ohlcv(frame)
+            _frames[ticker] = frame
+            # Treat the file age as the last sync so restarts don't refetch
+            _last_sync.setdefault(ticker, path.stat().st_mtime)
+            return frame
+        except Exception as e:
+            logger.error(f"Error reading warehouse file for {ticker}: {e}")
+
+    return normalize_ohlcv(None)
+
+def _save(ticker: str, frame: pd.DataFrame):
+    """Write atomically so a crash never leaves a half-written file"""
+    path = _ticker_path(ticker)
+    tmp_path = path.with_suffix(".csv.tmp")
+    frame.to_csv(tmp_path, index_label="Date")
+    os.replace(tmp_path, path)
+
+def _fetch_upstream(ticker: str, start: datetime) -> pd.DataFrame:
+    """Fetch daily bars from the ticker's market data provider"""
+    return get_provider(ticker).history([ticker], start)[ticker]
+
+def _is_restated(stored: pd.DataFrame, fetched: pd.DataFrame) -> bool:
+    """Check whether upstream rewrote bars we already have (splits, dividends)"""
+    # The newest stored bar may have been a partial intraday bar, skip it
+    overlap = stored.index[:-1].intersection(fetched.index)
+    if overlap.empty:
+        return False
+
+    old = stored.loc[overlap, "Close"].astype(float)
+    new = fetched.loc[overlap, "Close"].astype(float)
+    diff = ((new - old).abs() / old.abs().where(old != 0)).max()
+    return bool(pd.notna(diff) and diff > RESTATEMENT_TOLERANCE)
+
+def sync_ticker(ticker: str, force: bool = False) -> pd.DataFrame:
+    """
+    Bring a ticker's stored bars up to date with the upstream provider
+
+    Only bars since the last stored date (minus a trailing re-sync window)
+    are fetched, and nothing is fetched while the ticker's market stays
+    closed after a sync that saw its final bars. If the re-fetched window
+    disagrees with what is stored, the history was restated and the ticker
+    is re-downloaded in full.
+
+    Args:
+        ticker: Stock ticker symbol
+        force: Sync even if the ticker was synced recently
+
+    Returns:
+        The full stored DataFrame for the ticker
+    """
+    ticker = ticker.upper()
+
+    with _ticker_lock(ticker):
+        stored = _load(ticker)
+        last = _last_sync.get(ticker, 0)
+
+        age = time.time() - last
+        if not force and not stored.empty and age < SYNC_INTERVAL:
+            return stored
+
+        # Synced after the market's last close settled: upstream has nothing new until it reopens
+        if not force and not stored.empty and is_settled(ticker, last):
+            return stored
+
+        # Stale but recent enough: serve it now and revalidate off the request path
+        if not force and not stored.empty and age < SYNC_INTERVAL + STALE_TTL:
+            _revalidate_in_background(ticker)
+            return stored
+
+        start = _sync_start(ticker, stored)
+        try:
+            fetched = _fetch_upstream(ticker, start)
+        except Exception as e:
+            if stored.empty:
+                raise
+            logger.warning(f"Warehouse sync failed for {ticker}, serving stored bars: {e}")
+            return stored
+
+        return _apply_fetched(ticker, stored, fetched)
+
+def _sync_start(ticker: str, stored: pd.DataFrame) -> datetime:
+    if stored.empty:
+        return get_provider(ticker).window_end(ticker) - timedelta(days=BACKFILL_DAYS)
+    return stored.index[-1].to_pydatetime() - timedelta(days=RESYNC_DAYS)
+
+def _apply_fetched(ticker: str, stored: pd.DataFrame, fetched: pd.DataFrame) -> pd.DataFrame:
+    """Merge freshly fetched bars into the stored ones (caller holds the ticker lock)"""
+    if fetched.empty:
+        _last_sync[ticker] = time.time()
+        return stored
+
+    if not stored.empty and _is_restated(stored, fetched):
+        logger.info(f"Restatement detected for {ticker}, re-downloading history")
+        try:
+            backfill_start = min(
+                stored.index[0].to_pydatetime(),
+                get_provider(ticker).window_end(ticker) - timedelta(days=BACKFILL_DAYS),
+            )
+            fetched = _fetch_upstream(ticker, backfill_start)
+        except Exception as e:
+            # Not marked as synced, so the re-download is retried on the next sync
+            logger.warning(f"Re-download of restated {ticker} failed, serving stored bars: {e}")
+            return stored
+        if fetched.empty:
+            logger.warning(f"Re-download of restated {ticker} returned no bars, serving stored bars")
+            return stored
+        merged = fetched
+    else:
+        merged = pd.concat([stored[stored.index < fetched.index[0]], fetched])
+
+    merged = normalize_ohlcv(merged)
+    _save(ticker, merged)
+    _frames[ticker] = merged
+    _last_sync[ticker] = time.time()
+
+    logger.info(f"Warehouse synced {ticker}: {len(fetched)} bars fetched, {len(merged)} stored")
+    return merged
+
+def sync_tickers(tickers: List[str], force: bool = False):
+    """
+    Sync several tickers with one bulk request per provider
+
+    Only tickers that a get_history call would otherwise sync inline are
+    fetched (every ticker with `force`); recently synced or stale-servable
+    tickers are left alone.
+    """
+    due: Dict[str, datetime] = {}
+    for ticker in {t.upper() for t in tickers}:
+        stored = _load(ticker)
+        age = time.time() - _last_sync.get(ticker, 0)
+        if force or stored.empty or (age >= SYNC_INTERVAL + STALE_TTL and not is_settled(ticker, _last_sync.get(ticker, 0))):
+            due[ticker] = _sync_start(ticker, stored)
+
+    for provider_name, group in group_by_provider(list(due)).items():
+        try:
+            fetched = get_provider_by_name(provider_name).history(group, min(due[t] for t in group))
+        except Exception as e:
+            logger.warning(f"Bulk sync of {len(group)} tickers from {provider_name} failed: {e}")
+            continue
+
+        for ticker in group:
+            with _ticker_lock(ticker):
+                try:
+                    _apply_fetched(ticker, _load(ticker), fetched.get(ticker, normalize_ohlcv(None)))
+                except Exception as e:
+                    logger.warning(f"Error applying bulk sync for {ticker}: {e}")
+
+def _revalidate(ticker: str):
+    try:
+        sync_ticker(ticker, force=True)
+    except Exception as e:
+        logger.warning(f"Background sync failed for {ticker}: {e}")
+    finally:
+        with _locks_guard:
+            _revalidating.discard(ticker)
+
+def _revalidate_in_background(ticker: str):
+    """Start at most one background sync per ticker"""
+    with _locks_guard:
+        if ticker in _revalidating:
+            return
+        _revalidating.add(ticker)
+    threading.Thread(target=_revalidate, args=(ticker,), daemon=True, name=f"sync-{ticker}").start()
+
+def parse_period(period: str) -> int:
+    """Convert a yfinance-style period ("60d", "6mo", "1y") to calendar days"""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period.strip().lower())
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    value, unit = int(match.group(1)), match.group(2)
+    return value * {"d": 1, "wk": 7, "mo": 31, "y": 366}[unit]
+
+def get_history(ticker: str, days: Optional[int] = None, bars: Optional[int] = None,
+                start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Range query over the stored bars of a ticker, syncing first if stale
+
+    Args:
+        ticker: Stock ticker symbol
+        days: Calendar days back from today (like yfinance period="60d"), or from
+            the last bar of an offline provider's files
+        bars: Number of most recent bars
+        start: Inclusive start date
+        end: Inclusive end date
+
+    Returns:
+        OHLCV DataFrame indexed by date (may be empty)
+    """
+    frame = sync_ticker(ticker)
+
+    if days is not None:
+        start = get_provider(ticker).window_end(ticker) - timedelta(days=days)
+    if start is not None:
+        frame = frame[frame.index >= pd.Timestamp(start).normalize()]
+    if end is not None:
+        frame = frame[frame.index <= pd.Timestamp(end).normalize()]
+    if bars is not None:
+        frame = frame.tail(bars)
+
+    return frame.copy()
+
+def warehouse_status() -> Dict:
+    """Summary of what is stored, for debug endpoints"""
+    status = {}
+    for path in sorted(get_warehouse_dir().glob("*.csv")):
+        ticker = path.stem
+        frame = _load(ticker)
+        status[ticker] = {
+            "bars": len(frame),
+            "first": frame.index[0].strftime("%Y-%m-%d") if not frame.empty else None,
+            "last": frame.index[-1].strftime("%Y-%m-%d") if not frame.empty else None,
+            "last_sync": datetime.fromtimestamp(_last_sync[ticker]).isoformat() if ticker in _last_sync else None,
+        }
+    return status
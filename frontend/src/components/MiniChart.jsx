@@ -8,7 +8,7 @@ const MiniChart = ({ symbol }) => {
   useEffect(() => {
     const fetchHistory = async () => {
       try {
-        const res = await fetch(`${baseURL}/price-history/${symbol}?range=60`);
+        const res = await fetch(`${baseURL}/price-history/${symbol}?range=60&points=120`);
         const data = await res.json();
         setPriceHistory(data.history);
       } catch (err) {
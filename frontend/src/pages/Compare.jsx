@@ -47,7 +47,7 @@ const Compare = () => {
     await Promise.all(
       symbolsList.map(async (symbol) => {
         try {
-          const res = await fetch(`${baseURL}/predict/${symbol}`);
+          const res = await fetch(`${baseURL}/predict/${symbol}?format=display&fields=symbol,name,price,prediction,trend,confidence,sentimentScore`);
           const json = await res.json();
           newData[symbol] = json;
         } catch (e) {
@@ -31,7 +31,7 @@ const Home = () => {
             trendingRes[ticker] = priceData;
 
             // Fetch predictions
-            const { data: predictionData } = await axios.get(`${baseURL}/predict/${ticker}`);
+            const { data: predictionData } = await axios.get(`${baseURL}/predict/${ticker}?format=display&fields=symbol,prediction,confidence,trend`);
             predictionsRes[ticker] = predictionData;
 
             // Fetch sentiment
@@ -27,8 +27,10 @@ const SearchResults = () => {
     const [lastUpdated, setLastUpdated] = useState(null);
     const [isRefreshing, setIsRefreshing] = useState(false);
     const [sentiment,setSentiment]=useState("")
+    const [marketStatus, setMarketStatus] = useState(null);
     
     const intervalRef = useRef(null);
+    const marketStatusRef = useRef(null);
 
     const fetchStockData = async (showLoading = true) => {
         try {
@@ -38,7 +40,7 @@ const SearchResults = () => {
             
             console.log(`Fetching data for symbol: ${symbol}`);
 
-            const response = await axios.get(`${baseURL}/predict/${symbol}`, {
+            const response = await axios.get(`${baseURL}/predict/${symbol}?format=display`, {
                 timeout: 30000, // 30 second timeout
                 headers: {
                     'Content-Type': 'application/json',
@@ -55,7 +57,7 @@ const SearchResults = () => {
                 setLastUpdated(new Date());
                 
                 // Fetch price history
-                const historyRes = await axios.get(`${baseURL}/price-history/${symbol}?range=${range}`);
+                const historyRes = await axios.get(`${baseURL}/price-history/${symbol}?range=${range}&points=250`);
                 setPriceHistory(historyRes.data.history);
 
                 const sentimentRes = await fetch(`${baseURL}/sentiment/${symbol}`);
@@ -112,15 +114,24 @@ const SearchResults = () => {
         setIsAutoRefresh(!isAutoRefresh);
     };
 
-    // Check if market is open (simplified - you might want more sophisticated logic)
-    const isMarketHours = () => {
-        const now = new Date();
-        const day = now.getDay(); // 0 = Sunday, 6 = Saturday
-        const hour = now.getHours();
-        
-        // Basic market hours: Monday-Friday, 9:30 AM - 4:00 PM EST
-        // This is simplified - you'd want to handle holidays, timezone conversions, etc.
-        return day >= 1 && day <= 5 && hour >= 9 && hour < 16;
+    // Session of the symbol's exchange (time zone and holidays handled by the API)
+    const fetchMarketStatus = async () => {
+        try {
+            const res = await axios.get(`${baseURL}/market/${symbol}`);
+            marketStatusRef.current = res.data;
+            setMarketStatus(res.data);
+        } catch (err) {
+            console.error('Market status error:', err);
+            marketStatusRef.current = null;
+        }
+    };
+
+    // The status holds until its next transition: the close while open, the open while closed
+    const isStatusExpired = () => {
+        const status = marketStatusRef.current;
+        if (!status) return true;
+        const transition = status.open ? status.next_close : status.next_open;
+        return transition != null && new Date() >= new Date(transition);
     };
 
     const formatLastUpdated = () => {
@@ -143,7 +154,14 @@ const SearchResults = () => {
     useEffect(() => {
         if (isAutoRefresh && stockData) {
             intervalRef.current = setInterval(() => {
-                fetchStockData(false);
+                // Closed markets don't change until they reopen, so only poll while open;
+                // an expired status is refetched (with one last poll for the closing bar)
+                if (isStatusExpired()) {
+                    fetchStockData(false);
+                    fetchMarketStatus();
+                } else if (marketStatusRef.current.open) {
+                    fetchStockData(false);
+                }
             }, refreshInterval * 1000);
         } else {
             if (intervalRef.current) {
@@ -163,6 +181,7 @@ const SearchResults = () => {
     useEffect(() => {
         if (symbol) {
             fetchStockData(true);
+            fetchMarketStatus();
         } else {
             setError("No symbol provided");
             setLoading(false);
@@ -235,6 +254,13 @@ const SearchResults = () => {
                     <h1 className="text-4xl font-bold text-primary-400">{stockData.symbol}</h1>
                     <p className="text-text-300 text-lg">{stockData.name}</p>
                     <p className="text-sm text-text-500">Last updated: {formatLastUpdated()}</p>
+                    {marketStatus && (
+                        <p className="text-sm text-text-500">
+                            Market {marketStatus.open
+                                ? 'open'
+                                : `closed, opens ${new Date(marketStatus.next_open).toLocaleString()}`}
+                        </p>
+                    )}
                 </div>
                 
                 {/* Refresh Controls */}
@@ -375,6 +401,11 @@ const SearchResults = () => {
                     <div className="text-center">
                         <p className="text-sm text-text-400 mb-1">Predicted Price</p>
                         <p className="text-2xl font-bold text-accent-400">${stockData.prediction}</p>
+                        {stockData.prediction_interval && (
+                            <p className="text-xs text-text-400 mt-1">
+                                80% range: ${stockData.prediction_interval.p10} – ${stockData.prediction_interval.p90}
+                            </p>
+                        )}
                     </div>
                     <div className="text-center">
                         <p className="text-sm text-text-400 mb-1">Confidence</p>